@@ -0,0 +1,113 @@
+import argparse
+import asyncio
+import random
+import time
+
+from src.account_actions import AccountActions
+from src.async_actions import AsyncAccountActions, AsyncDatabaseManager
+from src.database_manager import DatabaseManager
+from src.user_manager import UserManager
+
+ADMIN = {"login": "brenda74@example.org", "password": "+vJCXfFLe0"}
+USER = {"login": "kcabrera@example.net", "password": "gk2VM$qk@S"}
+COMMANDS = [("print_all_accounts", ADMIN), ("print_oldest_account", ADMIN),
+            ("group_by_age", ADMIN), ("print_children", USER),
+            ("find_similar_children_by_age", USER)]
+
+
+class BlockingActions:
+    """Calls AccountActions directly from coroutines, blocking the loop."""
+
+    def __init__(self, database_name):
+        self.db_manager = DatabaseManager(database_name)
+        self.account_actions = AccountActions(UserManager(self.db_manager))
+
+    def __getattr__(self, name):
+        method = getattr(self.account_actions, name)
+
+        async def call(args):
+            return method(args)
+        return call
+
+    def close_connection(self):
+        self.db_manager.close_connection()
+
+
+async def client(actions, requests, rng, latencies):
+    for _ in range(requests):
+        method, args = rng.choice(COMMANDS)
+        start = time.perf_counter()
+        await getattr(actions, method)(args)
+        latencies.append(time.perf_counter() - start)
+
+
+async def measure_lag(stop, lags, interval=0.001):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def load_test(actions, clients, requests):
+    """
+    Runs concurrent clients sending random commands.
+
+    :param actions: AsyncAccountActions or BlockingActions.
+    :param clients: Number of concurrent clients.
+    :param requests: Requests sent by every client one after another.
+    :return: Latencies of the requests, delays of a 1 ms timer
+    on the event loop and the wall time in seconds.
+    """
+    latencies = []
+    lags = []
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(measure_lag(stop, lags))
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        client(actions, requests, random.Random(i), latencies)
+        for i in range(clients)])
+    wall = time.perf_counter() - start
+    stop.set()
+    await lag_task
+    return latencies, lags, wall
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def main():
+    """
+    Prints p50 and p99 latency, throughput and the event loop delay of
+    concurrent clients for thread pools of growing size and for
+    AccountActions blocking the loop, on users.sqlite3.
+    """
+    parser = argparse.ArgumentParser(
+        description="Load test of AsyncAccountActions.")
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=10,
+                        help="Requests per client.")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    print(f"{'mode':>12} {'p50 [ms]':>9} {'p99 [ms]':>9} {'req/s':>8} "
+          f"{'loop p99 delay [ms]':>20}")
+    modes = [(f"{workers} workers", workers) for workers in args.workers]
+    for name, workers in modes + [("blocking", None)]:
+        if workers is None:
+            actions = manager = BlockingActions("users.sqlite3")
+        else:
+            manager = AsyncDatabaseManager("users.sqlite3", workers)
+            actions = AsyncAccountActions(manager)
+        latencies, lags, wall = asyncio.run(
+            load_test(actions, args.clients, args.requests))
+        manager.close_connection()
+        print(f"{name:>12} {percentile(latencies, 0.5) * 1e3:>9.1f} "
+              f"{percentile(latencies, 0.99) * 1e3:>9.1f} "
+              f"{len(latencies) / wall:>8.0f} "
+              f"{percentile(lags, 0.99) * 1e3:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.bench_login import build_database
+from src.database_manager import DatabaseManager
+from src.passwords import PasswordVerifier, hash_password
+from src.result_cache import ResultCache
+from src.user_manager import UserManager
+
+
+def hash_accounts(database_name, accounts):
+    """
+    Replaces the plaintext passwords of the first accounts with hashes.
+
+    :param database_name: The path of the SQLite database file.
+    :param accounts: Number of accounts running commands.
+    """
+    conn = sqlite3.connect(database_name)
+    with conn:
+        conn.executemany(
+            "UPDATE Users SET password = ? WHERE id_user = ?",
+            [(hash_password(f"password{i}"), i) for i in range(accounts)])
+    conn.close()
+
+
+def time_commands(database_name, accounts, commands, verifier):
+    """
+    Times validate_credentials of commands run in turn by the accounts.
+
+    :param database_name: The path of the SQLite database file.
+    :param accounts: Number of accounts running commands.
+    :param commands: Number of timed commands.
+    :param verifier: The PasswordVerifier of the UserManager.
+    :return: Mean seconds per command.
+    """
+    db_manager = DatabaseManager(database_name)
+    user_manager = UserManager(db_manager, verifier)
+    start = time.perf_counter()
+    for command in range(commands):
+        i = command % accounts
+        assert user_manager.validate_credentials(
+            {"login": f"user{i}@example.com", "password": f"password{i}"},
+            admin=False)
+    seconds = (time.perf_counter() - start) / commands
+    db_manager.close_connection()
+    return seconds
+
+
+def main():
+    """
+    Prints the amortized authentication cost per command of service
+    accounts running many commands, verifying the password hash on every
+    command and with the cache of recently verified credentials.
+    """
+    parser = argparse.ArgumentParser(
+        description="Amortized cost of password verification per command.")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--accounts", type=int, nargs="+",
+                        default=[1, 10, 100])
+    parser.add_argument("--commands", type=int, default=1000,
+                        help="Timed commands per number of accounts.")
+    args = parser.parse_args()
+
+    print(f"{'accounts':>10} {'uncached [ms]':>14} {'cached [ms]':>12} "
+          f"{'speedup':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        database_name = os.path.join(directory, "users.sqlite3")
+        build_database(database_name, args.users, indexed=True)
+        hash_accounts(database_name, max(args.accounts))
+        for accounts in args.accounts:
+            uncached = time_commands(
+                database_name, accounts, max(args.commands // 10, accounts),
+                PasswordVerifier(ResultCache(maxsize=0)))
+            cached = time_commands(database_name, accounts, args.commands,
+                                   PasswordVerifier())
+            print(f"{accounts:>10} {uncached * 1e3:>14.3f} "
+                  f"{cached * 1e3:>12.3f} {uncached / cached:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
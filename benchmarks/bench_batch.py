@@ -0,0 +1,141 @@
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.bench_reports import build_database
+from src.account_actions import AccountActions
+from src.batch_actions import BatchAccountActions
+from src.database_manager import DatabaseManager
+from src.passwords import HASH_ITERATIONS, hash_password
+from src.server import COMMANDS
+from src.user_manager import UserManager
+
+
+def requests(command, size, count):
+    rng = random.Random(0)
+    for _ in range(count):
+        i = rng.randrange(size)
+        login = rng.choice([f"user{i}@example.com", f"{500000000 + i}"])
+        yield json.dumps({"command": command, "login": login,
+                          "password": "password"})
+
+
+def distinct_requests(command, count):
+    for i in range(count):
+        yield json.dumps({"command": command,
+                          "login": f"user{i}@example.com",
+                          "password": "password"})
+
+
+def hash_database(database_name, iterations):
+    """
+    Replaces the plaintext passwords of build_database with a PBKDF2
+    hash. Every user shares the hash, so the database is built at once,
+    but the verifier hashes every distinct login again.
+
+    :return: Milliseconds create_database spends hashing one password
+    with one worker.
+    """
+    start = time.perf_counter()
+    encoded = hash_password("password", iterations)
+    hash_time = (time.perf_counter() - start) * 1e3
+    with sqlite3.connect(database_name) as conn:
+        conn.execute("UPDATE USERS SET password = ?", (encoded,))
+    conn.close()
+    return hash_time
+
+
+def throughput(function, lines):
+    start = time.perf_counter()
+    function(lines)
+    return len(lines) / (time.perf_counter() - start)
+
+
+def main():
+    """
+    Prints users answered per second by the batch mode and by calling
+    AccountActions once per user on a synthetic database, and by the
+    batch mode with growing verifier thread counts once its passwords
+    are hashed.
+    """
+    parser = argparse.ArgumentParser(
+        description="Throughput of script.py batch per command.")
+    parser.add_argument("--size", type=int, default=100_000,
+                        help="Number of users in the database.")
+    parser.add_argument("--count", type=int, default=100_000,
+                        help="Batch requests of print-children.")
+    parser.add_argument("--similar-count", type=int, default=200,
+                        help="Batch requests of "
+                             "find-similar-children-by-age.")
+    parser.add_argument("--single-count", type=int, default=100,
+                        help="Requests answered one by one per command.")
+    parser.add_argument("--chunksize", type=int, default=10_000)
+    parser.add_argument("--hash-iterations", type=int,
+                        default=HASH_ITERATIONS,
+                        help="PBKDF2 iterations of the hashed database.")
+    parser.add_argument("--hashed-count", type=int, default=200,
+                        help="Batch requests of distinct users "
+                             "on the hashed database.")
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, os.cpu_count() or 1}),
+                        help="Threads verifying passwords.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_name = os.path.join(directory, "users.sqlite3")
+        build_database(database_name, args.size)
+        db_manager = DatabaseManager(database_name)
+        account_actions = AccountActions(UserManager(db_manager))
+        batch_actions = BatchAccountActions(account_actions, args.chunksize,
+                                            1)
+
+        def one_by_one(lines):
+            for line in lines:
+                request = json.loads(line)
+                try:
+                    getattr(account_actions, COMMANDS[request["command"]])(
+                        request)
+                except SystemExit:
+                    pass
+
+        def batch(lines):
+            for _ in batch_actions.run(lines):
+                pass
+
+        print(f"{'command':>30} {'requests':>9} {'batch [users/s]':>16} "
+              f"{'one by one [users/s]':>21}")
+        for command, count in (("print-children", args.count),
+                               ("find-similar-children-by-age",
+                                args.similar_count)):
+            lines = list(requests(command, args.size, count))
+            batch_rate = throughput(batch, lines)
+            single_rate = throughput(
+                one_by_one, lines[:args.single_count])
+            print(f"{command:>30} {count:>9} {batch_rate:>16.0f} "
+                  f"{single_rate:>21.0f}")
+        db_manager.close_connection()
+
+        hash_time = hash_database(database_name, args.hash_iterations)
+        print(f"\nPBKDF2 with {args.hash_iterations} iterations: "
+              f"create_database hashes {hash_time:.1f} ms per user "
+              f"with --workers 1")
+        print(f"{'workers':>7} {'requests':>9} {'batch [users/s]':>16}")
+        lines = list(distinct_requests("print-children", args.hashed_count))
+        for workers in args.workers:
+            db_manager = DatabaseManager(database_name)
+            batch_actions = BatchAccountActions(
+                AccountActions(UserManager(db_manager)), args.chunksize,
+                workers)
+            batch_rate = throughput(
+                lambda lines: list(batch_actions.run(lines)), lines)
+            print(f"{workers:>7} {args.hashed_count:>9} "
+                  f"{batch_rate:>16.0f}")
+            db_manager.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.dedupe import dedupe_users
+
+
+def legacy_dedupe(data):
+    """
+    The sort and drop_duplicates passes used before dedupe_users.
+    """
+    data = data.sort_values(
+        by=["created_at"], ascending=False, kind="stable"
+    ).drop_duplicates(subset=["email"], keep="last")
+    return data.drop_duplicates(subset=["telephone_number"], keep="last")
+
+
+def build_frame(rows, duplicates):
+    """
+    Builds normalized users where a fraction of the emails and of the
+    telephone numbers are copies of other users' ones.
+    """
+    rng = np.random.default_rng(0)
+    emails = np.arange(rows)
+    phones = np.arange(rows)
+    for keys in (emails, phones):
+        copies = rng.random(rows) < duplicates
+        keys[copies] = rng.integers(rows, size=copies.sum())
+    seconds = rng.integers(1_600_000_000, 1_700_000_000, size=rows)
+    return pd.DataFrame({
+        "firstname": pd.Series(["Anna"] * rows, dtype=str),
+        "telephone_number": pd.Series(phones + 500_000_000).astype(str),
+        "email": pd.Series([f"user{key}@example.com"
+                            for key in emails.tolist()], dtype=str),
+        "password": pd.Series([f"pbkdf2_sha256$100000${key:032x}"
+                               for key in range(rows)], dtype=str),
+        "role": pd.Series(["user"] * rows, dtype=str),
+        "created_at": pd.Series(pd.to_datetime(seconds, unit="s").strftime(
+            "%Y-%m-%d %H:%M:%S"), dtype=str),
+        "children": pd.Series([[]] * rows, dtype=object),
+    })
+
+
+def main():
+    """
+    Prints the time of deduplicating users with the sort and
+    drop_duplicates passes and with dedupe_users, which also writes the
+    conflict report, and checks that both keep the same users.
+    """
+    parser = argparse.ArgumentParser(
+        description="Throughput of removing duplicate users.")
+    parser.add_argument("--rows", type=int, nargs="+",
+                        default=[100_000, 1_000_000, 5_000_000])
+    parser.add_argument("--duplicates", type=float, default=0.1,
+                        help="Fraction of duplicate emails and numbers.")
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'legacy [s]':>11} {'engine [s]':>11} "
+          f"{'speedup':>8} {'conflicts':>10}")
+    for rows in args.rows:
+        data = build_frame(rows, args.duplicates)
+        start = time.perf_counter()
+        expected = legacy_dedupe(data)
+        legacy = time.perf_counter() - start
+        start = time.perf_counter()
+        users, conflicts = dedupe_users(data)
+        engine = time.perf_counter() - start
+        pd.testing.assert_frame_equal(users, expected)
+        print(f"{rows:>10} {legacy:>11.2f} {engine:>11.2f} "
+              f"{legacy / engine:>7.1f}x {len(conflicts):>10}")
+
+
+if __name__ == "__main__":
+    main()
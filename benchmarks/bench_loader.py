@@ -0,0 +1,54 @@
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.data_generator import write_corpus
+from src.create_database import LoadData, Users
+
+
+def load(directory, workers):
+    """
+    Loads and deduplicates all files of the directory.
+
+    :param directory: The path of the corpus directory.
+    :param workers: Number of processes parsing files.
+    :return: Wall time in seconds and the deduplicated users.
+    """
+    start = time.perf_counter()
+    user_processor = Users(LoadData(directory).concat_data(workers))
+    user_processor.process_user_data()
+    return time.perf_counter() - start, user_processor.data
+
+
+def main():
+    """
+    Prints wall time of LoadData.concat_data with growing worker counts.
+    """
+    parser = argparse.ArgumentParser(
+        description="Parallel file loading of create_database.")
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--users-per-file", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_corpus(directory, args.files, args.users_per_file)
+        print(f"{args.files} files, {args.users_per_file} users per file, "
+              f"{os.cpu_count()} cores")
+        print(f"{'workers':>8} {'wall [s]':>10} {'speedup':>8}")
+        baseline_time, baseline_users = load(directory, 1)
+        print(f"{1:>8} {baseline_time:>10.2f} {1:>8.2f}")
+        for workers in args.workers:
+            if workers == 1:
+                continue
+            wall_time, users = load(directory, workers)
+            if not users.equals(baseline_users):
+                raise AssertionError(f"{workers} workers changed the result")
+            print(f"{workers:>8} {wall_time:>10.2f} "
+                  f"{baseline_time / wall_time:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
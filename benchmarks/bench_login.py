@@ -0,0 +1,92 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+
+from src.create_database import DatabaseManager as CreateDatabaseManager
+from src.database_manager import DatabaseManager
+from src.user_manager import UserManager
+
+
+def build_database(database_name, size, indexed):
+    """
+    Builds a database with synthetic users in the create_database layout.
+
+    :param database_name: The path of the SQLite database file.
+    :param size: Number of users.
+    :param indexed: Boolean if the create_database indexes are built.
+    """
+    users = pd.DataFrame({
+        "firstname": ["User"] * size,
+        "telephone_number": [f"{500000000 + i}" for i in range(size)],
+        "email": [f"user{i}@example.com" for i in range(size)],
+        "password": [f"password{i}" for i in range(size)],
+        "role": ["admin" if i % 2 else "user" for i in range(size)],
+        "created_at": ["2023-01-01 00:00:00"] * size,
+    })
+    users.index.names = ["id_user"]
+    children = pd.DataFrame({"name": ["Child"], "age": ["1"],
+                             "index_parent": [0]})
+    db_manager = CreateDatabaseManager(database_name)
+    db_manager.save_to_database(children, "Children")
+    db_manager.save_to_database(users, "Users")
+    if indexed:
+        db_manager.create_indexes()
+    db_manager.close_connection()
+
+
+def time_logins(database_name, size, repeat):
+    """
+    Times UserManager.validate_credentials for random existing users.
+
+    :param database_name: The path of the SQLite database file.
+    :param size: Number of users in the database.
+    :param repeat: Number of timed logins.
+    :return: Median login latency in microseconds.
+    """
+    db_manager = DatabaseManager(database_name)
+    user_manager = UserManager(db_manager)
+    rng = random.Random(0)
+    timings = []
+    for _ in range(repeat):
+        i = rng.randrange(size)
+        login = rng.choice([f"user{i}@example.com", f"{500000000 + i}"])
+        start = time.perf_counter()
+        user_manager.validate_credentials(
+            {"login": login, "password": f"password{i}"}, admin=False)
+        timings.append(time.perf_counter() - start)
+    db_manager.close_connection()
+    return statistics.median(timings) * 1e6
+
+
+def main():
+    """
+    Prints median login latency with and without indexes per database size.
+    """
+    parser = argparse.ArgumentParser(
+        description="Login latency of UserManager.validate_credentials.")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=1000,
+                        help="Timed logins per indexed database.")
+    args = parser.parse_args()
+
+    print(f"{'users':>10} {'indexed [us]':>14} {'full scan [us]':>16}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            latency = {}
+            for indexed in (True, False):
+                database_name = os.path.join(
+                    directory, f"users_{size}_{indexed}.sqlite3")
+                build_database(database_name, size, indexed)
+                repeat = args.repeat if indexed else max(args.repeat // 50, 5)
+                latency[indexed] = time_logins(database_name, size, repeat)
+            print(f"{size:>10} {latency[True]:>14.1f} {latency[False]:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
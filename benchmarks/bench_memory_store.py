@@ -0,0 +1,153 @@
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.bench_reports import build_database
+from benchmarks.bench_similar import sample_logins
+from src.account_actions import AccountActions
+from src.create_database import DatabaseManager as CreateDatabaseManager
+from src.database_manager import DatabaseManager
+from src.memory_store import (MemoryAccountActions, MemoryStore,
+                              MemoryUserManager)
+from src.user_manager import UserManager
+
+REPORTS = {
+    "print_all_accounts":
+        lambda actions: lambda args: actions.all_accounts_report(),
+    "print_oldest_account":
+        lambda actions: lambda args: actions.oldest_account_report(),
+    "group_by_age":
+        lambda actions: lambda args: actions.age_groups_report(),
+    "print_children": lambda actions: actions.children_report,
+    "find_similar_children_by_age":
+        lambda actions: actions.similar_children_report,
+}
+
+
+def dataframe_bytes(database_name):
+    """
+    Measures Users and Children read with pd.read_sql.
+
+    :param database_name: The path of the SQLite database file.
+    :return: Bytes of both DataFrames, strings included.
+    """
+    conn = sqlite3.connect(database_name)
+    nbytes = sum(
+        pd.read_sql(f"SELECT * FROM {table}", conn)
+        .memory_usage(deep=True).sum()
+        for table in ("Users", "Children"))
+    conn.close()
+    return nbytes
+
+
+def dict_rows_bytes(database_name):
+    """
+    Measures Users and Children read as one dictionary per row.
+
+    :param database_name: The path of the SQLite database file.
+    :return: Bytes allocated by Python for the rows.
+    """
+    conn = sqlite3.connect(database_name)
+    conn.row_factory = sqlite3.Row
+    tracemalloc.start()
+    tables = [[dict(row) for row in conn.execute(f"SELECT * FROM {table}")]
+              for table in ("Users", "Children")]
+    nbytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del tables
+    conn.close()
+    return nbytes
+
+
+def store_bytes(database_name):
+    """
+    Measures the MemoryStore of the database.
+
+    :param database_name: The path of the SQLite database file.
+    :return: Bytes of the columns and indexes, and the bytes allocated
+    by Python for the store and at the peak of loading it.
+    """
+    conn = sqlite3.connect(database_name)
+    tracemalloc.start()
+    store = MemoryStore.from_connection(conn)
+    allocated, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    conn.close()
+    return store.nbytes, allocated, peak
+
+
+def median_time(function, logins, repeat):
+    timings = []
+    for i in range(repeat):
+        args = {"login": logins[i % len(logins)], "password": "password"}
+        start = time.perf_counter()
+        function(args)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e6
+
+
+def main():
+    """
+    Prints the memory per user of the MemoryStore compared to pandas
+    DataFrames of the tables, and the median latency of validating
+    credentials and of every report from SQLite and from memory.
+    """
+    parser = argparse.ArgumentParser(
+        description="Memory and latency of the in-memory user store.")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            database_name = os.path.join(directory, f"users_{size}.sqlite3")
+            build_database(database_name, size)
+            db_manager = CreateDatabaseManager(database_name)
+            db_manager.bump_generation()
+            db_manager.close_connection()
+
+            nbytes, allocated, peak = store_bytes(database_name)
+            pandas_bytes = dataframe_bytes(database_name)
+            dict_bytes = dict_rows_bytes(database_name)
+            print(f"{size} users")
+            print(f"{'':>30} {'bytes/user':>11}")
+            for name, value in (("store columns", nbytes),
+                                ("store allocated", allocated),
+                                ("store loading peak", peak),
+                                ("pd.read_sql", pandas_bytes),
+                                ("dict per row", dict_bytes)):
+                print(f"{name:>30} {value / size:>11.0f}")
+
+            logins = sample_logins(database_name, args.repeat)
+            db_manager = DatabaseManager(database_name)
+            sqlite_actions = AccountActions(UserManager(db_manager))
+            memory_manager = MemoryUserManager(db_manager)
+            start = time.perf_counter()
+            memory_manager.refresh()
+            print(f"store loaded in {time.perf_counter() - start:.2f} s")
+            memory_actions = MemoryAccountActions(memory_manager)
+            print(f"{'':>30} {'sqlite [us]':>12} {'memory [us]':>12}")
+            latencies = {"validate_credentials": [
+                median_time(
+                    lambda args: actions.user_manager.validate_credentials(
+                        args, False), logins, args.repeat)
+                for actions in (sqlite_actions, memory_actions)]}
+            for command, report in REPORTS.items():
+                latencies[command] = [
+                    median_time(report(actions), logins, args.repeat)
+                    for actions in (sqlite_actions, memory_actions)]
+            for command, (sqlite_time, memory_time) in latencies.items():
+                print(f"{command:>30} {sqlite_time:>12.1f} "
+                      f"{memory_time:>12.1f}")
+            db_manager.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import argparse
+import re
+import time
+
+import pandas as pd
+
+from benchmarks.data_generator import generate_users
+from src.create_database import Children, Users
+
+
+def legacy_valid_telephone(number):
+    pattern = r"^\+48|^48|^\(48\)|^00"
+    number = re.sub(pattern, "", number)
+    return number.replace(" ", "")
+
+
+def legacy_process_individual_child(children, parent_index):
+    processed_children = []
+    if isinstance(children, list):
+        for child in children:
+            child["index_parent"] = parent_index
+            processed_children.append(child)
+    elif not pd.isna(children):
+        for child in children.split(","):
+            child_data = {
+                "name": child.split(" ")[0],
+                "index_parent": parent_index,
+                "age": re.search(r"\d{1,2}", child).group(),
+            }
+            processed_children.append(child_data)
+    return processed_children
+
+
+def legacy_normalize(data):
+    """
+    The row by row normalization used before Users and Children
+    were vectorized.
+    """
+    data = data.copy()
+    data["telephone_number"] = data["telephone_number"].map(
+        legacy_valid_telephone)
+    data["created_at"] = data["created_at"].map(str)
+    children_database = []
+    for index, row in data.iterrows():
+        if row["children"]:
+            children_database.extend(
+                legacy_process_individual_child(row["children"], index))
+    return data, pd.DataFrame(children_database)
+
+
+def normalize(data):
+    user_processor = Users(data.copy())
+    user_processor.format_telephone()
+    user_processor.format_creation_date()
+    children_df = Children(user_processor.data).process_children_data()
+    return user_processor.data, children_df
+
+
+def build_frame(rows, base_rows=100_000):
+    """
+    Builds users with children as CSV strings for a third of the rows
+    and as lists of dictionaries, as JSON and XML files give, for the rest.
+    Timestamps are mixed with strings as after concatenating JSON files.
+    Users without a telephone number are left out, as remove_nan drops
+    them before normalization.
+    """
+    base = pd.DataFrame(generate_users(min(rows, base_rows)))
+    base = base[base["telephone_number"].notna()].reset_index(drop=True)
+    text_rows = base.index % 3 == 0
+    base["children"] = base["children"].astype(object)
+    base.loc[text_rows, "children"] = base.loc[text_rows, "children"].map(
+        lambda children: ",".join(f"{child['name']} ({child['age']})"
+                                  for child in children))
+    created_at = base["created_at"].astype(object)
+    created_at[~text_rows] = pd.to_datetime(created_at[~text_rows])
+    base["created_at"] = created_at
+    copies = -(-rows // len(base))
+    data = pd.concat([base] * copies, ignore_index=True).iloc[:rows].copy()
+    # The row by row normalization writes into the children dictionaries,
+    # so every row needs its own copies.
+    data["children"] = data["children"].map(
+        lambda children: [dict(child) for child in children]
+        if isinstance(children, list) else children)
+    return data
+
+
+def main():
+    """
+    Prints throughput of the vectorized and the row by row normalization
+    and checks that both give the same tables.
+    """
+    parser = argparse.ArgumentParser(
+        description="Throughput of user and children normalization.")
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    args = parser.parse_args()
+
+    data = build_frame(args.rows)
+    timings = {}
+    results = {}
+    for name, function in (("vectorized", normalize),
+                           ("row by row", legacy_normalize)):
+        start = time.perf_counter()
+        results[name] = function(data)
+        timings[name] = time.perf_counter() - start
+
+    users, children = results["vectorized"]
+    legacy_users, legacy_children = results["row by row"]
+    pd.testing.assert_series_equal(
+        users["telephone_number"], legacy_users["telephone_number"],
+        check_dtype=False)
+    pd.testing.assert_series_equal(
+        users["created_at"], legacy_users["created_at"], check_dtype=False)
+    pd.testing.assert_frame_equal(
+        children, legacy_children[children.columns], check_dtype=False)
+
+    print(f"{args.rows} users, {len(children)} children")
+    print(f"{'':>12} {'rows/s':>10}")
+    for name, timing in timings.items():
+        print(f"{name:>12} {args.rows / timing:>10.0f}")
+    print(f"speedup: {timings['row by row'] / timings['vectorized']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import argparse
+import os
+import tempfile
+
+from benchmarks.bench_reports import build_database
+from benchmarks.bench_similar import sample_logins, time_report
+from src.account_actions import AccountActions
+from src.database_manager import DatabaseManager
+from src.parallel_actions import ParallelAccountActions
+from src.user_manager import UserManager
+
+
+def main():
+    """
+    Prints median latency of find-similar-children-by-age answered by
+    AccountActions in the current process and by ParallelAccountActions
+    with growing worker counts, and checks that all reports are the same.
+    """
+    parser = argparse.ArgumentParser(
+        description="Similar children read by a pool of processes.")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_name = os.path.join(directory, "users.sqlite3")
+        build_database(database_name, args.users)
+        logins = sample_logins(database_name, args.repeat)
+        db_manager = DatabaseManager(database_name)
+        account_actions = AccountActions(UserManager(db_manager))
+        baseline_time, baseline_outputs = time_report(
+            account_actions.similar_children_report, logins, args.repeat)
+        parents = sum(output.count("\n") + 1
+                      for output in baseline_outputs) / len(logins)
+        print(f"{args.users} users, {parents:.0f} parents per report, "
+              f"{os.cpu_count()} cores")
+        print(f"{'workers':>10} {'median [ms]':>12} {'speedup':>8}")
+        print(f"{'in-process':>10} {baseline_time:>12.1f} {1:>8.2f}")
+        for workers in args.workers:
+            parallel_actions = ParallelAccountActions(
+                UserManager(db_manager), workers)
+            # Starts the worker processes before timing.
+            parallel_actions.similar_children_report({"login": logins[0]})
+            wall_time, outputs = time_report(
+                parallel_actions.similar_children_report, logins,
+                args.repeat)
+            parallel_actions.close()
+            if outputs != baseline_outputs:
+                raise AssertionError(f"{workers} workers changed the report")
+            print(f"{workers:>10} {wall_time:>12.1f} "
+                  f"{baseline_time / wall_time:>8.2f}")
+        db_manager.close_connection()
+
+
+if __name__ == "__main__":
+    main()
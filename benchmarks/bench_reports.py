@@ -0,0 +1,100 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+
+from src.create_database import DatabaseManager as CreateDatabaseManager
+from src.database_manager import DatabaseManager
+
+QUERIES = {
+    "print_all_accounts": (
+        "SELECT user_count FROM USERS_SUMMARY",
+        "SELECT COUNT(*) FROM USERS",
+    ),
+    "print_oldest_account": (
+        """SELECT firstname, email, created_at FROM USERS
+           WHERE id_user = (SELECT oldest_id_user FROM USERS_SUMMARY)""",
+        "SELECT firstname, email, created_at FROM USERS ORDER BY created_at",
+    ),
+    "group_by_age": (
+        "SELECT age, count FROM CHILDREN_AGES ORDER BY count, age",
+        """SELECT age, COUNT(*) FROM CHILDREN
+           GROUP BY age ORDER BY COUNT(*)""",
+    ),
+}
+
+
+def build_database(database_name, size):
+    """
+    Builds a database with synthetic users, two children each on average,
+    and the create_database indexes and summary tables.
+    """
+    rng = random.Random(0)
+    users = pd.DataFrame({
+        "firstname": ["User"] * size,
+        "telephone_number": [f"{500000000 + i}" for i in range(size)],
+        "email": [f"user{i}@example.com" for i in range(size)],
+        "password": ["password"] * size,
+        "role": ["user"] * size,
+        "created_at": [f"2023-01-01 00:00:00.{rng.randrange(10**6):06d}"
+                       for _ in range(size)],
+    })
+    users.index.names = ["id_user"]
+    parents = [rng.randrange(size) for _ in range(2 * size)]
+    children = pd.DataFrame({
+        "name": ["Child"] * len(parents),
+        "age": [str(rng.randint(1, 18)) for _ in parents],
+        "index_parent": parents,
+    })
+    db_manager = CreateDatabaseManager(database_name)
+    db_manager.save_to_database(children, "Children")
+    db_manager.save_to_database(users, "Users")
+    db_manager.create_indexes()
+    db_manager.create_summary_tables()
+    db_manager.close_connection()
+
+
+def median_time(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e3
+
+
+def main():
+    """
+    Prints median latency of the admin queries on summary tables
+    and of the full scans they replace per database size.
+    """
+    parser = argparse.ArgumentParser(
+        description="Admin reports from summary tables and full scans.")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'users':>10} {'command':>22} {'summary [ms]':>13} "
+          f"{'scan [ms]':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            database_name = os.path.join(directory, f"users_{size}.sqlite3")
+            build_database(database_name, size)
+            db_manager = DatabaseManager(database_name)
+            for command, (summary_query, scan_query) in QUERIES.items():
+                summary_time = median_time(
+                    lambda: db_manager.sql_query(summary_query), args.repeat)
+                scan_time = median_time(
+                    lambda: db_manager.sql_query(scan_query), args.repeat)
+                print(f"{size:>10} {command:>22} {summary_time:>13.2f} "
+                      f"{scan_time:>10.2f}")
+            db_manager.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from src.account_actions import AccountActions
+from src.client import QueryClient
+from src.database_manager import DatabaseManager
+from src.server import QueryServer
+from src.user_manager import UserManager
+
+ADMIN = ("brenda74@example.org", "+vJCXfFLe0")
+USER = ("kcabrera@example.net", "gk2VM$qk@S")
+COMMANDS = [("print-all-accounts", ADMIN), ("print-oldest-account", ADMIN),
+            ("group-by-age", ADMIN), ("print-children", USER),
+            ("find-similar-children-by-age", USER)]
+
+
+def median_time(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e3
+
+
+def main():
+    """
+    Prints median latency of every command answered by the server
+    and by a fresh script.py process, on the users.sqlite3 database
+    created from the data folder.
+    """
+    parser = argparse.ArgumentParser(
+        description="Latency of script.py serve compared to script.py.")
+    parser.add_argument("--repeat", type=int, default=1000,
+                        help="Timed requests per command on the server.")
+    parser.add_argument("--cli-repeat", type=int, default=5,
+                        help="Timed script.py runs per command.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        socket_path = os.path.join(directory, "users.sock")
+        db_manager = DatabaseManager("users.sqlite3")
+        server = QueryServer(socket_path,
+                             AccountActions(UserManager(db_manager)))
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        client = QueryClient(socket_path)
+
+        print(f"{'command':>30} {'server [ms]':>12} {'script.py [ms]':>15}")
+        for command, (login, password) in COMMANDS:
+            server_time = median_time(
+                lambda: client.run(command, login, password), args.repeat)
+            cli_time = median_time(
+                lambda: subprocess.run(
+                    [sys.executable, "script.py", command,
+                     "--login", login, "--password", password],
+                    check=True, capture_output=True),
+                args.cli_repeat)
+            print(f"{command:>30} {server_time:>12.3f} {cli_time:>15.1f}")
+
+        client.close()
+        server.shutdown()
+        server.server_close()
+        thread.join()
+        db_manager.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from benchmarks.bench_reports import build_database
+from src.account_actions import AccountActions, LEGACY_MULTI_CHILD_SEPARATOR
+from src.database_manager import DatabaseManager
+from src.user_manager import UserManager
+
+JOIN_SIMILAR_SQL = """WITH caller_children AS (
+                          SELECT CHILDREN.rowid AS position,
+                          CHILDREN.age FROM CHILDREN
+                          LEFT JOIN USERS ON
+                          USERS.id_user = CHILDREN.index_parent
+                          WHERE USERS.email=:login
+                          OR USERS.telephone_number=:login
+                      ),
+                      matches AS (
+                          SELECT CHILDREN.index_parent,
+                          ROW_NUMBER() OVER (
+                              ORDER BY caller_children.position,
+                              CHILDREN.name, CHILDREN.rowid
+                          ) AS rank
+                          FROM caller_children JOIN CHILDREN ON
+                          CHILDREN.age = caller_children.age
+                      ),
+                      parents AS (
+                          SELECT index_parent, MIN(rank) AS rank
+                          FROM matches GROUP BY index_parent
+                      ),
+                      rendered AS (
+                          SELECT index_parent,
+                          GROUP_CONCAT(name || ', ' || age, '; ')
+                          AS children
+                          FROM (SELECT CHILDREN.index_parent,
+                                CHILDREN.name, CHILDREN.age
+                                FROM CHILDREN JOIN parents ON
+                                parents.index_parent =
+                                CHILDREN.index_parent
+                                ORDER BY CHILDREN.index_parent,
+                                CHILDREN.name, CHILDREN.rowid)
+                          GROUP BY index_parent
+                      )
+                      SELECT USERS.firstname, USERS.telephone_number,
+                      rendered.children,
+                      (SELECT COUNT(*) FROM caller_children)
+                      AS caller_children,
+                      (SELECT telephone_number FROM USERS
+                       WHERE USERS.email=:login
+                       OR USERS.telephone_number=:login)
+                      AS caller_telephone
+                      FROM parents
+                      JOIN USERS ON USERS.id_user = parents.index_parent
+                      JOIN rendered ON
+                      rendered.index_parent = parents.index_parent
+                      ORDER BY parents.rank"""
+
+
+def join_similar_children_report(user_manager, args):
+    """
+    The report used before the age index: matches, ranks and renders
+    children of all similar parents in one query over Children.
+    """
+    result = user_manager.execute_query(JOIN_SIMILAR_SQL,
+                                        {"login": args["login"]})
+    telephone_result = result[0]['caller_telephone']
+    if result[0]['caller_children'] > 1:
+        separator = LEGACY_MULTI_CHILD_SEPARATOR
+    else:
+        separator = ", "
+    console_output = [
+        f"{rows['firstname']}{separator}"
+        f"{rows['telephone_number']}: {rows['children']}"
+        for rows in result
+    ]
+    return "\n".join(value for value in console_output
+                     if telephone_result not in value)
+
+
+def sample_logins(database_name, count):
+    conn = sqlite3.connect(database_name)
+    logins = [row[0] for row in conn.execute(
+        """SELECT email FROM Users WHERE id_user IN
+           (SELECT index_parent FROM Children)
+           ORDER BY id_user LIMIT ?""", (count,))]
+    conn.close()
+    return logins
+
+
+def time_report(report, logins, repeat):
+    timings = []
+    outputs = []
+    for i in range(repeat):
+        args = {"login": logins[i % len(logins)]}
+        start = time.perf_counter()
+        outputs.append(report(args))
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e3, outputs
+
+
+def main():
+    """
+    Prints median latency of find-similar-children-by-age answered from
+    the age index and from the join over Children per database size,
+    with the number of returned parents and the latency per parent.
+    """
+    parser = argparse.ArgumentParser(
+        description="Similar children from the age index and the join.")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'users':>10} {'parents':>9} {'index [ms]':>11} "
+          f"{'join [ms]':>10} {'index [us/parent]':>18}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            database_name = os.path.join(directory, f"users_{size}.sqlite3")
+            build_database(database_name, size)
+            logins = sample_logins(database_name, args.repeat)
+            db_manager = DatabaseManager(database_name)
+            user_manager = UserManager(db_manager)
+            account_actions = AccountActions(user_manager)
+            index_time, outputs = time_report(
+                account_actions.similar_children_report, logins, args.repeat)
+            join_time, join_outputs = time_report(
+                lambda login: join_similar_children_report(user_manager,
+                                                           login),
+                logins, args.repeat)
+            assert outputs == join_outputs
+            parents = statistics.median(
+                output.count("\n") + 1 for output in outputs)
+            print(f"{size:>10} {parents:>9.0f} {index_time:>11.2f} "
+                  f"{join_time:>10.2f} "
+                  f"{index_time * 1e3 / parents:>18.2f}")
+            db_manager.close_connection()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow as pa
+
+from benchmarks.bench_reports import build_database
+from src.create_database import DatabaseManager as CreateDatabaseManager
+from src.snapshot import ArrowSnapshot, write_snapshots
+
+SCANS = {
+    "user count": "SELECT * FROM Users",
+    "oldest account": "SELECT * FROM Users",
+    "children ages": "SELECT * FROM Children",
+}
+PANDAS = {
+    "user count": len,
+    "oldest account": lambda users: users.loc[users["created_at"].idxmin()],
+    "children ages": lambda children: children["age"].value_counts(),
+}
+ARROW = {
+    "user count": ArrowSnapshot.user_count,
+    "oldest account": ArrowSnapshot.oldest_user,
+    "children ages": ArrowSnapshot.children_ages,
+}
+
+
+def median_time(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e3
+
+
+def main():
+    """
+    Prints latency of the aggregations over a table read by pd.read_sql
+    and over memory mapped Arrow snapshots, and the bytes each of them
+    copies into memory, per database size.
+    """
+    parser = argparse.ArgumentParser(
+        description="Aggregations over SQLite and Arrow snapshots.")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'users':>10} {'aggregation':>15} {'read_sql [ms]':>14} "
+          f"{'arrow [ms]':>11} {'read_sql [MB]':>14} {'arrow [MB]':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            database_name = os.path.join(directory, f"users_{size}.sqlite3")
+            snapshot_directory = os.path.join(directory, f"snapshot_{size}")
+            build_database(database_name, size)
+            db_manager = CreateDatabaseManager(database_name)
+            db_manager.bump_generation()
+            write_snapshots(db_manager.conn, snapshot_directory)
+            db_manager.close_connection()
+
+            conn = sqlite3.connect(database_name)
+            allocated = pa.total_allocated_bytes()
+            snapshot = ArrowSnapshot(snapshot_directory)
+            arrow_bytes = pa.total_allocated_bytes() - allocated
+            for name, sql_query in SCANS.items():
+                frame = pd.read_sql(sql_query, conn)
+                frame_bytes = frame.memory_usage(deep=True).sum()
+                pandas_time = median_time(
+                    lambda: PANDAS[name](pd.read_sql(sql_query, conn)),
+                    args.repeat)
+                arrow_time = median_time(
+                    lambda: ARROW[name](snapshot), args.repeat)
+                print(f"{size:>10} {name:>15} {pandas_time:>14.2f} "
+                      f"{arrow_time:>11.3f} {frame_bytes / 1e6:>14.1f} "
+                      f"{arrow_bytes / 1e6:>11.1f}")
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
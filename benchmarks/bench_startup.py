@@ -0,0 +1,80 @@
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+ADMIN = ("brenda74@example.org", "+vJCXfFLe0")
+USER = ("kcabrera@example.net", "gk2VM$qk@S")
+COMMANDS = [("print-all-accounts", ADMIN), ("print-oldest-account", ADMIN),
+            ("group-by-age", ADMIN), ("print-children", USER),
+            ("find-similar-children-by-age", USER)]
+# Runs script.py after importing the pandas based loader first,
+# as script.py did when it imported src.create_database at top level.
+EAGER = ("import sys, runpy, src.create_database; sys.argv[0] = 'script.py'; "
+         "runpy.run_path('script.py', run_name='__main__')")
+
+
+def import_time(command):
+    """
+    Sums the cumulative -X importtime of the top level imports.
+
+    :param command: Arguments passed to the Python interpreter.
+    :return: Import time in milliseconds and
+    a boolean if pandas was imported.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", *command],
+                            check=True, capture_output=True, text=True)
+    total = 0
+    pandas = False
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if name.strip() == "pandas":
+            pandas = True
+        if not name.startswith("  "):
+            total += int(cumulative)
+    return total / 1e3, pandas
+
+
+def wall_time(command, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *command],
+                       check=True, capture_output=True)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1e3
+
+
+def main():
+    """
+    Prints import and wall time of the query commands of script.py
+    compared to running them with the pandas loader imported eagerly,
+    on the users.sqlite3 database created from the data folder.
+    """
+    parser = argparse.ArgumentParser(
+        description="Cold start time of script.py query commands.")
+    parser.add_argument("--repeat", type=int, default=10,
+                        help="Timed runs per command.")
+    args = parser.parse_args()
+
+    print(f"{'command':>30} {'imports [ms]':>13} {'wall [ms]':>10} "
+          f"{'eager imports [ms]':>19} {'eager wall [ms]':>16} "
+          f"{'speedup':>8} {'pandas':>7}")
+    for command, (login, password) in COMMANDS:
+        arguments = [command, "--login", login, "--password", password]
+        lazy = ["script.py", *arguments]
+        eager = ["-c", EAGER, *arguments]
+        lazy_imports, pandas = import_time(lazy)
+        eager_imports, _ = import_time(eager)
+        lazy_wall = wall_time(lazy, args.repeat)
+        eager_wall = wall_time(eager, args.repeat)
+        print(f"{command:>30} {lazy_imports:>13.1f} {lazy_wall:>10.1f} "
+              f"{eager_imports:>19.1f} {eager_wall:>16.1f} "
+              f"{eager_wall / lazy_wall:>7.1f}x {str(pandas):>7}")
+
+
+if __name__ == "__main__":
+    main()
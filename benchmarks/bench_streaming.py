@@ -0,0 +1,101 @@
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bench_reports import build_database
+from benchmarks.bench_similar import sample_logins
+from src.account_actions import AccountActions
+from src.create_database import DatabaseManager as CreateDatabaseManager
+from src.database_manager import DatabaseManager
+from src.output import write_rows
+from src.user_manager import UserManager
+
+
+class FirstLineStream:
+    """
+    A stream discarding what is written and remembering when the first
+    line was written.
+    """
+
+    def __init__(self):
+        self.first_line = None
+
+    def write(self, text):
+        if self.first_line is None:
+            self.first_line = time.perf_counter()
+
+    def writelines(self, lines):
+        for line in lines:
+            self.write(line)
+
+
+def buffered(account_actions, args, stream):
+    stream.write(account_actions.similar_children_report(args) + "\n")
+
+
+def streamed(output_format):
+    def write(account_actions, args, stream):
+        write_rows("find_similar_children_by_age",
+                   account_actions.similar_children_rows(args),
+                   output_format, stream)
+    return write
+
+
+def measure(write, account_actions, args):
+    """
+    Runs one command writing to a FirstLineStream, once timed and once
+    tracing memory, which slows down allocations.
+
+    :return: Seconds to the first line, seconds to the end and peak
+    bytes allocated by Python.
+    """
+    stream = FirstLineStream()
+    start = time.perf_counter()
+    write(account_actions, args, stream)
+    end = time.perf_counter()
+    tracemalloc.start()
+    write(account_actions, args, FirstLineStream())
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return stream.first_line - start, end - start, peak
+
+
+def main():
+    """
+    Prints the time to the first line, the total time and the peak
+    memory of find-similar-children-by-age written at once after
+    joining all lines and streamed from the cursor as text, JSON lines
+    and CSV.
+    """
+    parser = argparse.ArgumentParser(
+        description="Time to first line and memory of streamed output.")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_name = os.path.join(directory, "users.sqlite3")
+        build_database(database_name, args.users)
+        db_manager = CreateDatabaseManager(database_name)
+        db_manager.bump_generation()
+        db_manager.close_connection()
+        login = {"login": sample_logins(database_name, 1)[0]}
+        db_manager = DatabaseManager(database_name)
+        account_actions = AccountActions(UserManager(db_manager))
+        lines = account_actions.similar_children_report(login).count("\n")
+        print(f"{args.users} users, {lines + 1} lines")
+        print(f"{'':>14} {'first line [s]':>15} {'total [s]':>10} "
+              f"{'peak [MB]':>10}")
+        for name, write in (("joined", buffered),
+                            ("text", streamed("text")),
+                            ("jsonl", streamed("jsonl")),
+                            ("csv", streamed("csv"))):
+            first_line, total, peak = measure(write, account_actions, login)
+            print(f"{name:>14} {first_line:>15.3f} {total:>10.3f} "
+                  f"{peak / 1e6:>10.1f}")
+        db_manager.close_connection()
+
+
+if __name__ == "__main__":
+    main()
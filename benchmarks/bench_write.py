@@ -0,0 +1,80 @@
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.data_generator import generate_users
+from src.create_database import Children, DatabaseManager, Users
+
+
+def legacy_save(database_name, users, children):
+    """
+    The write path used before the bulk load: pandas to_sql with
+    default journaling and an implicit index column, then the indexes.
+    """
+    db_manager = DatabaseManager(database_name)
+    children.to_sql(name="Children", con=db_manager.conn)
+    users.to_sql(name="Users", con=db_manager.conn)
+    db_manager.create_indexes()
+    db_manager.close_connection()
+
+
+def bulk_save(database_name, users, children):
+    db_manager = DatabaseManager(database_name)
+    with db_manager.bulk_load():
+        db_manager.save_to_database(children, "Children")
+        db_manager.save_to_database(users, "Users")
+        db_manager.create_indexes()
+    db_manager.close_connection()
+
+
+def table_rows(database_name):
+    conn = sqlite3.connect(database_name)
+    rows = (conn.execute("SELECT * FROM Users ORDER BY id_user").fetchall(),
+            conn.execute("""SELECT "index", name, CAST(age AS TEXT),
+                            index_parent FROM Children
+                            ORDER BY "index" """).fetchall())
+    conn.close()
+    return rows
+
+
+def main():
+    """
+    Prints rows per second written by the legacy and the bulk write
+    path and checks that both give the same tables.
+    """
+    parser = argparse.ArgumentParser(
+        description="Throughput of writing users and children to SQLite.")
+    parser.add_argument("--users", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    user_processor = Users(pd.DataFrame(generate_users(args.users)))
+    user_processor.process_user_data()
+    children = Children(user_processor.data).process_children_data()
+    users = user_processor.data.drop(columns=["children"])
+    rows = len(users) + len(children)
+
+    timings = {}
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for name, function in (("to_sql", legacy_save),
+                               ("bulk load", bulk_save)):
+            database_name = os.path.join(directory, f"{name}.sqlite3")
+            start = time.perf_counter()
+            function(database_name, users, children)
+            timings[name] = time.perf_counter() - start
+            results[name] = table_rows(database_name)
+    assert results["to_sql"] == results["bulk load"]
+
+    print(f"{len(users)} users, {len(children)} children")
+    print(f"{'':>12} {'rows/s':>10}")
+    for name, timing in timings.items():
+        print(f"{name:>12} {rows / timing:>10.0f}")
+    print(f"speedup: {timings['to_sql'] / timings['bulk load']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+from benchmarks.data_generator import generate_users, write_xml
+from src.create_database import LoadData
+
+
+def read_xml_tree(file):
+    """
+    The XML reader used before LoadData.read_xml parsed incrementally,
+    building the whole tree before reading any user.
+    """
+    tree = ET.parse(file)
+    root = tree.getroot()
+    list_dict = []
+
+    for user in root.findall(".//user"):
+        children_list = []
+        row_dict = {
+            u.tag: u.text
+            for u in user.iter()
+            if u.tag not in ["user", "age", "name", "child"]
+        }
+        children = user.find(".//children")
+        row_dict["children"] = [
+            child.attrib for child in children.findall(".//child")
+        ]
+        for child in children.findall(".//child"):
+            child_dict = dict()
+            for c in child:
+                child_dict[c.tag] = c.text
+            children_list.append(child_dict)
+            row_dict["children"] = children_list
+        list_dict.append(row_dict)
+    return list_dict
+
+
+READERS = {"tree": read_xml_tree, "iterparse": LoadData.read_xml}
+
+
+def measure(reader, file):
+    """
+    Reads all users of the file and prints wall time
+    and peak RSS of the process as JSON.
+    """
+    start = time.perf_counter()
+    users = sum(1 for _ in READERS[reader](file))
+    wall_time = time.perf_counter() - start
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"users": users, "wall_time": wall_time,
+                      "peak_rss_kb": peak_rss}))
+
+
+def main():
+    """
+    Prints throughput and peak RSS of both XML readers,
+    each measured in a fresh interpreter.
+    """
+    parser = argparse.ArgumentParser(
+        description="Throughput and peak RSS of XML readers.")
+    parser.add_argument("--users", type=int, default=500_000)
+    parser.add_argument("--generate", metavar="FILE",
+                        help=argparse.SUPPRESS)
+    parser.add_argument("--measure", nargs=2, metavar=("READER", "FILE"),
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.generate:
+        write_xml(args.generate, generate_users(args.users))
+        return
+    if args.measure:
+        measure(*args.measure)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Generating and measuring run in separate interpreters, since
+        # peak RSS is inherited by processes started from this one.
+        file = os.path.join(directory, "users.xml")
+        subprocess.run([sys.executable, "-m", "benchmarks.bench_xml",
+                        "--users", str(args.users), "--generate", file],
+                       check=True)
+        size_mb = os.path.getsize(file) / 2 ** 20
+        print(f"{args.users} users, {size_mb:.0f} MB")
+        print(f"{'reader':>10} {'users/s':>10} {'peak RSS [MB]':>14}")
+        for reader in READERS:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_xml",
+                 "--measure", reader, file],
+                check=True, capture_output=True, text=True).stdout
+            result = json.loads(output)
+            print(f"{reader:>10} "
+                  f"{result['users'] / result['wall_time']:>10.0f} "
+                  f"{result['peak_rss_kb'] / 1024:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+import random
+from datetime import datetime, timedelta
+from xml.sax.saxutils import escape
+
+FIRSTNAMES = ["Anna", "Andrew", "Brenda", "Brandy", "Christopher", "Danny",
+              "Erica", "James", "Justin", "Kyle", "Mindy", "Patricia",
+              "Roberto", "Sarah", "Teresa", "Tanner"]
+TELEPHONE_PREFIXES = ["", "+48", "(48)", "00"]
+PASSWORD_CHARACTERS = ("abcdefghijklmnopqrstuvwxyz"
+                       "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789!@#$%^&*()_+")
+FIRST_CREATED_AT = datetime(2022, 1, 1)
+SIZES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+
+def generate_users(count, seed=0, duplicate_ratio=0.05):
+    """
+    Generates users in the format of the files in the data folder.
+
+    Some users reuse the email or telephone number of an earlier user,
+    some have an invalid email, a telephone number written in groups
+    of three digits or no telephone number, as in the data folder, so
+    that deduplication and validation have work to do.
+
+    :param count: Number of users.
+    :param seed: Seed of the random generator.
+    :param duplicate_ratio: Share of users duplicating an earlier user.
+    :return: A list of user dictionaries with children
+    as a list of {'name', 'age'} dictionaries.
+    """
+    rng = random.Random(seed)
+    users = []
+    for i in range(count):
+        number = f"{rng.randrange(100_000_000, 1_000_000_000)}"
+        telephone_number = TELEPHONE_PREFIXES[i % 4] + number
+        variant = rng.random()
+        if variant < 0.02:
+            telephone_number = None
+        elif variant < 0.05:
+            telephone_number = " ".join([number[:3], number[3:6],
+                                         number[6:]])
+        user = {
+            "firstname": rng.choice(FIRSTNAMES),
+            "telephone_number": telephone_number,
+            "email": f"user{seed}x{i}@example.com",
+            "password": "".join(rng.choices(PASSWORD_CHARACTERS, k=10)),
+            "role": rng.choice(["admin", "user"]),
+            "created_at": str(FIRST_CREATED_AT + timedelta(
+                seconds=rng.randrange(2 * 365 * 24 * 3600))),
+            "children": [
+                {"name": rng.choice(FIRSTNAMES), "age": rng.randint(1, 18)}
+                for _ in range(rng.randint(0, 3))
+            ],
+        }
+        if users and rng.random() < duplicate_ratio:
+            earlier = rng.choice(users)
+            key = rng.choice(["email", "telephone_number"])
+            user[key] = earlier[key]
+        elif rng.random() < 0.01:
+            user["email"] = f"user{seed}x{i}.example.com"
+        users.append(user)
+    return users
+
+
+def write_csv(file, users):
+    with open(file, "w", encoding="utf-8") as handle:
+        handle.write("firstname;telephone_number;email;password;"
+                     "role;created_at;children\n")
+        for user in users:
+            children = ",".join(f"{child['name']} ({child['age']})"
+                                for child in user["children"])
+            handle.write(";".join([
+                user["firstname"], user["telephone_number"] or "",
+                user["email"],
+                user["password"], user["role"],
+                user["created_at"], children]) + "\n")
+
+
+def write_json(file, users):
+    with open(file, "w", encoding="utf-8") as handle:
+        json.dump(users, handle, indent=2)
+
+
+def write_xml(file, users):
+    with open(file, "w", encoding="utf-8") as handle:
+        handle.write("<users>")
+        for user in users:
+            handle.write("<user>")
+            for key in ["firstname", "telephone_number", "email",
+                        "password", "role", "created_at"]:
+                if user[key] is None:
+                    handle.write(f"<{key} />")
+                else:
+                    handle.write(f"<{key}>{escape(user[key])}</{key}>")
+            if user["children"]:
+                handle.write("<children>")
+                for child in user["children"]:
+                    handle.write(f"<child><name>{child['name']}</name>"
+                                 f"<age>{child['age']}</age></child>")
+                handle.write("</children>")
+            else:
+                handle.write("<children />")
+            handle.write("</user>")
+        handle.write("</users>")
+
+
+WRITERS = {"csv": write_csv, "json": write_json, "xml": write_xml}
+
+
+def write_corpus(directory, files, users_per_file, seed=0, users=None):
+    """
+    Writes a deterministic corpus of CSV, JSON and XML files,
+    rotating the formats, into nested directories.
+
+    Only one file of users is held in memory at a time.
+
+    :param directory: The path of the corpus directory.
+    :param files: Number of files.
+    :param users_per_file: Number of users per file.
+    :param seed: Seed of the random generator.
+    :param users: Total number of users, the last file holding the rest
+    (default is files * users_per_file).
+    """
+    if users is None:
+        users = files * users_per_file
+    for i in range(files):
+        extension = list(WRITERS)[i % len(WRITERS)]
+        subdirectory = os.path.join(directory, f"part_{i % 10}")
+        os.makedirs(subdirectory, exist_ok=True)
+        file_users = generate_users(
+            min(users_per_file, users - i * users_per_file),
+            seed=seed * 1_000_003 + i)
+        WRITERS[extension](
+            os.path.join(subdirectory, f"users_{i}.{extension}"), file_users)
+
+
+def main():
+    """
+    Writes a corpus of a given number of users for create_database.
+    """
+    parser = argparse.ArgumentParser(
+        description="Write a deterministic corpus of CSV, JSON and XML "
+                    "files in the format of the data folder.")
+    parser.add_argument("directory", help="Directory of the corpus.")
+    parser.add_argument("--users", default="10k",
+                        help=f"Number of users or one of {', '.join(SIZES)}.")
+    parser.add_argument("--users-per-file", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    users = SIZES.get(args.users.lower()) or int(args.users)
+    files = -(-users // args.users_per_file)
+    write_corpus(args.directory, files, args.users_per_file, args.seed,
+                 users)
+    print(f"{files} files with {users} users written to {args.directory}.")
+
+
+if __name__ == "__main__":
+    main()
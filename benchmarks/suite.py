@@ -0,0 +1,273 @@
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.data_generator import SIZES, write_corpus
+from src.account_actions import AccountActions
+from src.create_database import LoadData, create_database
+from src.database_manager import DatabaseManager
+from src.passwords import verify_password
+from src.user_manager import UserManager
+
+MODES = ["memory", "streaming", "incremental"]
+COMMANDS = {
+    "print_all_accounts": True,
+    "print_oldest_account": True,
+    "group_by_age": True,
+    "check_summary_tables": True,
+    "print_children": False,
+    "find_similar_children_by_age": False,
+}
+
+
+def metadata(args):
+    """
+    Describes the machine, the versions and the corpus of a run.
+
+    :param args: Parsed arguments of the run.
+    :return: A dictionary of run metadata.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], check=True, capture_output=True,
+            text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "users": args.users,
+        "users_per_file": args.users_per_file,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "hash_iterations": args.hash_iterations,
+    }
+
+
+def time_create_database(corpus, directory, mode, iterations=None):
+    """
+    Times create_database of the corpus in a new database.
+
+    :param corpus: The path of the corpus directory.
+    :param directory: Directory of the created database.
+    :param mode: One of MODES.
+    :param iterations: Number of PBKDF2 iterations of password hashes
+    (default is HASH_ITERATIONS).
+    :return: The path of the database and a dictionary of results.
+    """
+    database_name = os.path.join(directory, f"{mode}.sqlite3")
+    args = {"database": database_name, "directory": corpus,
+            "incremental": mode == "incremental",
+            "streaming": mode == "streaming",
+            "chunksize": 100_000, "workers": 1,
+            "hash_iterations": iterations}
+    start = time.perf_counter()
+    create_database(args)
+    results = {f"create_database/{mode}": {
+        "seconds": time.perf_counter() - start}}
+    if mode == "incremental":
+        start = time.perf_counter()
+        create_database(args)
+        results["create_database/incremental_unchanged"] = {
+            "seconds": time.perf_counter() - start}
+    return database_name, results
+
+
+def sample_credentials(database_name, corpus, count=20):
+    """
+    Picks an admin and users with children of the database.
+
+    The database stores password hashes, so the plaintext passwords
+    are looked up in the corpus and checked against the hashes.
+
+    :param database_name: The path of the SQLite database file.
+    :param corpus: The path of the corpus directory.
+    :param count: Number of users.
+    :return: Credentials of the admin and a list of user credentials.
+    """
+    conn = sqlite3.connect(database_name)
+    admin = conn.execute("""SELECT email, password FROM Users
+                            WHERE role = 'admin' ORDER BY id_user
+                            LIMIT 1""").fetchone()
+    users = conn.execute("""SELECT email, password FROM Users
+                            WHERE id_user IN
+                            (SELECT index_parent FROM Children)
+                            ORDER BY id_user LIMIT ?""", (count,)).fetchall()
+    conn.close()
+    hashes = dict([admin] + users)
+    candidates = {email: set() for email in hashes}
+    for df_chunk in LoadData(corpus).iter_chunks(100_000):
+        df_chunk = df_chunk[df_chunk["email"].isin(hashes)]
+        for email, password in zip(df_chunk["email"], df_chunk["password"]):
+            candidates[email].add(str(password))
+    passwords = {email: next(password for password in candidates[email]
+                             if verify_password(password, hashes[email]))
+                 for email in hashes}
+    return ({"login": admin[0], "password": passwords[admin[0]]},
+            [{"login": login, "password": passwords[login]}
+             for login, _ in users])
+
+
+def time_commands(database_name, corpus, commands, repeat):
+    """
+    Times every AccountActions command, rotating through sample users.
+
+    :param database_name: The path of the SQLite database file.
+    :param corpus: The path of the corpus directory.
+    :param commands: Names of AccountActions methods.
+    :param repeat: Timed calls per command.
+    :return: A dictionary of median, p95 and minimum seconds per command.
+    """
+    admin, users = sample_credentials(database_name, corpus)
+    db_manager = DatabaseManager(database_name)
+    account_actions = AccountActions(UserManager(db_manager))
+    results = {}
+    for command in commands:
+        method = getattr(account_actions, command)
+        credentials = [admin] if COMMANDS[command] else users
+        timings = []
+        for i in range(repeat):
+            start = time.perf_counter()
+            method(credentials[i % len(credentials)])
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        results[command] = {
+            "seconds": statistics.median(timings),
+            "p95_seconds": timings[min(int(len(timings) * 0.95),
+                                       len(timings) - 1)],
+            "min_seconds": timings[0],
+        }
+    db_manager.close_connection()
+    return results
+
+
+def run(args):
+    """
+    Generates or reuses a corpus, times create_database in every mode and
+    every command, and writes the results as JSON.
+
+    :param args: Parsed arguments of the run command.
+    """
+    args.users = SIZES.get(args.users.lower()) or int(args.users)
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = args.corpus or os.path.join(directory, "corpus")
+        if not os.path.isdir(corpus) or not os.listdir(corpus):
+            start = time.perf_counter()
+            write_corpus(corpus, -(-args.users // args.users_per_file),
+                         args.users_per_file, args.seed, args.users)
+            print(f"corpus of {args.users} users written in "
+                  f"{time.perf_counter() - start:.1f} s", file=sys.stderr)
+        database_name = None
+        for mode in args.modes:
+            mode_database, mode_results = time_create_database(
+                corpus, directory, mode, args.hash_iterations)
+            database_name = database_name or mode_database
+            results.update(mode_results)
+        results.update(time_commands(database_name, corpus, args.commands,
+                                     args.repeat))
+
+    report = {"metadata": metadata(args), "results": results}
+    with open(args.output, "w", encoding="utf-8") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"{'benchmark':>40} {'seconds':>12}")
+    for name, result in results.items():
+        print(f"{name:>40} {result['seconds']:>12.6f}")
+    print(f"results written to {args.output}")
+
+
+def compare(args):
+    """
+    Prints the change of every benchmark between two result files.
+
+    :param args: Parsed arguments of the compare command.
+    :return: 1 when a benchmark got slower than the threshold, else 0.
+    """
+    with open(args.baseline, encoding="utf-8") as handle:
+        baseline = json.load(handle)
+    with open(args.candidate, encoding="utf-8") as handle:
+        candidate = json.load(handle)
+    for key in ("users", "commit"):
+        print(f"{key}: {baseline['metadata'].get(key)} -> "
+              f"{candidate['metadata'].get(key)}")
+    print(f"{'benchmark':>40} {'baseline [s]':>13} {'candidate [s]':>14} "
+          f"{'change':>8}")
+    regressions = 0
+    for name, result in candidate["results"].items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["seconds"]
+        after = result["seconds"]
+        change = after / before - 1 if before else 0.0
+        flag = ""
+        if change > args.threshold:
+            flag = "slower"
+            regressions += 1
+        elif change < -args.threshold:
+            flag = "faster"
+        print(f"{name:>40} {before:>13.6f} {after:>14.6f} "
+              f"{change:>+8.1%} {flag}")
+    return 1 if regressions else 0
+
+
+def main():
+    """
+    Runs the benchmark suite or compares two of its result files.
+    """
+    parser = argparse.ArgumentParser(
+        description="Benchmark suite of create_database and AccountActions.")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+
+    parser_run = subparsers.add_parser(
+        "run", help="Time create_database and every command.")
+    parser_run.add_argument(
+        "--users", default="10k",
+        help=f"Number of users or one of {', '.join(SIZES)}.")
+    parser_run.add_argument("--users-per-file", type=int, default=100_000)
+    parser_run.add_argument("--seed", type=int, default=0)
+    parser_run.add_argument(
+        "--corpus", help="Corpus directory, generated when missing or empty.")
+    parser_run.add_argument("--modes", nargs="+", choices=MODES,
+                            default=MODES)
+    parser_run.add_argument("--commands", nargs="+", choices=list(COMMANDS),
+                            default=list(COMMANDS))
+    parser_run.add_argument(
+        "--hash-iterations", type=int,
+        help="PBKDF2 iterations of password hashes (default is 100000).")
+    parser_run.add_argument("--repeat", type=int, default=20,
+                            help="Timed calls per command.")
+    parser_run.add_argument("--output", default="benchmark_results.json")
+    parser_run.set_defaults(func=run)
+
+    parser_compare = subparsers.add_parser(
+        "compare", help="Compare two result files.")
+    parser_compare.add_argument("baseline")
+    parser_compare.add_argument("candidate")
+    parser_compare.add_argument(
+        "--threshold", type=float, default=0.1,
+        help="Relative change reported as slower or faster.")
+    parser_compare.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
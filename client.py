@@ -0,0 +1,35 @@
+import argparse
+
+from src.client import QueryClient
+from src.server import COMMANDS
+
+
+def main():
+    """
+    Main function sending a command to the server of script.py serve.
+    """
+    parser = argparse.ArgumentParser(
+        description="Run a command on the server started "
+                    "with python script.py serve.")
+    parser.add_argument("command", choices=sorted(COMMANDS),
+                        help="Command as in script.py.")
+    parser.add_argument(
+        "--login", required=True, help="Email or telephone number."
+    )
+    parser.add_argument(
+        "--password", required=True, help="Password to account."
+    )
+    parser.add_argument(
+        "--socket", default="users.sock", help="Unix socket of the server."
+    )
+    args = parser.parse_args()
+
+    client = QueryClient(args.socket)
+    output = client.run(args.command, args.login, args.password)
+    client.close()
+    if output is not None:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
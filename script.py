@@ -1,18 +1,205 @@
 import argparse
+import os
+import sys
 
 from src.account_actions import AccountActions
 from src.database_manager import DatabaseManager
+from src.output import OUTPUT_FORMATS
+from src.profiler import Profiler
+from src.result_cache import (CachedAccountActions, DiskCache, ResultCache,
+                              disk_cache_name)
+from src.sharding import (ShardedAccountActions, ShardedDatabaseManager,
+                          shard_names)
 from src.user_manager import UserManager
-from src.create_database import create_database
+
+
+def create_database(args):
+    """
+    Creates the database, importing pandas only for this command.
+
+    :param args: Arguments of the create_database command.
+    :return: A message about the created database.
+    """
+    from src.create_database import create_database
+    return create_database(args)
+
+
+def serve(account_actions, args):
+    """
+    Serves commands on a Unix socket, importing the server only
+    for this command.
+
+    :param account_actions: AccountActions answering the commands.
+    :param args: Arguments of the serve command.
+    :return: A message printed on shutdown.
+    """
+    from src.server import serve
+    cache = ResultCache(args["cache_size"], args["cache_ttl"])
+    return serve(CachedAccountActions(account_actions, cache),
+                 args["socket"])
+
+
+def batch(account_actions, args):
+    """
+    Answers JSON lines requests, importing the batch actions
+    only for this command.
+
+    :param account_actions: AccountActions computing admin reports.
+    :param args: Arguments of the batch command.
+    """
+    from src.batch_actions import BatchAccountActions, answer_batch
+    batch_class = BatchAccountActions
+    if args["backend"] == "memory":
+        from src.memory_store import MemoryBatchAccountActions
+        batch_class = MemoryBatchAccountActions
+    answer_batch(account_actions, args["input"], args["chunksize"],
+                 batch_class, args["workers"])
+
+
+def create_db_manager(database_name, shards):
+    """
+    Creates the DatabaseManager of a single file or a sharded database.
+
+    :param database_name: The name of the single file database.
+    :param shards: Number of shards, 1 for a single file.
+    :return: A DatabaseManager or a ShardedDatabaseManager.
+    """
+    if shards > 1:
+        return ShardedDatabaseManager(shard_names(database_name, shards))
+    return DatabaseManager(database_name=database_name)
+
+
+def create_user_manager(db_manager, backend):
+    """
+    Creates the UserManager of the backend, importing numpy
+    only for the memory backend.
+
+    :param db_manager: DatabaseManager of the database.
+    :param backend: 'sqlite', 'arrow' or 'memory'.
+    :return: A UserManager or a MemoryUserManager.
+    """
+    if backend == "memory":
+        from src.memory_store import MemoryUserManager
+        return MemoryUserManager(db_manager)
+    return UserManager(db_manager)
+
+
+def create_account_actions(user_manager, backend, snapshot_directory,
+                           shards=1, query_workers=1):
+    """
+    Creates the AccountActions of the backend, importing pyarrow
+    only for the arrow backend and numpy only for the memory backend.
+    The arrow backend falls back to SQLite when the snapshots cannot
+    be read.
+
+    :param user_manager: UserManager of the database, a MemoryUserManager
+    for the memory backend.
+    :param backend: 'sqlite', 'arrow' or 'memory'.
+    :param snapshot_directory: Directory of the Arrow snapshots.
+    :param shards: Number of shards of the database (default is 1).
+    :param query_workers: Number of processes reading the results of
+    find-similar-children-by-age (default is 1, the current process).
+    :return: AccountActions answering the commands.
+    """
+    if shards > 1:
+        return ShardedAccountActions(user_manager)
+    if query_workers > 1:
+        from src.parallel_actions import ParallelAccountActions
+        return ParallelAccountActions(user_manager, query_workers)
+    if backend == "arrow":
+        from src.snapshot import SnapshotAccountActions, open_snapshot
+        snapshot = open_snapshot(snapshot_directory)
+        if snapshot is not None:
+            return SnapshotAccountActions(user_manager, snapshot)
+    if backend == "memory":
+        from src.memory_store import MemoryAccountActions
+        return MemoryAccountActions(user_manager)
+    return AccountActions(user_manager)
+
+
+def write_profile(profiler, output_format, output_name):
+    """
+    Writes the records of the profiler to a file or stderr.
+
+    :param profiler: Profiler of the command.
+    :param output_format: 'json' or 'prometheus'.
+    :param output_name: Path of the file, '-' for stderr.
+    """
+    profile = profiler.dump(output_format)
+    if output_name == "-":
+        sys.stderr.write(profile)
+    else:
+        with open(output_name, "w", encoding="utf-8") as handle:
+            handle.write(profile)
 
 
 def main():
     """
     Main function to run the command for users.
     """
-    db_manager = DatabaseManager(database_name="users.sqlite3")
-    user_manager = UserManager(db_manager)
-    account_actions = AccountActions(user_manager)
+    global_parser = argparse.ArgumentParser(add_help=False,
+                                            allow_abbrev=False)
+    global_parser.add_argument(
+        "--profile", choices=["json", "prometheus"],
+        help="Record timings of the command and its SQL statements."
+    )
+    global_parser.add_argument(
+        "--profile-output", default="-",
+        help="File the profile is written to, '-' for stderr."
+    )
+    global_parser.add_argument(
+        "--slow-query-ms", type=float, default=10,
+        help="Time after which the query plan of a statement is recorded."
+    )
+    global_parser.add_argument(
+        "--backend", choices=["sqlite", "arrow", "memory"],
+        default="sqlite",
+        help="Answer aggregations from SQLite or from Arrow snapshots, "
+             "or all commands from users loaded into memory."
+    )
+    global_parser.add_argument(
+        "--snapshot-directory", default="snapshots",
+        help="Directory of the Arrow and Parquet snapshots."
+    )
+    global_parser.add_argument(
+        "--shards", type=int, default=1,
+        help="Number of database files users are partitioned into."
+    )
+    global_parser.add_argument(
+        "--query-workers", type=int, default=1,
+        help="Number of processes reading the users found by "
+             "find-similar-children-by-age."
+    )
+    global_parser.add_argument(
+        "--cache-file", default=disk_cache_name("users.sqlite3"),
+        help="SQLite file keeping results between runs, next to the "
+             "database by default."
+    )
+    global_parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Answer every command from the database, "
+             "without reading or writing the cache file."
+    )
+    global_args, _ = global_parser.parse_known_args()
+    if global_args.shards > 1 and global_args.backend != "sqlite":
+        global_parser.error(
+            f"--backend {global_args.backend} cannot be used with --shards")
+    if global_args.query_workers > 1 and (global_args.backend != "sqlite"
+                                          or global_args.shards > 1):
+        global_parser.error(
+            "--query-workers can only be used with a single file "
+            "sqlite backend")
+
+    db_manager = create_db_manager("users.sqlite3", global_args.shards)
+    user_manager = create_user_manager(db_manager, global_args.backend)
+    account_actions = create_account_actions(
+        user_manager, global_args.backend, global_args.snapshot_directory,
+        global_args.shards, global_args.query_workers)
+    if global_args.no_cache:
+        result_cache = ResultCache(maxsize=0)
+    else:
+        result_cache = DiskCache(global_args.cache_file)
+    cached_actions = CachedAccountActions(account_actions, result_cache)
 
     parent_parser = argparse.ArgumentParser(add_help=False)
     parent_parser.add_argument(
@@ -22,19 +209,56 @@ def main():
         "--password", required=True, help="Password to account."
     )
 
-    parser = argparse.ArgumentParser(add_help=False)
-    subparsers = parser.add_subparsers()
+    format_parser = argparse.ArgumentParser(add_help=False)
+    format_parser.add_argument(
+        "--format", choices=OUTPUT_FORMATS, default="text",
+        help="Write lines as text, JSON lines or CSV as they are read."
+    )
+
+    parser = argparse.ArgumentParser(add_help=False, parents=[global_parser])
+    subparsers = parser.add_subparsers(dest="command")
 
     parser_create_database = subparsers.add_parser(
         "create_database",
         help="Create database from data folder.")
+    parser_create_database.add_argument(
+        "--incremental", action="store_true",
+        help="Load only new or changed files into the existing database."
+    )
+    parser_create_database.add_argument(
+        "--streaming", action="store_true",
+        help="Read data files in chunks instead of loading them at once."
+    )
+    parser_create_database.add_argument(
+        "--chunksize", type=int, default=100_000,
+        help="Number of rows held in memory in streaming mode."
+    )
+    parser_create_database.add_argument(
+        "--snapshot", action="store_true",
+        help="Also write Parquet and Arrow snapshots of users and children."
+    )
+    parser_create_database.add_argument(
+        "--workers", type=int, default=1,
+        help="Number of processes parsing data files "
+             "and threads hashing passwords."
+    )
+    parser_create_database.add_argument(
+        "--hash-iterations", type=int,
+        help="Number of PBKDF2 iterations of password hashes "
+             "(default is 100000)."
+    )
+    parser_create_database.add_argument(
+        "--conflict-report",
+        help="CSV file listing users dropped as duplicates, "
+             "the users kept instead and why."
+    )
     parser_create_database.set_defaults(func=create_database)
 
     parser_all_accounts = subparsers.add_parser(
         "print-all-accounts", parents=[parent_parser],
         help="Print the total number of valid accounts."
     )
-    parser_all_accounts.set_defaults(func=account_actions.print_all_accounts)
+    parser_all_accounts.set_defaults(func=cached_actions.print_all_accounts)
 
     parser_oldest_accounts = subparsers.add_parser(
         "print-oldest-account", parents=[parent_parser],
@@ -42,35 +266,116 @@ def main():
              "with the longest existence."
     )
     parser_oldest_accounts.set_defaults(
-        func=account_actions.print_oldest_account
+        func=cached_actions.print_oldest_account
     )
     parser_group_by_age = subparsers.add_parser(
-        "group-by-age", parents=[parent_parser],
+        "group-by-age", parents=[parent_parser, format_parser],
         help="Print group children by age and "
              "display relevant information."
     )
-    parser_group_by_age.set_defaults(func=account_actions.group_by_age)
+    parser_group_by_age.set_defaults(
+        func=lambda args: cached_actions.stream(
+            "group_by_age", args, True, args["format"], sys.stdout)
+    )
 
     parser_print_children = subparsers.add_parser(
-        "print-children", parents=[parent_parser],
+        "print-children", parents=[parent_parser, format_parser],
         help="Print information about your own children."
     )
-    parser_print_children.set_defaults(func=account_actions.print_children)
+    parser_print_children.set_defaults(
+        func=lambda args: cached_actions.stream(
+            "print_children", args, False, args["format"], sys.stdout)
+    )
 
     parser_find_similar_children_by_age = subparsers.add_parser(
-        "find-similar-children-by-age", parents=[parent_parser],
+        "find-similar-children-by-age",
+        parents=[parent_parser, format_parser],
         help="print users with children of the"
              "same age as at least one own child."
     )
     parser_find_similar_children_by_age.set_defaults(
-        func=account_actions.find_similar_children_by_age
+        func=lambda args: cached_actions.stream(
+            "find_similar_children_by_age", args, False, args["format"],
+            sys.stdout)
+    )
+
+    parser_check_summary_tables = subparsers.add_parser(
+        "check-summary-tables", parents=[parent_parser],
+        help="Compare summary tables of admin commands "
+             "with users and children."
+    )
+    parser_check_summary_tables.set_defaults(
+        func=account_actions.check_summary_tables
+    )
+
+    parser_cache_stats = subparsers.add_parser(
+        "cache-stats", parents=[parent_parser],
+        help="Print hit and miss counters of the result cache."
+    )
+    parser_cache_stats.set_defaults(func=cached_actions.cache_stats)
+
+    parser_batch = subparsers.add_parser(
+        "batch",
+        help="Answer JSON lines of command, login and password "
+             "with JSON lines of outputs."
+    )
+    parser_batch.add_argument(
+        "--input", default="-", help="Requests file, '-' for stdin."
+    )
+    parser_batch.add_argument(
+        "--chunksize", type=int, default=10_000,
+        help="Number of requests answered at once."
+    )
+    parser_batch.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1,
+        help="Number of threads verifying passwords."
+    )
+    parser_batch.set_defaults(func=lambda args: batch(account_actions, args))
+
+    parser_serve = subparsers.add_parser(
+        "serve",
+        help="Answer commands sent by client.py on a Unix socket."
+    )
+    parser_serve.add_argument(
+        "--socket", default="users.sock", help="Path of the Unix socket."
+    )
+    parser_serve.add_argument(
+        "--cache-size", type=int, default=1024,
+        help="Number of results kept in memory."
+    )
+    parser_serve.add_argument(
+        "--cache-ttl", type=float, default=300,
+        help="Seconds a result is kept in memory."
+    )
+    parser_serve.set_defaults(
+        func=lambda args: serve(account_actions, args)
     )
     args = parser.parse_args()
 
-    if hasattr(args, 'func'):
-        print(args.func(vars(args)))
-    else:
+    if not hasattr(args, 'func'):
         parser.print_help()
+        return
+    if args.profile is not None:
+        db_manager.profiler = Profiler(args.slow_query_ms / 1000)
+    try:
+        if args.profile is None:
+            output = args.func(vars(args))
+        else:
+            with db_manager.profiler.command(args.command):
+                output = args.func(vars(args))
+        if output is not None:
+            print(output)
+        sys.stdout.flush()
+    except BrokenPipeError:
+        # The reader of a streamed output, e.g. head, stopped reading.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    finally:
+        # Also written for commands ending by sys.exit, e.g. without
+        # a result or with a failed statement.
+        if args.profile is not None:
+            write_profile(db_manager.profiler, args.profile,
+                          args.profile_output)
 
 
 if __name__ == "__main__":
@@ -1,3 +1,12 @@
+import itertools
+
+from src.output import text_lines
+
+# Callers with more than one child have always been answered with the
+# telephone number indented by a line continuation; kept for compatibility.
+LEGACY_MULTI_CHILD_SEPARATOR = "," + " " * 25
+
+
 class AccountActions:
     """
     A class for managing account actions for the users.
@@ -11,6 +20,57 @@ class AccountActions:
         """
         self.user_manager = user_manager
 
+    def command_rows(self, command, args, admin):
+        """
+        Validates the user and returns the rows of a streamed command.
+
+        :param command: 'group_by_age', 'print_children'
+        or 'find_similar_children_by_age'.
+        :param args: Arguments for user validation.
+        :param admin: Flag to indicate if the operation requires
+        admin privileges.
+        :return: An iterator of rows read as they are written,
+        or None if validation fails.
+        """
+        if not self.user_manager.validate_credentials(args, admin):
+            return None
+        return self.report_rows(command, args)
+
+    def report_rows(self, command, args):
+        """
+        Returns the rows of a streamed command without validating the user.
+
+        :param command: 'group_by_age', 'print_children'
+        or 'find_similar_children_by_age'.
+        :param args: Arguments with the login of the user.
+        :return: An iterator of rows read as they are written.
+        """
+        if command == "group_by_age":
+            return self.age_groups_rows()
+        if command == "print_children":
+            return self.children_rows(args)
+        return self.similar_children_rows(args)
+
+    def command_report(self, command, args):
+        """
+        Returns the result of a command without validating the user.
+
+        :param command: 'print_all_accounts', 'print_oldest_account',
+        'group_by_age', 'print_children'
+        or 'find_similar_children_by_age'.
+        :param args: Arguments with the login of the user.
+        :return: The result of the command.
+        """
+        if command == "print_all_accounts":
+            return self.all_accounts_report()
+        if command == "print_oldest_account":
+            return self.oldest_account_report()
+        if command == "group_by_age":
+            return self.age_groups_report()
+        if command == "print_children":
+            return self.children_report(args)
+        return self.similar_children_report(args)
+
     def print_all_accounts(self, args, admin=True):
         """
         Prints the total number of user accounts.
@@ -21,11 +81,19 @@ class AccountActions:
         :return: Total number of user accounts or
         an error message if validation fails.
         """
-        sql_prompt = "SELECT COUNT(*) FROM USERS"
         if not self.user_manager.validate_credentials(args, admin):
             return "Invalid Login"
+        return self.all_accounts_report()
+
+    def all_accounts_report(self):
+        """
+        Reads the total number of user accounts without validating the user.
+
+        :return: Total number of user accounts.
+        """
+        sql_prompt = "SELECT user_count FROM USERS_SUMMARY"
         result = self.user_manager.execute_query(sql_prompt)
-        return result.iloc[0]['COUNT(*)']
+        return result[0]['user_count']
 
     def print_oldest_account(self, args, admin=True):
         """
@@ -38,11 +106,21 @@ class AccountActions:
         and creation date of the oldest account,
         or an error message if validation fails.
         """
-        sql_prompt = """SELECT firstname, email, created_at FROM USERS
-                        ORDER BY created_at"""
         if not self.user_manager.validate_credentials(args, admin):
             return "Invalid Login"
-        result = self.user_manager.execute_query(sql_prompt).iloc[0]
+        return self.oldest_account_report()
+
+    def oldest_account_report(self):
+        """
+        Formats the oldest user account without validating the user.
+
+        :return: A string containing the name, email address,
+        and creation date of the oldest account.
+        """
+        sql_prompt = """SELECT firstname, email, created_at FROM USERS
+                        WHERE id_user =
+                        (SELECT oldest_id_user FROM USERS_SUMMARY)"""
+        result = self.user_manager.execute_query(sql_prompt)[0]
         console_output = "\n".join([f"name: {result['firstname']}",
                                     f"email_adress: {result['email']}",
                                     f"created_at: {result['created_at']}"])
@@ -60,14 +138,85 @@ class AccountActions:
         """
         if not self.user_manager.validate_credentials(args, admin):
             return "Invalid Login"
-        sql_prompt = """SELECT age, COUNT(*) FROM CHILDREN
-                        GROUP BY age
-                        ORDER BY COUNT(*)"""
-        result = self.user_manager.execute_query(sql_prompt)
-        console_output = "\n".join([
-            f"age: {rows['age']}, count: {rows['COUNT(*)']}"
-            for iter, rows in result.iterrows()])
-        return console_output
+        return self.age_groups_report()
+
+    def age_groups_report(self):
+        """
+        Formats the number of children per age without validating the user.
+
+        :return: A string representing the count of children grouped by age.
+        """
+        return "\n".join(text_lines("group_by_age", self.age_groups_rows()))
+
+    def age_groups_rows(self):
+        """
+        Reads the number of children per age without validating the user.
+
+        :return: An iterator of rows with age and count.
+        """
+        sql_prompt = """SELECT age, count FROM CHILDREN_AGES
+                        ORDER BY count, age"""
+        return self.user_manager.iter_query(sql_prompt)
+
+    def check_summary_tables(self, args, admin=True):
+        """
+        Compares the summary tables read by the admin actions
+        with Users and Children.
+
+        :param args: Arguments for user validation.
+        :param admin: Flag to indicate if the operation requires
+        admin privileges (default is True).
+        :return: A string listing inconsistent summaries,
+        or an error message if validation fails.
+        """
+        if not self.user_manager.validate_credentials(args, admin):
+            return "Invalid Login"
+        return self.summary_tables_report()
+
+    def summary_tables_report(self):
+        """
+        Compares the summary tables with Users and Children
+        without validating the user.
+
+        :return: A string listing inconsistent summaries.
+        """
+        checks = {
+            "user count": """SELECT
+                (SELECT user_count FROM USERS_SUMMARY) =
+                (SELECT COUNT(*) FROM USERS) AS consistent""",
+            "oldest account": """SELECT
+                (SELECT created_at FROM USERS WHERE id_user =
+                 (SELECT oldest_id_user FROM USERS_SUMMARY)) IS
+                (SELECT created_at FROM USERS ORDER BY created_at LIMIT 1)
+                AS consistent""",
+            "children ages": """SELECT NOT EXISTS (
+                SELECT * FROM (
+                    SELECT age, count FROM CHILDREN_AGES
+                    EXCEPT SELECT age, COUNT(*) FROM CHILDREN GROUP BY age)
+                UNION ALL
+                SELECT * FROM (
+                    SELECT age, COUNT(*) FROM CHILDREN GROUP BY age
+                    EXCEPT SELECT age, count FROM CHILDREN_AGES)
+            ) AS consistent""",
+            "similar children index": """SELECT NOT EXISTS (
+                SELECT * FROM (
+                    SELECT age, index_parent FROM AGE_PARENTS
+                    EXCEPT SELECT age, index_parent FROM CHILDREN)
+                UNION ALL
+                SELECT * FROM (
+                    SELECT age, index_parent FROM CHILDREN
+                    EXCEPT SELECT age, index_parent FROM AGE_PARENTS)
+            ) AND (SELECT COUNT(*) FROM PARENT_CHILDREN) =
+                (SELECT COUNT(DISTINCT index_parent) FROM CHILDREN)
+            AS consistent""",
+        }
+        console_output = [
+            f"{name}: inconsistent"
+            for name, sql_prompt in checks.items()
+            if not all(rows['consistent'] for rows in
+                       self.user_manager.execute_query(sql_prompt))
+        ]
+        return "\n".join(console_output) or "Summary tables are consistent."
 
     def print_children(self, args, admin=False):
         """
@@ -81,18 +230,33 @@ class AccountActions:
         """
         if not self.user_manager.validate_credentials(args, admin):
             return "Invalid Login"
-        sql_prompt = f"""SELECT CHILDREN.name, CHILDREN.age FROM CHILDREN
-                         LEFT JOIN USERS ON
-                         USERS.id_user = CHILDREN.index_parent
-                         WHERE USERS.email='{args['login']}'
-                         OR USERS.telephone_number ='{args['login']}'
-                         ORDER BY CHILDREN.name"""
-        result = self.user_manager.execute_query(sql_prompt)
-        console_output = "\n".join(
-            [f"{rows['name']}, {rows['age']}"
-             for iter, rows in result.iterrows()]
-        )
-        return console_output
+        return self.children_report(args)
+
+    def children_report(self, args):
+        """
+        Formats the children of the login without validating the password.
+
+        :param args: Arguments with the login of the user.
+        :return: A string listing the names and ages of children.
+        """
+        return "\n".join(text_lines("print_children",
+                                    self.children_rows(args)))
+
+    def children_rows(self, args):
+        """
+        Reads the children of the login without validating the password.
+
+        :param args: Arguments with the login of the user.
+        :return: An iterator of rows with name and age.
+        """
+        sql_prompt = """SELECT CHILDREN.name, CHILDREN.age FROM USERS
+                        JOIN CHILDREN ON
+                        CHILDREN.index_parent = USERS.id_user
+                        WHERE USERS.email=:login
+                        OR USERS.telephone_number=:login
+                        ORDER BY CHILDREN.name"""
+        return self.user_manager.iter_query(sql_prompt,
+                                            {"login": args["login"]})
 
     def find_similar_children_by_age(self, args, admin=False):
         """
@@ -107,78 +271,105 @@ class AccountActions:
         """
         if not self.user_manager.validate_credentials(args, admin):
             return "Invalid Login"
-        telephone_prompt = f"""SELECT telephone_number FROM USERS
-                               WHERE USERS.email='{args['login']}'
-                               OR USERS.telephone_number
-                               ='{args['login']}'"""
-        telephone_result = self.user_manager.execute_query(
-            telephone_prompt)['telephone_number'][0]
-        age_children_prompt = f"""SELECT CHILDREN.age FROM CHILDREN
-                                  LEFT JOIN USERS ON
-                                  USERS.id_user = CHILDREN.index_parent
-                                  WHERE USERS.email='{args['login']}'
-                                  OR USERS.telephone_number
-                                  ='{args['login']}'"""
-        age_children_result = self.user_manager.execute_query(
-            age_children_prompt)
-        console_output = []
-        if len(age_children_result) > 1:
-            for iter, rows in age_children_result.iterrows():
-                id_users_prompt = f"""SELECT USERS.id_user,
-                                      USERS.telephone_number, USERS.firstname
-                                      FROM CHILDREN LEFT JOIN USERS ON
-                                      USERS.id_user = CHILDREN.index_parent
-                                      WHERE CHILDREN.age = {rows['age']}
-                                      ORDER BY CHILDREN.name"""
-                id_users_prompt_result = self.user_manager.execute_query(
-                    id_users_prompt)
-                for iter, rows in id_users_prompt_result.iterrows():
-                    children_prompt = f"""SELECT CHILDREN.name, CHILDREN.age
-                                          FROM CHILDREN LEFT JOIN USERS ON
-                                          USERS.id_user = CHILDREN.index_parent
-                                          WHERE {rows['id_user']} =
-                                          CHILDREN.index_parent
-                                          ORDER BY CHILDREN.name"""
-                    children_prompt_result = self.user_manager.execute_query(
-                        children_prompt)
-                    output = "; ".join(
-                        [
-                            f"{row['name']}, {row['age']}"
-                            for _, row in children_prompt_result.iterrows()
-                        ]
-                    )
-                    console_output.append(
-                        f"{rows['firstname']}, \
-                        {rows['telephone_number']}: {output}"
-                    )
+        return self.similar_children_report(args)
+
+    def similar_children_report(self, args):
+        """
+        Formats users with children of the same age as a child of the login
+        without validating the password.
+
+        :param args: Arguments with the login of the user.
+        :return: A string listing similar children's names and ages.
+        """
+        return "\n".join(text_lines("find_similar_children_by_age",
+                                    self.similar_children_rows(args)))
+
+    def similar_children_rows(self, args):
+        """
+        Reads users with children of the same age as a child of the login
+        without validating the password.
+
+        :param args: Arguments with the login of the user.
+        :return: An iterator of rows with firstname, the separator of the
+        text format, telephone_number and children.
+        """
+        similar_prompt = """WITH caller_children AS (
+                                 SELECT CHILDREN.rowid AS position,
+                                 CHILDREN.age, USERS.telephone_number
+                                 FROM USERS JOIN CHILDREN ON
+                                 CHILDREN.index_parent = USERS.id_user
+                                 WHERE USERS.email=:login
+                                 OR USERS.telephone_number=:login
+                             ),
+                             caller_ages AS (
+                                 SELECT age, MIN(position) AS position
+                                 FROM caller_children GROUP BY age
+                             )
+                             SELECT PARENT_CHILDREN.index_parent,
+                             PARENT_CHILDREN.firstname,
+                             PARENT_CHILDREN.telephone_number,
+                             PARENT_CHILDREN.children,
+                             (SELECT COUNT(*) FROM caller_children)
+                             AS caller_children,
+                             (SELECT telephone_number FROM caller_children)
+                             AS caller_telephone
+                             FROM caller_ages CROSS JOIN AGE_PARENTS ON
+                             AGE_PARENTS.age = caller_ages.age
+                             JOIN PARENT_CHILDREN ON
+                             PARENT_CHILDREN.index_parent =
+                             AGE_PARENTS.index_parent
+                             ORDER BY caller_ages.position,
+                             AGE_PARENTS.rank"""
+        result = self.user_manager.iter_query(
+            similar_prompt, {"login": args["login"]})
+        first = next(result, None)
+        if first is None:
+            return iter(())
+        if first['caller_children'] > 1:
+            separator = LEGACY_MULTI_CHILD_SEPARATOR
         else:
-            id_users_prompt = f"""SELECT USERS.id_user,
-                                  USERS.telephone_number,USERS.firstname
-                                  FROM CHILDREN LEFT JOIN USERS ON
-                                  USERS.id_user = CHILDREN.index_parent
-                                  WHERE CHILDREN.age =
-                                  {age_children_result.iloc[0]['age']}
-                                  ORDER BY CHILDREN.name"""
-            id_users_prompt_result = self.user_manager.execute_query(
-                id_users_prompt)
-            for iter, rows in id_users_prompt_result.iterrows():
-                children_prompt = f"""SELECT CHILDREN.name, CHILDREN.age
-                                      FROM CHILDREN LEFT JOIN USERS ON
-                                      USERS.id_user = CHILDREN.index_parent
-                                      WHERE {rows['id_user']} =
-                                      CHILDREN.index_parent
-                                      ORDER BY CHILDREN.name"""
-                children_prompt_result = self.user_manager.execute_query(
-                    children_prompt)
-                output = "; ".join(
-                    [
-                        f"{row['name']}, {row['age']}"
-                        for _, row in children_prompt_result.iterrows()
-                    ]
-                )
-                console_output.append(
-                    f"{rows['firstname']}, {rows['telephone_number']}: {output}"
-                )
-        console_output = [value for value in console_output
-                          if telephone_result not in value]
-        return "\n".join(list(dict.fromkeys(console_output)))
+            separator = ", "
+        # The posting lists of the caller's ages are concatenated in the
+        # order of the caller's children, and every parent is ranked by
+        # the first list naming them.
+        return self.similar_rows(
+            self.first_of_parents(itertools.chain([first], result)),
+            separator, first['caller_telephone'])
+
+    @staticmethod
+    def first_of_parents(result):
+        """
+        Reads every parent from the first row naming them.
+
+        :param result: An iterable of rows with index_parent, firstname,
+        telephone_number and children.
+        :return: An iterator of firstname, telephone_number
+        and children tuples.
+        """
+        parents = set()
+        for rows in result:
+            if rows['index_parent'] not in parents:
+                parents.add(rows['index_parent'])
+                yield (rows['firstname'], rows['telephone_number'],
+                       rows['children'])
+
+    @staticmethod
+    def similar_rows(parents, separator, telephone_result):
+        """
+        Builds the rows of find_similar_children_by_age, without the rows
+        whose line names the telephone number of the caller.
+
+        :param parents: An iterable of firstname, telephone_number
+        and children tuples.
+        :param separator: Separator of first name and telephone number
+        in the text format.
+        :param telephone_result: Telephone number of the caller.
+        :return: An iterator of rows.
+        """
+        for firstname, telephone_number, children in parents:
+            # The line of the text format, as TEXT_LINES writes it.
+            line = f"{firstname}{separator}{telephone_number}: {children}"
+            if telephone_result not in line:
+                yield {"firstname": firstname, "separator": separator,
+                       "telephone_number": telephone_number,
+                       "children": children}
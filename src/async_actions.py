@@ -0,0 +1,127 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from src.account_actions import AccountActions
+from src.database_manager import DatabaseManager
+from src.user_manager import UserManager
+
+
+class AsyncDatabaseManager:
+    """
+    A class running SQL queries for asyncio code on a bounded thread pool.
+
+    Every worker thread keeps its own read-only connection of the
+    ConnectionPool, so at most max_workers connections are opened and
+    at most max_workers queries run at once without blocking the loop.
+    """
+
+    def __init__(self, database_name, max_workers=8):
+        """
+        Initializes the AsyncDatabaseManager with the specified database.
+
+        :param database_name: The name of the SQLite database file.
+        :param max_workers: Number of threads running queries
+        (default is 8).
+        """
+        self.db_manager = DatabaseManager(database_name)
+        self.executor = ThreadPoolExecutor(max_workers,
+                                           thread_name_prefix="sqlite")
+
+    async def run(self, function, *args):
+        """
+        Runs a blocking function on the thread pool.
+
+        :param function: A function querying the database.
+        :param args: Positional arguments of the function.
+        :return: The result of the function.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, function, *args)
+
+    async def sql_query(self, sql_query, params=None):
+        """
+        Executes a SQL query on the thread pool.
+
+        :param sql_query: A string containing the SQL query to be executed.
+        :param params: Values bound to the named parameters of the query.
+        :return: A QueryResult containing the results of the SQL query.
+        """
+        return await self.run(self.db_manager.sql_query, sql_query, params)
+
+    def close_connection(self):
+        """Waits for running queries and closes all connections."""
+        self.executor.shutdown(wait=True)
+        self.db_manager.close_connection()
+
+
+class AsyncAccountActions:
+    """
+    A class answering AccountActions commands from asyncio code.
+
+    Credentials are validated on a thread of the pool before the report
+    of the command is queried, so invalid logins cost no report query.
+    Outputs are the same as those of AccountActions, commands without
+    a result raise SystemExit.
+    """
+
+    def __init__(self, async_db_manager):
+        """
+        Initializes the AsyncAccountActions.
+
+        :param async_db_manager: AsyncDatabaseManager running the queries.
+        """
+        self.async_db_manager = async_db_manager
+        self.user_manager = UserManager(async_db_manager.db_manager)
+        self.account_actions = AccountActions(self.user_manager)
+
+    @staticmethod
+    def catch_exit(report, *args):
+        try:
+            return report(*args), None
+        except SystemExit as error:
+            return None, error
+
+    async def answer(self, report, args, admin, *report_args):
+        """
+        Validates credentials, then runs the report.
+
+        :param report: An AccountActions report method.
+        :param args: Arguments for user validation.
+        :param admin: Flag to indicate if the operation requires
+        admin privileges.
+        :param report_args: Positional arguments of the report.
+        :return: The output of the report,
+        or an error message if validation fails.
+        """
+        if not await self.async_db_manager.run(
+                self.user_manager.validate_credentials, args, admin):
+            return "Invalid Login"
+        output, error = await self.async_db_manager.run(
+            self.catch_exit, report, *report_args)
+        if error is not None:
+            raise error
+        return output
+
+    async def print_all_accounts(self, args, admin=True):
+        return await self.answer(self.account_actions.all_accounts_report,
+                                 args, admin)
+
+    async def print_oldest_account(self, args, admin=True):
+        return await self.answer(self.account_actions.oldest_account_report,
+                                 args, admin)
+
+    async def group_by_age(self, args, admin=True):
+        return await self.answer(self.account_actions.age_groups_report,
+                                 args, admin)
+
+    async def check_summary_tables(self, args, admin=True):
+        return await self.answer(self.account_actions.summary_tables_report,
+                                 args, admin)
+
+    async def print_children(self, args, admin=False):
+        return await self.answer(self.account_actions.children_report,
+                                 args, admin, args)
+
+    async def find_similar_children_by_age(self, args, admin=False):
+        return await self.answer(
+            self.account_actions.similar_children_report, args, admin, args)
@@ -0,0 +1,371 @@
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from src.account_actions import LEGACY_MULTI_CHILD_SEPARATOR
+from src.server import COMMANDS
+from src.sharding import ShardedDatabaseManager
+
+ADMIN_COMMANDS = {"print-all-accounts", "print-oldest-account",
+                  "group-by-age", "check-summary-tables"}
+BATCH_COMMANDS = ADMIN_COMMANDS | {"print-children",
+                                   "find-similar-children-by-age"}
+# PBKDF2 releases the GIL, so passwords are verified by a thread per core.
+VERIFY_WORKERS = os.cpu_count() or 1
+
+REQUESTS_CTE = """requests AS (
+                      SELECT CAST(json_extract(value, '$[0]') AS INTEGER)
+                      AS position,
+                      json_extract(value, '$[1]') AS login
+                      FROM json_each(:requests)
+                  ),
+                  callers AS (
+                      SELECT requests.position, USERS.id_user
+                      FROM requests JOIN USERS ON
+                      USERS.email = requests.login
+                      UNION
+                      SELECT requests.position, USERS.id_user
+                      FROM requests JOIN USERS ON
+                      USERS.telephone_number = requests.login
+                  )"""
+
+VALID_CREDENTIALS_SQL = """WITH credentials AS (
+                               SELECT key AS position,
+                               json_extract(value, '$[0]') AS login,
+                               json_extract(value, '$[1]') AS admin
+                               FROM json_each(:requests)
+                           )
+                           SELECT credentials.position, USERS.password
+                           FROM credentials JOIN USERS ON
+                           USERS.email = credentials.login
+                           AND (NOT credentials.admin
+                                OR USERS.role = 'admin')
+                           UNION
+                           SELECT credentials.position, USERS.password
+                           FROM credentials JOIN USERS ON
+                           USERS.telephone_number = credentials.login
+                           AND (NOT credentials.admin
+                                OR USERS.role = 'admin')
+                           """
+CHILDREN_SQL = f"""WITH {REQUESTS_CTE}
+                   SELECT callers.position, CHILDREN.name, CHILDREN.age
+                   FROM callers JOIN CHILDREN ON
+                   CHILDREN.index_parent = callers.id_user
+                   ORDER BY callers.position, CHILDREN.name,
+                   CHILDREN.rowid"""
+
+SIMILAR_CHILDREN_SQL = f"""WITH {REQUESTS_CTE},
+                           caller_children AS (
+                               SELECT callers.position,
+                               CHILDREN.rowid AS child_position, CHILDREN.age
+                               FROM callers JOIN CHILDREN ON
+                               CHILDREN.index_parent = callers.id_user
+                           ),
+                           matches AS (
+                               SELECT caller_children.position,
+                               CHILDREN.index_parent,
+                               ROW_NUMBER() OVER (
+                                   PARTITION BY caller_children.position
+                                   ORDER BY caller_children.child_position,
+                                   CHILDREN.name, CHILDREN.rowid
+                               ) AS rank
+                               FROM caller_children JOIN CHILDREN ON
+                               CHILDREN.age = caller_children.age
+                           ),
+                           parents AS (
+                               SELECT position, index_parent,
+                               MIN(rank) AS rank
+                               FROM matches GROUP BY position, index_parent
+                           ),
+                           rendered AS (
+                               SELECT index_parent,
+                               GROUP_CONCAT(name || ', ' || age, '; ')
+                               AS children
+                               FROM (SELECT CHILDREN.index_parent,
+                                     CHILDREN.name, CHILDREN.age
+                                     FROM CHILDREN WHERE
+                                     CHILDREN.index_parent IN
+                                     (SELECT index_parent FROM parents)
+                                     ORDER BY CHILDREN.index_parent,
+                                     CHILDREN.name, CHILDREN.rowid)
+                               GROUP BY index_parent
+                           ),
+                           caller_counts AS (
+                               SELECT position, COUNT(*) AS caller_children
+                               FROM caller_children GROUP BY position
+                           )
+                           SELECT parents.position, USERS.firstname,
+                           USERS.telephone_number, rendered.children,
+                           caller_counts.caller_children,
+                           (SELECT telephone_number FROM USERS
+                            WHERE USERS.email=requests.login
+                            OR USERS.telephone_number=requests.login)
+                           AS caller_telephone
+                           FROM parents
+                           JOIN requests ON
+                           requests.position = parents.position
+                           JOIN caller_counts ON
+                           caller_counts.position = parents.position
+                           JOIN USERS ON USERS.id_user = parents.index_parent
+                           JOIN rendered ON
+                           rendered.index_parent = parents.index_parent
+                           ORDER BY parents.position, parents.rank"""
+
+
+class BatchAccountActions:
+    """
+    A class answering many commands of many users at once.
+
+    Credentials of a whole chunk of requests are validated by one query
+    and print-children and find-similar-children-by-age are answered for
+    all their callers by one query each. Admin reports do not depend on
+    the caller and are computed once per batch. Passwords are verified
+    by a pool of threads. Outputs are the same as those of AccountActions.
+    """
+
+    def __init__(self, account_actions, chunksize=10_000,
+                 workers=VERIFY_WORKERS):
+        """
+        Initializes the BatchAccountActions.
+
+        :param account_actions: AccountActions computing admin reports.
+        :param chunksize: Number of requests answered at once
+        (default is 10000).
+        :param workers: Number of threads verifying passwords
+        (default is VERIFY_WORKERS).
+        """
+        self.account_actions = account_actions
+        self.db_manager = account_actions.user_manager.db_manager
+        self.verifier = account_actions.user_manager.verifier
+        self.chunksize = chunksize
+        self.workers = workers
+        self.reports = {}
+
+    @staticmethod
+    def parse(line):
+        """
+        Reads a single JSON encoded request.
+
+        :param line: A line with 'command', 'login' and 'password'.
+        :return: The request dictionary,
+        or None when the request is invalid.
+        """
+        try:
+            request = json.loads(line)
+            if (request["command"] in BATCH_COMMANDS
+                    and isinstance(request["login"], str)
+                    and isinstance(request["password"], str)):
+                return request
+        except (ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    def verify_all(self, checks):
+        """
+        Calls a check on every argument tuple in the pool of threads.
+
+        :param checks: A list of (function, *args) tuples.
+        :return: A list of the results in the order of the checks.
+        """
+        if self.workers <= 1 or len(checks) <= 1:
+            return [check(*args) for check, *args in checks]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(lambda item: item[0](*item[1:]),
+                                     checks))
+
+    def valid_positions(self, requests):
+        """
+        Reads password hashes of all requests with one query and checks
+        them with the verifier of the UserManager. Credentials repeated
+        within the batch are hashed only once, distinct ones by the pool
+        of threads.
+
+        :param requests: A list of request dictionaries.
+        :return: A set of positions of requests with valid credentials.
+        """
+        credentials = [[request["login"],
+                        request["command"] in ADMIN_COMMANDS]
+                       for request in requests]
+        result = self.db_manager.sql_query(
+            VALID_CREDENTIALS_SQL, {"requests": json.dumps(credentials)})
+        candidates = {}
+        for rows in result:
+            request = requests[rows["position"]]
+            candidates.setdefault(
+                (request["login"], request["password"], rows["password"]),
+                []).append(rows["position"])
+        checks = [(self.verifier.verify, *credential)
+                  for credential in candidates]
+        return {position
+                for positions, valid in zip(candidates.values(),
+                                            self.verify_all(checks))
+                if valid for position in positions}
+
+    def query_callers(self, sql_query, requests, positions):
+        """
+        Runs a query for the logins of the requests at the given positions.
+
+        :param sql_query: A query reading the :requests JSON array.
+        :param requests: A list of request dictionaries.
+        :param positions: Positions of the requests to answer.
+        :return: A dictionary of result rows per position.
+        """
+        callers = [[position, requests[position]["login"]]
+                   for position in positions]
+        rows = {}
+        if callers:
+            result = self.db_manager.sql_query(
+                sql_query, {"requests": json.dumps(callers)})
+            for row in result:
+                rows.setdefault(row["position"], []).append(row)
+        return rows
+
+    def print_children(self, requests, positions):
+        rows = self.query_callers(CHILDREN_SQL, requests, positions)
+        return {
+            position: "\n".join(f"{row['name']}, {row['age']}"
+                                for row in rows[position])
+            for position in rows
+        }
+
+    @staticmethod
+    def report_callers(report, requests, positions):
+        """
+        Answers the requests at the given positions one caller at a time.
+
+        :param report: A report method of the AccountActions.
+        :param requests: A list of request dictionaries.
+        :param positions: Positions of the requests to answer.
+        :return: A dictionary of outputs per position,
+        without the callers the report found nothing for.
+        """
+        outputs = {}
+        for position in positions:
+            try:
+                outputs[position] = report(requests[position])
+            except SystemExit:
+                pass
+        return outputs
+
+    def find_similar_children_by_age(self, requests, positions):
+        if isinstance(self.db_manager, ShardedDatabaseManager):
+            # Ranks of similar children span all shards, so every
+            # caller is answered by the sharded account actions.
+            return self.report_callers(
+                self.account_actions.similar_children_report, requests,
+                positions)
+        rows = self.query_callers(SIMILAR_CHILDREN_SQL, requests, positions)
+        outputs = {}
+        for position, result in rows.items():
+            telephone_result = result[0]['caller_telephone']
+            if result[0]['caller_children'] > 1:
+                separator = LEGACY_MULTI_CHILD_SEPARATOR
+            else:
+                separator = ", "
+            console_output = [
+                f"{row['firstname']}{separator}"
+                f"{row['telephone_number']}: {row['children']}"
+                for row in result
+            ]
+            outputs[position] = "\n".join(
+                value for value in console_output
+                if telephone_result not in value)
+        return outputs
+
+    def report(self, request):
+        """
+        Returns the output of an admin report, computing it
+        with the credentials of the first request asking for it.
+
+        :param request: A request with valid credentials.
+        :return: The output of the command.
+        """
+        command = request["command"]
+        if command not in self.reports:
+            action = getattr(self.account_actions, COMMANDS[command])
+            try:
+                self.reports[command] = str(action(request))
+            except SystemExit:
+                self.reports[command] = None
+        return self.reports[command]
+
+    def answer_chunk(self, lines):
+        """
+        Answers a chunk of requests.
+
+        :param lines: A list of JSON encoded requests.
+        :return: A list of response dictionaries in the order of lines.
+        """
+        requests = [self.parse(line) for line in lines]
+        parsed = [position for position, request in enumerate(requests)
+                  if request is not None]
+        valid = self.valid_positions([requests[position]
+                                      for position in parsed])
+        valid = {parsed[position] for position in valid}
+        outputs = {}
+        for command in ("print-children", "find-similar-children-by-age"):
+            positions = [position for position in sorted(valid)
+                         if requests[position]["command"] == command]
+            outputs.update(getattr(self, COMMANDS[command])(requests,
+                                                            positions))
+        responses = []
+        for position, (line, request) in enumerate(zip(lines, requests)):
+            if request is None:
+                if isinstance(line, bytes):
+                    line = line.decode(errors="replace")
+                responses.append(
+                    {"error": f"Invalid request: {line.strip()}"})
+                continue
+            response = {"command": request["command"],
+                        "login": request["login"]}
+            if position not in valid:
+                response["output"] = "Invalid Login"
+            elif request["command"] in ADMIN_COMMANDS:
+                response["output"] = self.report(request)
+            else:
+                response["output"] = outputs.get(position)
+            responses.append(response)
+        return responses
+
+    def run(self, lines):
+        """
+        Answers a stream of requests chunk by chunk.
+
+        :param lines: An iterable of JSON encoded requests.
+        :return: A generator of response dictionaries in the order of lines.
+        """
+        chunk = []
+        for line in lines:
+            if not line.strip():
+                continue
+            chunk.append(line)
+            if len(chunk) == self.chunksize:
+                yield from self.answer_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield from self.answer_chunk(chunk)
+
+
+def answer_batch(account_actions, input_name, chunksize,
+                 batch_class=BatchAccountActions, workers=VERIFY_WORKERS):
+    """
+    Answers JSON lines requests of a file or stdin
+    and writes JSON lines responses to stdout.
+
+    :param account_actions: AccountActions computing admin reports.
+    :param input_name: Path of the requests file, '-' for stdin.
+    :param chunksize: Number of requests answered at once.
+    :param batch_class: BatchAccountActions or a subclass answering
+    the requests (default is BatchAccountActions).
+    :param workers: Number of threads verifying passwords
+    (default is VERIFY_WORKERS).
+    """
+    batch_actions = batch_class(account_actions, chunksize, workers)
+    if input_name == "-":
+        lines = sys.stdin
+    else:
+        lines = open(input_name, encoding="utf-8")
+    with lines:
+        for response in batch_actions.run(lines):
+            sys.stdout.write(json.dumps(response) + "\n")
@@ -0,0 +1,41 @@
+import json
+import socket
+
+
+class QueryClient:
+    """
+    A class sending commands to a running QueryServer
+    over one persistent connection.
+    """
+
+    def __init__(self, socket_path):
+        """
+        Initializes the QueryClient connected to the server socket.
+
+        :param socket_path: Path of the Unix socket of the server.
+        """
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(socket_path)
+        self.file = self.sock.makefile("rwb")
+
+    def run(self, command, login, password):
+        """
+        Runs a single command on the server.
+
+        :param command: Name of the command as in script.py.
+        :param login: Email or telephone number.
+        :param password: Password to account.
+        :return: The text script.py would print,
+        or None when the command has no output.
+        """
+        request = {"command": command, "login": login, "password": password}
+        self.file.write(json.dumps(request).encode() + b"\n")
+        self.file.flush()
+        response = json.loads(self.file.readline())
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response["output"]
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
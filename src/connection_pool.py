@@ -0,0 +1,74 @@
+import sqlite3
+import threading
+
+
+class ConnectionPool:
+    """
+    A class for owning long-lived read-only SQLite connections.
+
+    Every thread gets its own connection, opened on first use and reused
+    for all later queries, so the prepared statement cache of the
+    connection survives between queries. Connections released by finished
+    threads are handed to the next thread instead of being closed.
+    """
+
+    def __init__(self, database_name, cached_statements=256):
+        """
+        Initializes the ConnectionPool for the specified database.
+
+        :param database_name: The name of the SQLite database file.
+        :param cached_statements: Number of prepared statements kept
+        by every connection (default is 256).
+        """
+        self.database_name = database_name
+        self.cached_statements = cached_statements
+        self.connections_opened = 0
+        self._local = threading.local()
+        self._connections = []
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def connection(self):
+        """
+        Returns the connection of the calling thread,
+        opening it when the thread has none yet.
+
+        :return: A read-only sqlite3 connection.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            with self._lock:
+                if self._idle:
+                    conn = self._idle.pop()
+            if conn is None:
+                conn = sqlite3.connect(
+                    f"file:{self.database_name}?mode=ro", uri=True,
+                    cached_statements=self.cached_statements,
+                    check_same_thread=False
+                )
+                with self._lock:
+                    self._connections.append(conn)
+                    self.connections_opened += 1
+            self._local.conn = conn
+        return conn
+
+    def release(self):
+        """
+        Hands the connection of the calling thread back to the pool.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            self._local.conn = None
+            with self._lock:
+                self._idle.append(conn)
+
+    def close(self):
+        """
+        Closes all connections opened by the pool.
+        """
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+            self._idle = []
+        self._local = threading.local()
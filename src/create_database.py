@@ -1,10 +1,47 @@
+import hashlib
+import json
 import os
-import re
 import sqlite3
+import time
 import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 
+import numpy as np
 import pandas as pd
 
+from src.dedupe import dedupe_users
+from src.passwords import hash_password
+from src.sharding import shard_names, shard_of
+
+USER_COLUMNS = ["firstname", "telephone_number", "email",
+                "password", "role", "created_at"]
+CHILD_COLUMNS = ["name", "age", "index_parent"]
+SOURCE_EXTENSIONS = (".csv", ".json", ".xml")
+USERS_TABLE_SQL = """CREATE TABLE "Users" (
+                     "id_user" INTEGER PRIMARY KEY, "firstname" TEXT,
+                     "telephone_number" TEXT, "email" TEXT,
+                     "password" TEXT, "role" TEXT, "created_at" TEXT)"""
+CHILDREN_TABLE_SQL = """CREATE TABLE "Children" (
+                        "index" INTEGER PRIMARY KEY, "name" TEXT,
+                        "age" INTEGER, "index_parent" INTEGER)"""
+TABLES = {"Users": (USERS_TABLE_SQL, USER_COLUMNS),
+          "Children": (CHILDREN_TABLE_SQL, CHILD_COLUMNS)}
+
+
+def frame_rows(df, columns):
+    """
+    Iterates the index and the columns of a DataFrame as tuples of Python
+    objects, which is several times faster than itertuples for string
+    columns.
+
+    :param df: A pandas DataFrame.
+    :param columns: Names of the columns following the index.
+    :return: An iterator of tuples.
+    """
+    return zip(df.index.tolist(), *(df[column].tolist()
+                                    for column in columns))
+
 
 class LoadData:
     """
@@ -21,49 +58,157 @@ class LoadData:
 
     @staticmethod
     def read_xml(file):
-        tree = ET.parse(file)
-        root = tree.getroot()
-        list_dict = []
-
-        for user in root.findall(".//user"):
-            children_list = []
-            row_dict = {
-                u.tag: u.text
-                for u in user.iter()
-                if u.tag not in ["user", "age", "name", "child"]
-            }
-            children = user.find(".//children")
-            row_dict["children"] = [
-                child.attrib for child in children.findall(".//child")
-            ]
-            for child in children.findall(".//child"):
-                child_dict = dict()
-                for c in child:
-                    child_dict[c.tag] = c.text
-                children_list.append(child_dict)
-                row_dict["children"] = children_list
-            list_dict.append(row_dict)
-        return list_dict
+        """
+        Yields the users of an XML file one at a time.
+
+        The file is parsed incrementally and every user element is removed
+        from the tree once read, so memory does not grow with the file.
+
+        :param file: The path to an XML file with <user> elements.
+        """
+        parents = []
+        for event, element in ET.iterparse(file, events=("start", "end")):
+            if event == "start":
+                parents.append(element)
+                continue
+            parents.pop()
+            if element.tag != "user":
+                continue
+            row_dict = {}
+            for field in element:
+                if field.tag == "children":
+                    row_dict["children"] = [
+                        {c.tag: c.text for c in child}
+                        for child in field.iter("child")
+                    ]
+                else:
+                    row_dict[field.tag] = field.text
+            yield row_dict
+            if parents:
+                parents[-1].remove(element)
 
     @staticmethod
     def list_documents_in_directory(directory):
-        return [
+        # Files are read in path order, not in the order of the file
+        # system, so ties of created_at are broken the same way by every
+        # full and incremental build.
+        return sorted(
             os.path.join(root, file)
             for root, _, files in os.walk(directory)
             for file in files
-        ]
+        )
+
+    @staticmethod
+    def iter_json(file, block_size=1 << 16):
+        """
+        Yields the records of a JSON array file one at a time,
+        reading the file in blocks.
+
+        :param file: The path to a JSON file holding an array of records.
+        :param block_size: Number of characters read at once.
+        """
+        decoder = json.JSONDecoder()
+        with open(file, encoding="utf-8") as handle:
+            buffer = handle.read(block_size).lstrip()
+            if not buffer.startswith("["):
+                raise ValueError(f"{file} is not a JSON array.")
+            buffer = buffer[1:]
+            while True:
+                buffer = buffer.lstrip().lstrip(",").lstrip()
+                if buffer.startswith("]"):
+                    return
+                try:
+                    record, end = decoder.raw_decode(buffer)
+                except json.JSONDecodeError:
+                    block = handle.read(block_size)
+                    if not block:
+                        raise
+                    buffer += block
+                    continue
+                yield record
+                buffer = buffer[end:]
 
-    def concat_data(self):
-        df = pd.DataFrame()
+    @staticmethod
+    def batched(records, chunksize):
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) == chunksize:
+                yield pd.DataFrame(chunk)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk)
+
+    def read_chunks(self, file, chunksize):
+        """
+        Yields the content of a single file as DataFrames
+        of at most chunksize rows.
+
+        :param file: The path to a CSV, JSON or XML file.
+        :param chunksize: Maximum number of rows per DataFrame.
+        """
+        if file.endswith(".csv"):
+            yield from pd.read_csv(file, delimiter=";", dtype=str,
+                                   chunksize=chunksize)
+        elif file.endswith(".json"):
+            for df_chunk in self.batched(self.iter_json(file), chunksize):
+                try:
+                    df_chunk["created_at"] = pd.to_datetime(
+                        df_chunk["created_at"])
+                except (ValueError, TypeError):
+                    pass
+                yield df_chunk
+        elif file.endswith(".xml"):
+            yield from self.batched(self.read_xml(file), chunksize)
+
+    def iter_chunks(self, chunksize):
+        """
+        Yields the content of all files as DataFrames of at most chunksize
+        rows, indexed by row position as in concat_data.
+
+        :param chunksize: Maximum number of rows per DataFrame.
+        """
+        row_id = 0
         for file in self.list_of_files:
-            if file.endswith(".csv"):
-                df_file = pd.read_csv(file, delimiter=";")
-            elif file.endswith(".json"):
-                df_file = pd.read_json(file)
-            elif file.endswith(".xml"):
-                df_file = pd.DataFrame(self.read_xml(file))
-            df = pd.concat([df, df_file], ignore_index=True)
-        return df
+            for df_chunk in self.read_chunks(file, chunksize):
+                df_chunk.index = pd.RangeIndex(row_id,
+                                               row_id + len(df_chunk))
+                row_id += len(df_chunk)
+                yield df_chunk
+
+    @classmethod
+    def read_file(cls, file):
+        """
+        Reads a single CSV, JSON or XML file.
+
+        :param file: The path to the file.
+        :return: A pandas DataFrame with the file content,
+        or None for files of other formats.
+        """
+        if file.endswith(".csv"):
+            return pd.read_csv(file, delimiter=";")
+        elif file.endswith(".json"):
+            return pd.read_json(file)
+        elif file.endswith(".xml"):
+            return pd.DataFrame(list(cls.read_xml(file)))
+        return None
+
+    def concat_data(self, workers=1):
+        """
+        Reads all files and concatenates them in directory order.
+
+        :param workers: Number of processes parsing files concurrently
+        (default is 1, parsing in the current process).
+        :return: A pandas DataFrame with the content of all files.
+        """
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                df_files = list(executor.map(self.read_file,
+                                             self.list_of_files))
+        else:
+            df_files = [self.read_file(file) for file in self.list_of_files]
+        return pd.concat([df_file for df_file in df_files
+                          if df_file is not None], ignore_index=True)
 
 
 class Users:
@@ -77,40 +222,77 @@ class Users:
         :param data: A pandas DataFrame containing user data.
         """
         self.data = data
-
-    @staticmethod
-    def valid_telephone(number):
-        pattern = r"^\+48|^48|^\(48\)|^00"
-        number = re.sub(pattern, "", number)
-        return number.replace(" ", "")
+        self.conflicts = None
 
     def process_user_data(self):
+        """
+        Normalizes users and keeps one user per email and telephone
+        number, with the dropped users in the conflicts report.
+        """
+        self.normalize_user_data()
+        self.data, self.conflicts = dedupe_users(self.data)
+        self.data.index.names = ["id_user"]
+
+    def normalize_user_data(self):
         self.remove_nan()
         self.validate_email()
         self.format_telephone()
         self.format_creation_date()
-        self.data = self.data.sort_values(
-            by=["created_at"], ascending=False
-        ).drop_duplicates(subset=["email"], keep="last")
-        self.data = self.data.drop_duplicates(subset=["telephone_number"],
-                                              keep="last")
-        self.data.index.names = ["id_user"]
 
     def validate_email(self):
         pattern = r"^[^@]+@[^@\.]+\.[a-zA-Z0-9]{1,4}$"
         self.data = self.data[self.data["email"].str.contains(pattern)]
 
     def format_telephone(self):
-        self.data["telephone_number"] = self.data["telephone_number"].map(
-            self.valid_telephone
+        # Strips one country prefix at the start and all spaces in one pass.
+        pattern = r"^(?:\+48|48|\(48\)|00)| "
+        self.data["telephone_number"] = (
+            self.data["telephone_number"].astype(str)
+            .str.replace(pattern, "", regex=True)
         )
 
     def format_creation_date(self):
-        self.data["created_at"] = self.data["created_at"].map(str)
+        values = self.data["created_at"].to_numpy(dtype=object, copy=True)
+        timestamps = (pd.Series(values).map(type) == pd.Timestamp).to_numpy()
+        if timestamps.any():
+            try:
+                dates = pd.DatetimeIndex(values[timestamps])
+            except (TypeError, ValueError):
+                dates = None
+            if dates is not None and dates.tz is None:
+                whole_seconds = np.asarray(dates == dates.floor("s"))
+                values[np.flatnonzero(timestamps)[whole_seconds]] = (
+                    dates[whole_seconds].strftime("%Y-%m-%d %H:%M:%S"))
+        others = (pd.Series(values).map(type) != str).to_numpy()
+        values[others] = [str(value) for value in values[others]]
+        self.data["created_at"] = pd.Series(values, index=self.data.index,
+                                            dtype=str)
 
     def remove_nan(self):
         self.data = self.data[self.data["telephone_number"].notna()]
 
+    def hash_passwords(self, iterations=None, workers=1):
+        """
+        Replaces passwords with salted hashes of hash_password.
+
+        PBKDF2 releases the GIL, so the hashes are computed
+        by a pool of threads.
+
+        :param iterations: Number of PBKDF2 iterations
+        (default is HASH_ITERATIONS).
+        :param workers: Number of hashing threads (default is 1).
+        """
+        def hash_value(password):
+            if pd.isna(password):
+                return None
+            return hash_password(str(password), iterations)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            hashes = list(executor.map(hash_value,
+                                       self.data["password"].tolist()))
+        self.data["password"] = pd.Series(hashes, index=self.data.index,
+                                          dtype=object)
+
 
 class Children:
     """
@@ -126,29 +308,35 @@ class Children:
         self.user_data = user_data
 
     def process_children_data(self):
-        children_database = []
-        for index, row in self.user_data.iterrows():
-            if row["children"]:
-                children_database.extend(
-                    self.process_individual_child(row["children"], index)
-                )
-        return pd.DataFrame(children_database)
-
-    def process_individual_child(self, children, parent_index):
-        processed_children = []
-        if isinstance(children, list):
-            for child in children:
-                child["index_parent"] = parent_index
-                processed_children.append(child)
-        elif not pd.isna(children):
-            for child in children.split(","):
-                child_data = {
-                    "name": child.split(" ")[0],
-                    "index_parent": parent_index,
-                    "age": re.search(r"\d{1,2}", child).group(),
-                }
-                processed_children.append(child_data)
-        return processed_children
+        """
+        Builds one row per child, with CSV children strings like
+        'Anna (18),Mindy (11)' and JSON/XML children lists exploded
+        in parent order.
+
+        :return: A pandas DataFrame with name, age and index_parent columns.
+        """
+        children = self.user_data["children"].reset_index(drop=True)
+        kinds = children.map(type)
+
+        text = children[kinds == str]
+        # For every comma separated child the name is the text before
+        # the first space and the age is the first number.
+        pattern = r"(?:^|,)(?=[^,\d]*(\d{1,2})|)([^ ,]*)[^,]*"
+        text = text[text != ""].str.findall(pattern).explode()
+        text_children = pd.DataFrame(text.tolist(), index=text.index,
+                                     columns=["age", "name"])
+        text_children = text_children[["name", "age"]]
+
+        lists = children[kinds == list]
+        lists = lists[lists.str.len() > 0].explode()
+        list_children = pd.DataFrame(lists.tolist(), index=lists.index,
+                                     dtype=object)
+
+        children_df = pd.concat(
+            [text_children, list_children]).sort_index(kind="stable")
+        children_df["index_parent"] = self.user_data.index.to_numpy()[
+            children_df.index]
+        return children_df.reset_index(drop=True)
 
 
 class DatabaseManager:
@@ -164,33 +352,644 @@ class DatabaseManager:
         """
         self.conn = sqlite3.connect(db_name)
 
+    @contextmanager
+    def bulk_load(self):
+        """
+        Relaxes durability while a new database is loaded: the journal is
+        written ahead and nothing is synced until the load is done. A
+        database left behind by a crash is incomplete anyway and has to
+        be created again. Afterwards the query planner statistics are
+        gathered and the rollback journal is restored, so read-only
+        connections can open the database without a write-ahead log.
+        """
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = OFF")
+        try:
+            yield
+            self.conn.execute("ANALYZE")
+        finally:
+            self.conn.execute("PRAGMA synchronous = FULL")
+            self.conn.execute("PRAGMA journal_mode = DELETE")
+
     def save_to_database(self, df, table_name):
-        df.to_sql(name=table_name, con=self.conn)
+        """
+        Creates Users or Children with its typed schema and inserts all
+        rows in a single transaction, in primary key order.
+
+        :param df: A pandas DataFrame of the table indexed by id_user
+        or child index.
+        :param table_name: 'Users' or 'Children'.
+        """
+        table_sql, columns = TABLES[table_name]
+        placeholders = ", ".join("?" * (len(columns) + 1))
+        with self.conn:
+            self.conn.execute(table_sql)
+            self.conn.executemany(
+                f'INSERT INTO "{table_name}" VALUES ({placeholders})',
+                frame_rows(df.sort_index(), columns))
+
+    def create_indexes(self):
+        with self.conn:
+            self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS "
+                              "ix_Users_email ON Users (email)")
+            self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS "
+                              "ix_Users_telephone_number "
+                              "ON Users (telephone_number)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS "
+                              "ix_Children_index_parent "
+                              "ON Children (index_parent)")
+            self.conn.execute("CREATE INDEX IF NOT EXISTS "
+                              "ix_Children_age ON Children (age)")
+
+    def create_summary_tables(self):
+        """
+        Stores the number of users, the id of the oldest user and the number
+        of children per age, which the admin actions read instead of
+        scanning Users and Children.
+
+        Similar children are looked up in an inverted index: Age_parents
+        lists the parents of children of every age, ordered by the first
+        of those children by name, and Parent_children holds every parent
+        with their children already rendered as 'Andrew, 4; James, 13'.
+        """
+        with self.conn:
+            for table in ["Users_summary", "Children_ages", "Age_parents",
+                          "Parent_children"]:
+                self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self.conn.execute("""CREATE TABLE Users_summary AS SELECT
+                                 (SELECT COUNT(*) FROM Users) AS user_count,
+                                 (SELECT id_user FROM Users
+                                  ORDER BY created_at, id_user LIMIT 1)
+                                 AS oldest_id_user""")
+            self.conn.execute("""CREATE TABLE Children_ages AS
+                                 SELECT age, COUNT(*) AS count FROM Children
+                                 GROUP BY age ORDER BY age""")
+            self.conn.execute("""CREATE TABLE Age_parents (
+                                 age INTEGER, rank INTEGER,
+                                 index_parent INTEGER,
+                                 PRIMARY KEY (age, rank)) WITHOUT ROWID""")
+            self.conn.execute("""INSERT INTO Age_parents
+                                 SELECT age, ROW_NUMBER() OVER (
+                                     PARTITION BY age
+                                     ORDER BY MIN(child_rank)
+                                 ), index_parent FROM (
+                                     SELECT age, index_parent,
+                                     ROW_NUMBER() OVER (
+                                         PARTITION BY age
+                                         ORDER BY name, rowid
+                                     ) AS child_rank FROM Children
+                                 ) GROUP BY age, index_parent""")
+            self.conn.execute("""CREATE TABLE Parent_children (
+                                 index_parent INTEGER PRIMARY KEY,
+                                 firstname TEXT, telephone_number TEXT,
+                                 children TEXT)""")
+            self.conn.execute("""INSERT INTO Parent_children
+                                 SELECT Users.id_user, Users.firstname,
+                                 Users.telephone_number, rendered.children
+                                 FROM (
+                                     SELECT index_parent,
+                                     GROUP_CONCAT(name || ', ' || age, '; ')
+                                     AS children
+                                     FROM (SELECT index_parent, name, age
+                                           FROM Children
+                                           ORDER BY index_parent, name,
+                                           rowid)
+                                     GROUP BY index_parent
+                                 ) AS rendered JOIN Users ON
+                                 Users.id_user = rendered.index_parent
+                                 ORDER BY Users.id_user""")
+
+    def bump_generation(self, generation=None):
+        """
+        Stores a new generation stamp of the database, which tells
+        cached results of the account actions that they are stale.
+
+        :param generation: The stamp, shared by all shards of a database
+        (default is the current time in nanoseconds).
+        """
+        if generation is None:
+            generation = time.time_ns()
+        with self.conn:
+            self.conn.execute("DROP TABLE IF EXISTS Database_generation")
+            self.conn.execute("CREATE TABLE Database_generation AS "
+                              "SELECT ? AS generation", (generation,))
+
+    def create_staging_tables(self):
+        """
+        Creates staging tables in a temporary on-disk database,
+        which SQLite removes when the connection is closed.
+        """
+        self.conn.execute("ATTACH DATABASE '' AS staging")
+        self.conn.execute("""CREATE TABLE staging.Users (
+                             row_id INTEGER, firstname TEXT,
+                             telephone_number TEXT, email TEXT,
+                             password TEXT, role TEXT, created_at TEXT)""")
+        self.conn.execute("""CREATE TABLE staging.Children (
+                             name TEXT, age INTEGER, index_parent INTEGER)""")
+
+    def save_to_staging(self, users_df, children_df):
+        """
+        Saves one chunk of normalized users and their children
+        in a single transaction.
+
+        :param users_df: A pandas DataFrame of normalized users
+        indexed by row position.
+        :param children_df: A pandas DataFrame of their children.
+        """
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO staging.Users VALUES (?, ?, ?, ?, ?, ?, ?)",
+                frame_rows(users_df, USER_COLUMNS)
+            )
+            if not children_df.empty:
+                self.conn.executemany(
+                    "INSERT INTO staging.Children VALUES (?, ?, ?)",
+                    children_df[CHILD_COLUMNS].itertuples(
+                        index=False, name=None)
+                )
+
+    def save_from_staging(self):
+        """
+        Saves deduplicated users and their children from the staging
+        tables, keeping the rules and row order of Users.process_user_data.
+        """
+        with self.conn:
+            self.conn.execute(USERS_TABLE_SQL)
+            self.conn.execute("""INSERT INTO Users
+                                 SELECT row_id, firstname, telephone_number,
+                                 email, password, role, created_at FROM (
+                                     SELECT *, ROW_NUMBER() OVER (
+                                         PARTITION BY telephone_number
+                                         ORDER BY created_at, row_id DESC
+                                     ) AS telephone_rank FROM (
+                                         SELECT *, ROW_NUMBER() OVER (
+                                             PARTITION BY email
+                                             ORDER BY created_at, row_id DESC
+                                         ) AS email_rank
+                                         FROM staging.Users
+                                     ) WHERE email_rank = 1
+                                 ) WHERE telephone_rank = 1
+                                 ORDER BY row_id""")
+            self.conn.execute(CHILDREN_TABLE_SQL)
+            self.conn.execute("""INSERT INTO Children
+                                 SELECT ROW_NUMBER() OVER (
+                                     ORDER BY Users.created_at DESC,
+                                     Users.id_user, staging.Children.rowid
+                                 ) - 1, staging.Children.name,
+                                 staging.Children.age,
+                                 staging.Children.index_parent
+                                 FROM staging.Children JOIN Users ON
+                                 Users.id_user = staging.Children.index_parent
+                                 ORDER BY Users.created_at DESC,
+                                 Users.id_user, staging.Children.rowid""")
+        self.conn.execute("DETACH DATABASE staging")
+
+    def has_table(self, table_name):
+        return self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name=?",
+            (table_name,)
+        ).fetchone() is not None
+
+    def create_source_tables(self):
+        """
+        Creates the tables of incremental mode: a manifest of loaded files,
+        every normalized user and child read from them, and empty Users
+        and Children tables.
+
+        :return: False if Users was created without incremental mode,
+        True otherwise.
+        """
+        if self.has_table("Source_files"):
+            return True
+        if self.has_table("Users"):
+            return False
+        with self.conn:
+            self.conn.execute("""CREATE TABLE Source_files (
+                                 id INTEGER PRIMARY KEY, path TEXT,
+                                 size INTEGER, mtime REAL, sha256 TEXT)""")
+            self.conn.execute("""CREATE TABLE Source_users (
+                                 id INTEGER PRIMARY KEY, file_id INTEGER,
+                                 firstname TEXT, telephone_number TEXT,
+                                 email TEXT, password TEXT, role TEXT,
+                                 created_at TEXT)""")
+            self.conn.execute("""CREATE TABLE Source_children (
+                                 id INTEGER PRIMARY KEY, parent INTEGER,
+                                 name TEXT, age INTEGER)""")
+            for table, column in [("Source_users", "file_id"),
+                                  ("Source_users", "email"),
+                                  ("Source_users", "telephone_number"),
+                                  ("Source_children", "parent")]:
+                self.conn.execute(f"CREATE INDEX ix_{table}_{column} "
+                                  f"ON {table} ({column})")
+            self.conn.execute(USERS_TABLE_SQL)
+            self.conn.execute(CHILDREN_TABLE_SQL)
+        self.create_indexes()
+        return True
+
+    @staticmethod
+    def file_hash(path):
+        digest = hashlib.sha256()
+        with open(path, "rb") as handle:
+            for block in iter(lambda: handle.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def changed_files(self, files):
+        """
+        Compares files with the manifest. Files with unchanged size and
+        modification time are skipped without reading them.
+
+        :param files: Paths of the data files.
+        :return: A list of (path, size, mtime, sha256) of new or changed
+        files and a list of manifest ids of changed or removed files.
+        """
+        manifest = {
+            path: (file_id, size, mtime, sha256)
+            for file_id, path, size, mtime, sha256 in self.conn.execute(
+                "SELECT id, path, size, mtime, sha256 FROM Source_files")
+        }
+        new_files = []
+        stale_ids = []
+        for path in files:
+            stat = os.stat(path)
+            known = manifest.pop(path, None)
+            if known and known[1:3] == (stat.st_size, stat.st_mtime):
+                continue
+            sha256 = self.file_hash(path)
+            if known and known[3] == sha256:
+                self.conn.execute(
+                    "UPDATE Source_files SET mtime=? WHERE id=?",
+                    (stat.st_mtime, known[0]))
+                continue
+            if known:
+                stale_ids.append(known[0])
+            new_files.append((path, stat.st_size, stat.st_mtime, sha256))
+        stale_ids.extend(known[0] for known in manifest.values())
+        return new_files, stale_ids
+
+    def save_source_file(self, path, size, mtime, sha256):
+        return self.conn.execute(
+            "INSERT INTO Source_files (path, size, mtime, sha256) "
+            "VALUES (?, ?, ?, ?)", (path, size, mtime, sha256)
+        ).lastrowid
+
+    def next_source_user_id(self):
+        return self.conn.execute(
+            "SELECT COALESCE(MAX(id), 0) + 1 FROM Source_users").fetchone()[0]
+
+    def save_source_chunk(self, file_id, users_df, children_df):
+        """
+        Saves one chunk of normalized users of a file and their children.
+
+        :param file_id: Manifest id of the file.
+        :param users_df: A pandas DataFrame of normalized users
+        indexed by their new Source_users ids.
+        :param children_df: A pandas DataFrame of their children.
+        """
+        self.conn.executemany(
+            "INSERT INTO Source_users VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            ((index, file_id, *row) for index, *row in
+             users_df[USER_COLUMNS].itertuples(name=None))
+        )
+        if not children_df.empty:
+            self.conn.executemany(
+                "INSERT INTO Source_children (parent, name, age) "
+                "VALUES (?, ?, ?)",
+                children_df[["index_parent", "name", "age"]].itertuples(
+                    index=False, name=None)
+            )
+
+    def apply_source_changes(self, new_ids, stale_ids):
+        """
+        Upserts Users and Children after files were added or removed.
+
+        Only emails and telephone numbers of added or removed users are
+        deduplicated again, with the rules of Users.process_user_data:
+        the oldest user per email wins, then the oldest of those per
+        telephone number. Ties go to the user of the last file path and
+        the last row of its file, the user a full build reads last,
+        whatever update loaded the files.
+
+        :param new_ids: Manifest ids of files loaded in this update.
+        :param stale_ids: Manifest ids of files changed or removed.
+        """
+        self.conn.execute("CREATE TEMP TABLE new_files (id INTEGER)")
+        self.conn.execute("CREATE TEMP TABLE stale_files (id INTEGER)")
+        # Ids of Source_users follow the rows of a file, paths the order
+        # in which a full build reads the files.
+        self.conn.execute("""CREATE TEMP VIEW ranked_users AS
+                             SELECT Source_users.*, Source_files.path
+                             FROM Source_users JOIN Source_files ON
+                             Source_files.id = Source_users.file_id""")
+        self.conn.executemany("INSERT INTO new_files VALUES (?)",
+                              [(file_id,) for file_id in new_ids])
+        self.conn.executemany("INSERT INTO stale_files VALUES (?)",
+                              [(file_id,) for file_id in stale_ids])
+        self.conn.execute("""CREATE TEMP TABLE touched_emails AS
+                             SELECT DISTINCT email FROM Source_users
+                             WHERE file_id IN (SELECT id FROM new_files)
+                             OR file_id IN (SELECT id FROM stale_files)""")
+        self.conn.execute("""CREATE TEMP TABLE touched_phones AS
+                             SELECT DISTINCT telephone_number
+                             FROM Source_users
+                             WHERE file_id IN (SELECT id FROM new_files)
+                             OR file_id IN (SELECT id FROM stale_files)""")
+        email_winners_phones = """
+            INSERT INTO touched_phones SELECT telephone_number FROM (
+                SELECT telephone_number, ROW_NUMBER() OVER (
+                    PARTITION BY email ORDER BY created_at, path DESC, id DESC
+                ) AS email_rank FROM ranked_users
+                WHERE email IN (SELECT email FROM touched_emails)
+                {}
+            ) WHERE email_rank = 1"""
+        self.conn.execute(email_winners_phones.format(
+            "AND file_id NOT IN (SELECT id FROM new_files)"))
+        self.conn.execute("""DELETE FROM Source_children WHERE parent IN (
+                             SELECT id FROM Source_users WHERE file_id IN
+                             (SELECT id FROM stale_files))""")
+        self.conn.execute("""DELETE FROM Source_users WHERE file_id IN
+                             (SELECT id FROM stale_files)""")
+        self.conn.execute("""DELETE FROM Source_files WHERE id IN
+                             (SELECT id FROM stale_files)""")
+        self.conn.execute(email_winners_phones.format(""))
+        self.conn.execute("""CREATE TEMP TABLE winners AS
+                             SELECT * FROM (
+                                 SELECT *, ROW_NUMBER() OVER (
+                                     PARTITION BY telephone_number
+                                     ORDER BY created_at, path DESC, id DESC
+                                 ) AS telephone_rank FROM (
+                                     SELECT *, ROW_NUMBER() OVER (
+                                         PARTITION BY email
+                                         ORDER BY created_at, path DESC,
+                                         id DESC
+                                     ) AS email_rank FROM ranked_users
+                                     WHERE email IN (
+                                         SELECT email FROM Source_users
+                                         WHERE telephone_number IN (
+                                             SELECT telephone_number
+                                             FROM touched_phones))
+                                 ) WHERE email_rank = 1
+                                 AND telephone_number IN (
+                                     SELECT telephone_number
+                                     FROM touched_phones)
+                             ) WHERE telephone_rank = 1""")
+        self.conn.execute("""DELETE FROM Children WHERE index_parent IN (
+                             SELECT id_user FROM Users
+                             WHERE telephone_number IN (
+                                 SELECT telephone_number
+                                 FROM touched_phones))""")
+        self.conn.execute("""DELETE FROM Users WHERE telephone_number IN (
+                             SELECT telephone_number FROM touched_phones)""")
+        self.conn.execute("""INSERT INTO Users
+                             SELECT id, firstname, telephone_number, email,
+                             password, role, created_at FROM winners
+                             ORDER BY created_at DESC, id""")
+        self.conn.execute("""INSERT INTO Children
+                             SELECT Source_children.id, Source_children.name,
+                             Source_children.age, Source_children.parent
+                             FROM Source_children JOIN winners ON
+                             winners.id = Source_children.parent
+                             ORDER BY winners.created_at DESC, winners.id,
+                             Source_children.id""")
+        for table in ["new_files", "stale_files", "touched_emails",
+                      "touched_phones", "winners"]:
+            self.conn.execute(f"DROP TABLE temp.{table}")
+        self.conn.execute("DROP VIEW temp.ranked_users")
 
     def close_connection(self):
         self.conn.close()
 
 
-def create_database(args):
+def normalize_database(directory, workers=1, iterations=None,
+                       conflict_report=None):
     """
-    A function to create and populate a database with user and children data.
-
-    This function reads data from files, processes it, and saves it into a
-    SQLite database.
-
-    :param args: Arguments for database creation (currently not used).
+    Loads all files of the directory into memory and processes them.
+
+    :param directory: The path to the directory containing data files.
+    :param workers: Number of processes parsing files and threads
+    hashing passwords (default is 1).
+    :param iterations: Number of PBKDF2 iterations of password hashes.
+    :param conflict_report: CSV file the users dropped as duplicates
+    are written to (default is none).
+    :return: pandas DataFrames of users indexed by id_user
+    and of their children.
     """
-    db_manager = DatabaseManager()
-    df_concat = LoadData("data").concat_data()
+    df_concat = LoadData(directory).concat_data(workers)
     user_processor = Users(df_concat)
     user_processor.process_user_data()
+    if conflict_report is not None:
+        user_processor.conflicts.to_csv(conflict_report, index=False)
+    user_processor.hash_passwords(iterations, workers)
 
     children_processor = Children(user_processor.data)
     children_df = children_processor.process_children_data()
+    return user_processor.data.drop(columns=["children"]), children_df
+
+
+def load_database(db_manager, directory, workers=1, iterations=None,
+                  conflict_report=None):
+    """
+    Loads all files of the directory into memory, processes them
+    and saves users and children into the database.
+
+    :param db_manager: DatabaseManager of the created database.
+    :param directory: The path to the directory containing data files.
+    :param workers: Number of processes parsing files and threads
+    hashing passwords (default is 1).
+    :param iterations: Number of PBKDF2 iterations of password hashes.
+    :param conflict_report: CSV file the users dropped as duplicates
+    are written to (default is none).
+    """
+    users_df, children_df = normalize_database(directory, workers,
+                                               iterations, conflict_report)
     db_manager.save_to_database(children_df, "Children")
+    db_manager.save_to_database(users_df, "Users")
+
+
+def shard_database(database_name, directory, shards, workers=1,
+                   iterations=None, conflict_report=None):
+    """
+    Loads all files of the directory into memory, processes them and
+    saves users, partitioned by a hash of id_user, into one database per
+    shard. Children are saved in the shard of their parent and keep
+    their index, so rows are ordered as in a single database.
+
+    :param database_name: The name of the single file database.
+    :param directory: The path to the directory containing data files.
+    :param shards: Number of shards.
+    :param workers: Number of processes parsing files and threads
+    hashing passwords (default is 1).
+    :param iterations: Number of PBKDF2 iterations of password hashes.
+    :param conflict_report: CSV file the users dropped as duplicates
+    are written to (default is none).
+    """
+    users_df, children_df = normalize_database(directory, workers,
+                                               iterations, conflict_report)
+    user_shards = shard_of(users_df.index.to_numpy(np.uint64), shards)
+    children_shards = shard_of(
+        children_df["index_parent"].to_numpy(np.uint64), shards)
+    generation = time.time_ns()
+
+    def save_shard(shard, shard_name):
+        db_manager = DatabaseManager(shard_name)
+        with db_manager.bulk_load():
+            db_manager.save_to_database(
+                children_df[children_shards == shard], "Children")
+            db_manager.save_to_database(
+                users_df[user_shards == shard], "Users")
+            db_manager.create_indexes()
+            db_manager.create_summary_tables()
+            db_manager.bump_generation(generation)
+        db_manager.close_connection()
+
+    # Every shard is its own file, so shards are written without
+    # waiting for each other's locks.
+    with ThreadPoolExecutor(max_workers=shards) as executor:
+        list(executor.map(save_shard, range(shards),
+                          shard_names(database_name, shards)))
+
+
+def stream_database(db_manager, directory, chunksize, workers=1,
+                    iterations=None):
+    """
+    Streams all files of the directory in chunks into the database.
+
+    Every chunk is normalized and staged in its own transaction, duplicates
+    are removed inside SQLite afterwards, so memory use depends on
+    chunksize only. The result is the same as load_database.
+
+    :param db_manager: DatabaseManager of the created database.
+    :param directory: The path to the directory containing data files.
+    :param chunksize: Maximum number of rows held in memory at once.
+    :param workers: Number of threads hashing passwords (default is 1).
+    :param iterations: Number of PBKDF2 iterations of password hashes.
+    """
+    db_manager.create_staging_tables()
+    for df_chunk in LoadData(directory).iter_chunks(chunksize):
+        user_processor = Users(df_chunk)
+        user_processor.normalize_user_data()
+        user_processor.hash_passwords(iterations, workers)
+        children_df = Children(
+            user_processor.data).process_children_data()
+        db_manager.save_to_staging(user_processor.data, children_df)
+    db_manager.save_from_staging()
+
+
+def update_database(db_manager, directory, chunksize, workers=1,
+                    iterations=None):
+    """
+    Loads only new or changed files of the directory into a database
+    created in incremental mode and upserts their users and children.
+
+    :param db_manager: DatabaseManager of the updated database.
+    :param directory: The path to the directory containing data files.
+    :param chunksize: Maximum number of rows held in memory at once.
+    :param workers: Number of threads hashing passwords (default is 1).
+    :param iterations: Number of PBKDF2 iterations of password hashes.
+    :return: A message describing the update.
+    """
+    if not db_manager.create_source_tables():
+        return ("Database was created without --incremental, "
+                "remove it to create it again.")
+    load_data = LoadData(directory)
+    files = [file for file in load_data.list_of_files
+             if file.endswith(SOURCE_EXTENSIONS)]
+    with db_manager.conn:
+        new_files, stale_ids = db_manager.changed_files(files)
+        if (not new_files and not stale_ids
+                and db_manager.has_table("Users_summary")
+                and db_manager.has_table("Database_generation")):
+            return "Database is up to date."
+        new_ids = []
+        next_id = db_manager.next_source_user_id()
+        for path, size, mtime, sha256 in new_files:
+            file_id = db_manager.save_source_file(path, size, mtime, sha256)
+            new_ids.append(file_id)
+            for df_chunk in load_data.read_chunks(path, chunksize):
+                df_chunk.index = pd.RangeIndex(next_id,
+                                               next_id + len(df_chunk))
+                next_id += len(df_chunk)
+                user_processor = Users(df_chunk)
+                user_processor.normalize_user_data()
+                user_processor.hash_passwords(iterations, workers)
+                children_df = Children(
+                    user_processor.data).process_children_data()
+                db_manager.save_source_chunk(file_id, user_processor.data,
+                                             children_df)
+        db_manager.apply_source_changes(new_ids, stale_ids)
+    db_manager.create_summary_tables()
+    db_manager.bump_generation()
+    return (f"Database updated: {len(new_files)} files loaded, "
+            f"{len(stale_ids)} files replaced or removed.")
+
+
+def snapshot_database(db_manager, directory):
+    """
+    Writes columnar snapshots of the database, if pyarrow is installed.
+
+    :param db_manager: DatabaseManager of the created database.
+    :param directory: Directory of the snapshot files.
+    :return: A message describing the snapshots.
+    """
+    try:
+        from src.snapshot import write_snapshots
+        write_snapshots(db_manager.conn, directory)
+    except ImportError:
+        return "Install pyarrow to write snapshots."
+    return f"Snapshots written to {directory}."
+
+
+def create_database(args):
+    """
+    A function to create and populate a database with user and children data.
 
-    db_manager.save_to_database(user_processor.data.drop(
-        columns=["children"]), "Users")
+    This function reads data from files, processes it, and saves it into a
+    SQLite database.
+
+    :param args: Arguments for database creation, with optional
+    'incremental', 'streaming' and 'snapshot' flags, 'chunksize',
+    'workers', 'shards', 'hash_iterations', 'snapshot_directory' and
+    'conflict_report', and
+    the 'database' file and data 'directory' (default is users.sqlite3
+    and the data folder).
+    """
+    database_name = args.get("database", "users.sqlite3")
+    directory = args.get("directory", "data")
+    shards = args.get("shards", 1)
+    workers = args.get("workers", 1)
+    iterations = args.get("hash_iterations")
+    conflict_report = args.get("conflict_report")
+    if conflict_report is not None and (args.get("incremental")
+                                        or args.get("streaming")):
+        return ("Conflict reports cannot be written with "
+                "--incremental or --streaming.")
+    if shards > 1:
+        if (args.get("incremental") or args.get("streaming")
+                or args.get("snapshot")):
+            return ("Sharded databases cannot be created with "
+                    "--incremental, --streaming or --snapshot.")
+        shard_database(database_name, directory, shards, workers,
+                       iterations, conflict_report)
+        return f"Database created in {shards} shards."
+    db_manager = DatabaseManager(database_name)
+    if args.get("incremental"):
+        message = update_database(db_manager, directory, args["chunksize"],
+                                  workers, iterations)
+    else:
+        with db_manager.bulk_load():
+            if args.get("streaming"):
+                stream_database(db_manager, directory, args["chunksize"],
+                                workers, iterations)
+            else:
+                load_database(db_manager, directory, workers, iterations,
+                              conflict_report)
+            db_manager.create_indexes()
+            db_manager.create_summary_tables()
+            db_manager.bump_generation()
+        message = 'Database created.'
+    if args.get("snapshot") and db_manager.has_table("Database_generation"):
+        message += " " + snapshot_database(
+            db_manager, args.get("snapshot_directory", "snapshots"))
 
     db_manager.close_connection()
-    return 'Database created.'
+    return message
@@ -1,35 +1,128 @@
 import logging
 import sqlite3
 import sys
+import time
 
-import pandas as pd
+from src.connection_pool import ConnectionPool
+from src.query_result import QueryResult
+
+QUERY_CHUNKSIZE = 1000
 
 
 class DatabaseManager:
     """A class for managing database connections and executing SQL queries."""
 
-    def __init__(self, database_name):
+    def __init__(self, database_name, profiler=None):
         """Initializes the DatabaseManager with the specified database.
 
         :params database_name: The name of the SQLite database file.
+        :param profiler: Profiler recording every query (default is None).
         """
         self.database_name = database_name
+        self.pool = ConnectionPool(database_name)
+        self.profiler = profiler
         self.logger = logging.getLogger(__name__)
 
-    def sql_query(self, sql_query):
+    def sql_query(self, sql_query, params=None):
         """Executes a SQL query on the connected SQLite database.
 
         :param sql_query: A string containing the SQL query to be executed.
-        :return: A pandas DataFrame containing the results of the SQL query.
+        :param params: Values bound to the named parameters of the query.
+        :return: A QueryResult containing the results of the SQL query.
+        """
+        if self.profiler is not None:
+            return self.profiled_sql_query(sql_query, params)
+        try:
+            cursor = self.pool.connection().cursor()
+            cursor.row_factory = sqlite3.Row
+            return QueryResult.from_cursor(
+                cursor.execute(sql_query, params or ()))
+        except Exception:
+            self.logger.debug("Query failed: %s", sql_query, exc_info=True)
+            self.logger.error(
+                "Fail load database.\n"
+                "Remeber of run first python script.py create_database.py"
+            )
+            sys.exit(0)
+
+    def iter_query(self, sql_query, params=None, chunksize=QUERY_CHUNKSIZE):
+        """Executes a SQL query and yields its rows as they are fetched
+        from the cursor in chunks, so they are never all held in memory.
+
+        Profiled queries are fetched at once, as sql_query does,
+        to record their timings.
+
+        :param sql_query: A string containing the SQL query to be executed.
+        :param params: Values bound to the named parameters of the query.
+        :param chunksize: Number of rows fetched at once.
+        :return: An iterator of sqlite3.Row objects.
         """
+        if self.profiler is not None:
+            yield from self.profiled_sql_query(sql_query, params)
+            return
+        cursor = None
         try:
-            with sqlite3.connect(
-                f"file:{self.database_name}?mode=ro", uri=True
-            ) as conn:
-                return pd.read_sql(sql_query, conn)
+            cursor = self.pool.connection().cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute(sql_query, params or ())
+            rows = cursor.fetchmany(chunksize)
+            while rows:
+                yield from rows
+                rows = cursor.fetchmany(chunksize)
         except Exception:
+            self.logger.debug("Query failed: %s", sql_query, exc_info=True)
             self.logger.error(
                 "Fail load database.\n"
                 "Remeber of run first python script.py create_database.py"
             )
             sys.exit(0)
+        finally:
+            if cursor is not None:
+                cursor.close()
+
+    def profiled_sql_query(self, sql_query, params=None):
+        """Executes a SQL query like sql_query and records its timings,
+        rows and, when it is slow, its query plan in the profiler.
+
+        :param sql_query: A string containing the SQL query to be executed.
+        :param params: Values bound to the named parameters of the query.
+        :return: A QueryResult containing the results of the SQL query.
+        """
+        start = time.perf_counter()
+        timings = {"connection_seconds": 0.0, "execute_seconds": 0.0,
+                   "fetch_seconds": 0.0}
+        try:
+            conn = self.pool.connection()
+            connected = time.perf_counter()
+            timings["connection_seconds"] = connected - start
+            cursor = conn.cursor()
+            cursor.row_factory = sqlite3.Row
+            cursor.execute(sql_query, params or ())
+            executed = time.perf_counter()
+            timings["execute_seconds"] = executed - connected
+            result = QueryResult.from_cursor(cursor)
+            timings["fetch_seconds"] = time.perf_counter() - executed
+        except Exception as error:
+            timings["seconds"] = time.perf_counter() - start
+            self.profiler.statement(sql_query, timings, 0, error=repr(error))
+            self.logger.debug("Query failed: %s", sql_query, exc_info=True)
+            self.logger.error(
+                "Fail load database.\n"
+                "Remeber of run first python script.py create_database.py"
+            )
+            sys.exit(0)
+        timings["seconds"] = time.perf_counter() - start
+        plan = None
+        if self.profiler.is_slow(timings["seconds"]):
+            plan = [row[3] for row in conn.execute(
+                "EXPLAIN QUERY PLAN " + sql_query, params or ())]
+        self.profiler.statement(sql_query, timings, len(result), plan)
+        return result
+
+    def release_connection(self):
+        """Hands the connection of the calling thread back to the pool."""
+        self.pool.release()
+
+    def close_connection(self):
+        """Closes all connections opened by the DatabaseManager."""
+        self.pool.close()
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+CREATED_AT_FORMAT = "%Y-%m-%d %H:%M:%S"
+CONFLICT_COLUMNS = ["id_user", "kept_id_user", "conflict", "reason"]
+
+
+def created_at_keys(created_at):
+    """
+    Converts created_at strings into integers ordered as the strings.
+
+    Dates as format_creation_date writes them are parsed to datetime64
+    seconds, whose order is the order of the strings. Seconds from 60 on
+    would roll over into the next minute, so they and any other string
+    make all values ranked by string comparison instead.
+
+    :param created_at: A pandas Series of strings.
+    :return: A numpy int64 array.
+    """
+    if (created_at.str.len().eq(len("0000-00-00 00:00:00")).all()
+            and created_at.str[-2].lt("6").all()):
+        dates = pd.to_datetime(created_at, format=CREATED_AT_FORMAT,
+                               errors="coerce")
+        if not dates.isna().any():
+            return dates.to_numpy().astype("datetime64[s]").view(np.int64)
+    return pd.factorize(created_at.to_numpy(dtype=object), sort=True)[0]
+
+
+def newest_first(keys):
+    """
+    Sorts keys in descending order, equal keys in their input order,
+    as a stable sort_values with ascending=False.
+
+    :param keys: A numpy int64 array from created_at_keys.
+    :return: A numpy array of positions.
+    """
+    if not len(keys):
+        return np.zeros(0, dtype=np.intp)
+    # Every key and position combined into one unique integer can be
+    # sorted by the faster unstable sort.
+    ranks = keys.max() - keys
+    if int(ranks.max()) < np.iinfo(np.int64).max // len(keys) - 1:
+        return np.argsort(ranks * len(keys) + np.arange(len(keys)))
+    return np.argsort(ranks, kind="stable")
+
+
+def last_positions(codes, positions):
+    """
+    Finds the last position of every code.
+
+    :param codes: A numpy array of codes from pd.factorize.
+    :param positions: A numpy array of increasing positions of the codes.
+    :return: A boolean numpy array marking the last position of its code,
+    and a numpy array of the last position of every code.
+    """
+    winners = np.full(codes.max(initial=-1) + 1, -1, dtype=np.intp)
+    np.maximum.at(winners, codes, positions)
+    return winners[codes] == positions, winners
+
+
+def dedupe_users(data):
+    """
+    Keeps one user per email and per telephone number.
+
+    The result is the same as sorting users by created_at, newest first,
+    and dropping duplicate emails and then duplicate telephone numbers
+    keeping the last row: the oldest user wins, and a tie goes to the user
+    read later. A user dropped for its email cannot drop another user by
+    its telephone number. Dates are compared as datetime64 and keys as
+    hash table codes, and the users are copied once.
+
+    :param data: A pandas DataFrame of normalized users.
+    :return: The DataFrame of kept users, newest first, and a conflict
+    report DataFrame with the id_user of every dropped user, the
+    kept_id_user it conflicted with, the conflict column and the reason
+    the kept user won.
+    """
+    keys = created_at_keys(data["created_at"])
+    order = newest_first(keys)
+    positions = np.arange(len(order))
+    email_codes = pd.factorize(data["email"],
+                               use_na_sentinel=False)[0][order]
+    phone_codes = pd.factorize(data["telephone_number"],
+                               use_na_sentinel=False)[0][order]
+
+    email_kept, email_winners = last_positions(email_codes, positions)
+    survivors = positions[email_kept]
+    phone_kept, phone_winners = last_positions(phone_codes[survivors],
+                                               survivors)
+    kept = email_kept.copy()
+    kept[survivors[~phone_kept]] = False
+
+    email_lost = positions[~email_kept]
+    phone_lost = survivors[~phone_kept]
+    lost = np.concatenate([email_lost, phone_lost])
+    winners = np.concatenate([email_winners[email_codes[email_lost]],
+                              phone_winners[phone_codes[phone_lost]]])
+    ids = data.index.to_numpy()[order]
+    sorted_keys = keys[order]
+    conflicts = pd.DataFrame({
+        "id_user": ids[lost],
+        "kept_id_user": ids[winners],
+        "conflict": np.repeat(["email", "telephone_number"],
+                              [len(email_lost), len(phone_lost)]),
+        "reason": np.where(sorted_keys[lost] == sorted_keys[winners],
+                           "same created_at, read later",
+                           "created earlier"),
+    }, columns=CONFLICT_COLUMNS)
+    conflicts = conflicts.sort_values("id_user", kind="stable")
+    return data.iloc[order[kept]], conflicts.reset_index(drop=True)
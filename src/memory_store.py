@@ -0,0 +1,674 @@
+import os
+import sys
+from array import array
+from bisect import bisect_left
+
+import numpy as np
+
+from src.account_actions import AccountActions, LEGACY_MULTI_CHILD_SEPARATOR
+from src.batch_actions import ADMIN_COMMANDS, BatchAccountActions
+from src.result_cache import GENERATION_QUERY
+from src.sharding import sort_key
+from src.user_manager import UserManager
+
+USERS_SQL = """SELECT id_user, firstname, telephone_number, email, password,
+               role, created_at FROM Users ORDER BY id_user"""
+CHILDREN_SQL = """SELECT "index", name, age, index_parent FROM Children
+                  ORDER BY "index" """
+
+
+class StringColumn:
+    """
+    A column of strings kept as one UTF-8 buffer and an array of offsets
+    instead of one Python object per value. NULL values are marked
+    in a mask, which is only allocated when there are any.
+    """
+
+    def __init__(self, hashed=False):
+        """
+        Initializes an empty StringColumn.
+
+        :param hashed: Boolean if hashes of the values are collected
+        for a HashIndex (default is False).
+        """
+        self._buffer = bytearray()
+        self._lengths = array("q")
+        self._nulls = array("b")
+        self._hashes = array("q") if hashed else None
+        self.data = b""
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.nulls = None
+        self._offsets = memoryview(self.offsets)
+
+    def extend(self, values):
+        """
+        Appends values while the column is loaded.
+
+        :param values: A sequence of strings or None.
+        """
+        encoded = [b"" if value is None else value.encode()
+                   for value in values]
+        self._buffer += b"".join(encoded)
+        self._lengths.extend(map(len, encoded))
+        if None in values:
+            self._nulls.extend(value is None for value in values)
+        else:
+            self._nulls.frombytes(bytes(len(values)))
+        if self._hashes is not None:
+            self._hashes.extend(map(hash, values))
+
+    def freeze(self):
+        """
+        Moves the loaded values into the buffer and offset array.
+
+        :return: The hashes of the values as a numpy array,
+        or None when they were not collected.
+        """
+        self.data = bytes(self._buffer)
+        self.offsets = np.zeros(len(self._lengths) + 1, dtype=np.int64)
+        np.cumsum(np.frombuffer(self._lengths, dtype=np.int64),
+                  out=self.offsets[1:])
+        self._offsets = memoryview(self.offsets)
+        nulls = np.frombuffer(self._nulls, dtype=np.int8).astype(bool)
+        self.nulls = nulls if nulls.any() else None
+        hashes = None
+        if self._hashes is not None:
+            hashes = np.frombuffer(self._hashes, dtype=np.int64).copy()
+        self._buffer = self._lengths = self._nulls = self._hashes = None
+        return hashes
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row):
+        if self.nulls is not None and self.nulls[row]:
+            return None
+        return self.data[self._offsets[row]:self._offsets[row + 1]].decode()
+
+    def take(self, rows):
+        """
+        Reads the values of many rows at once.
+
+        :param rows: A numpy array of rows.
+        :return: A list of strings or None.
+        """
+        data = self.data
+        values = [data[start:end].decode() for start, end in zip(
+            self.offsets[rows].tolist(), self.offsets[rows + 1].tolist())]
+        if self.nulls is not None:
+            values = [None if null else value for value, null
+                      in zip(values, self.nulls[rows].tolist())]
+        return values
+
+    @property
+    def nbytes(self):
+        nbytes = len(self.data) + self.offsets.nbytes
+        if self.nulls is not None:
+            nbytes += self.nulls.nbytes
+        return nbytes
+
+
+class InternedColumn:
+    """
+    A column of few distinct strings, e.g. names and roles, kept as
+    codes into a list holding every distinct value once.
+    """
+
+    def __init__(self):
+        self.values = []
+        self._codes_of = {}
+        self._codes = array("q")
+        self.codes = np.zeros(0, dtype=np.uint8)
+        self._objects = np.zeros(0, dtype=object)
+
+    @classmethod
+    def from_codes(cls, values, codes):
+        """
+        Creates a loaded InternedColumn.
+
+        :param values: A list of distinct values.
+        :param codes: A numpy array of positions in values.
+        :return: The InternedColumn.
+        """
+        column = cls()
+        column._codes_of = dict.fromkeys(values)
+        column._codes = codes
+        column.freeze()
+        return column
+
+    def extend(self, values):
+        """
+        Appends values while the column is loaded.
+
+        :param values: A sequence of strings or None.
+        """
+        codes_of = self._codes_of
+        setdefault = codes_of.setdefault
+        self._codes.extend([setdefault(value, len(codes_of))
+                            for value in values])
+
+    def freeze(self):
+        """
+        Moves the loaded codes into the smallest unsigned numpy array.
+        """
+        if self._codes_of is not None:
+            self.values = list(self._codes_of)
+        self.codes = np.asarray(
+            self._codes, dtype=np.min_scalar_type(max(len(self.values), 1)))
+        self._objects = np.empty(len(self.values), dtype=object)
+        self._objects[:] = self.values
+        self._codes_of = self._codes = None
+
+    def ranks(self):
+        """
+        Ranks the distinct values in the order of SQLite.
+
+        :return: A numpy array with the rank of every code.
+        """
+        order = sorted(range(len(self.values)),
+                       key=lambda code: sort_key(self.values[code]))
+        ranks = np.empty(len(self.values), dtype=np.int64)
+        ranks[order] = np.arange(len(self.values))
+        return ranks
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, row):
+        return self.values[self.codes[row]]
+
+    def take(self, rows):
+        """
+        Reads the values of many rows at once.
+
+        :param rows: A numpy array of rows or a slice.
+        :return: A list of values.
+        """
+        return self._objects[self.codes[rows]].tolist()
+
+    @property
+    def nbytes(self):
+        return (self.codes.nbytes + self._objects.nbytes
+                + sum(sys.getsizeof(value) for value in self.values))
+
+
+class HashIndex:
+    """
+    A hash index of a StringColumn: the hashes of all values sorted in
+    a numpy array with the row of every hash, searched by bisection.
+    Rows of colliding hashes are compared with the looked up value.
+    """
+
+    def __init__(self, column, hashes):
+        """
+        Initializes the HashIndex.
+
+        :param column: The indexed StringColumn.
+        :param hashes: Hashes of the values of the column.
+        """
+        self.column = column
+        order = np.argsort(hashes, kind="stable")
+        self.hashes = hashes[order]
+        self.rows = order.astype(np.min_scalar_type(max(len(order), 1)))
+        # Single values are read faster from memoryviews than from numpy.
+        self._hashes = memoryview(self.hashes)
+        self._rows = memoryview(self.rows)
+
+    def find(self, value):
+        """
+        Finds the rows holding a value.
+
+        :param value: The looked up string.
+        :return: A list of rows.
+        """
+        key = hash(value)
+        hashes = self._hashes
+        position = bisect_left(hashes, key)
+        rows = []
+        while position < len(hashes) and hashes[position] == key:
+            row = self._rows[position]
+            if self.column[row] == value:
+                rows.append(row)
+            position += 1
+        return rows
+
+    @property
+    def nbytes(self):
+        return self.hashes.nbytes + self.rows.nbytes
+
+
+class MemoryStore:
+    """
+    A class keeping Users and Children of the database in memory
+    in compact columns.
+
+    Users are stored in id_user order, numbers in numpy arrays, emails,
+    telephone numbers, passwords and creation dates in StringColumns
+    and first names and roles interned. Children are stored per parent
+    in CSR layout: the children of the user in row r are the entries
+    child_offsets[r] to child_offsets[r + 1], ordered by name and rowid,
+    with their output 'name, age' interned. The similar children index
+    is kept in the same layout per age.
+    """
+
+    def __init__(self):
+        self.generation = None
+        self.id_user = np.zeros(0, dtype=np.int64)
+        self.firstname = InternedColumn()
+        self.telephone_number = StringColumn(hashed=True)
+        self.email = StringColumn(hashed=True)
+        self.password = StringColumn()
+        self.role = InternedColumn()
+        self.created_at = StringColumn()
+        self.email_index = None
+        self.telephone_index = None
+        self.oldest = None
+        self.child_offsets = np.zeros(1, dtype=np.int64)
+        self.child_index = np.zeros(0, dtype=np.int64)
+        self.child_label = InternedColumn()
+        self.label_rank = np.zeros(0, dtype=np.int64)
+        self.child_age = np.zeros(0, dtype=np.int64)
+        self.age_values = np.zeros(0, dtype=np.int64)
+        self.age_offsets = np.zeros(1, dtype=np.int64)
+        self.age_parents = np.zeros(0, dtype=np.int64)
+        self.age_counts = []
+
+    @classmethod
+    def from_connection(cls, conn, chunksize=100_000):
+        """
+        Loads Users and Children in one read transaction.
+
+        :param conn: A sqlite3 connection of the database.
+        :param chunksize: Number of rows fetched at once.
+        :return: A MemoryStore of the database.
+        """
+        store = cls()
+        conn.execute("BEGIN")
+        try:
+            store.generation = conn.execute(GENERATION_QUERY).fetchone()[0]
+            store.load_users(conn.execute(USERS_SQL), chunksize)
+            store.load_children(conn.execute(CHILDREN_SQL), chunksize)
+        finally:
+            conn.rollback()
+        return store
+
+    def load_users(self, cursor, chunksize):
+        id_user = array("q")
+        oldest = None
+        for rows in iter(lambda: cursor.fetchmany(chunksize), []):
+            columns = list(zip(*rows))
+            # The oldest user by created_at and id_user, as USERS_SUMMARY;
+            # rows come in id_user order, so the first one wins a tie.
+            created_at = columns[6]
+            if None in created_at:
+                first = min(created_at, key=sort_key)
+            else:
+                first = min(created_at)
+            if oldest is None or sort_key(first) < sort_key(oldest[0]):
+                oldest = (first, len(id_user) + created_at.index(first))
+            id_user.extend(columns[0])
+            for column, values in zip(
+                    [self.firstname, self.telephone_number, self.email,
+                     self.password, self.role, self.created_at],
+                    columns[1:]):
+                column.extend(values)
+        self.id_user = np.frombuffer(id_user, dtype=np.int64).copy()
+        self.firstname.freeze()
+        self.role.freeze()
+        self.password.freeze()
+        self.created_at.freeze()
+        self.email_index = HashIndex(self.email, self.email.freeze())
+        self.telephone_index = HashIndex(self.telephone_number,
+                                         self.telephone_number.freeze())
+        self.oldest = None if oldest is None else oldest[1]
+
+    def load_children(self, cursor, chunksize):
+        index = array("q")
+        age = array("q")
+        index_parent = array("q")
+        names = InternedColumn()
+        for rows in iter(lambda: cursor.fetchmany(chunksize), []):
+            columns = list(zip(*rows))
+            index.extend(columns[0])
+            names.extend(columns[1])
+            age.extend(columns[2])
+            index_parent.extend(columns[3])
+        names.freeze()
+        index = np.frombuffer(index, dtype=np.int64)
+        age = np.frombuffer(age, dtype=np.int64)
+        index_parent = np.frombuffer(index_parent, dtype=np.int64)
+
+        # Children of missing users are dropped, as by the joins in SQL.
+        parent = np.searchsorted(self.id_user, index_parent)
+        found = parent < len(self.id_user)
+        found[found] = self.id_user[parent[found]] == index_parent[found]
+        name_ranks = names.ranks()
+        name_rank = name_ranks[names.codes]
+        order = np.lexsort((index, name_rank, parent))
+        order = order[found[order]]
+        parent = parent[order]
+        self.child_offsets = np.zeros(len(self.id_user) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(parent, minlength=len(self.id_user)),
+                  out=self.child_offsets[1:])
+        self.child_index = index[order]
+        self.child_age = age[order].astype(np.result_type(
+            np.min_scalar_type(age.min(initial=0)),
+            np.min_scalar_type(age.max(initial=0))))
+        name_rank = name_rank[order]
+        age_min = int(age.min(initial=0))
+        age_range = int(age.max(initial=0)) - age_min + 1
+        pairs, labels = np.unique(
+            names.codes[order].astype(np.int64) * age_range
+            + (self.child_age - age_min), return_inverse=True)
+        codes, ages = np.divmod(pairs, age_range)
+        self.child_label = InternedColumn.from_codes(
+            [f"{names.values[code]}, {age + age_min}"
+             for code, age in zip(codes.tolist(), ages.tolist())],
+            labels)
+        self.label_rank = name_ranks[codes]
+
+        # Parents of every age ranked by their first child of that age
+        # in name and rowid order, as Age_parents of create_database.
+        by_age = np.lexsort((self.child_index, name_rank, self.child_age))
+        ages = self.child_age[by_age]
+        parents = parent[by_age]
+        grouped = np.lexsort((np.arange(len(by_age)), parents, ages))
+        first = np.ones(len(grouped), dtype=bool)
+        first[1:] = ((ages[grouped][1:] != ages[grouped][:-1])
+                     | (parents[grouped][1:] != parents[grouped][:-1]))
+        ranked = np.sort(grouped[first])
+        self.age_parents = parents[ranked].astype(
+            np.min_scalar_type(max(len(self.id_user), 1)))
+        self.age_values, starts = np.unique(ages[ranked], return_index=True)
+        self.age_offsets = np.append(starts, len(ranked)).astype(np.int64)
+        values, counts = np.unique(self.child_age, return_counts=True)
+        self.age_counts = sorted(zip(values.tolist(), counts.tolist()),
+                                 key=lambda pair: (pair[1], pair[0]))
+
+    @property
+    def nbytes(self):
+        """Bytes held by the columns and indexes of the store."""
+        return sum(
+            column.nbytes for column in [
+                self.id_user, self.firstname, self.telephone_number,
+                self.email, self.password, self.role, self.created_at,
+                self.email_index, self.telephone_index, self.child_offsets,
+                self.child_index, self.child_label, self.label_rank,
+                self.child_age, self.age_values, self.age_offsets,
+                self.age_parents])
+
+    def user_count(self):
+        return len(self.id_user)
+
+    def find_users(self, login):
+        """
+        Finds the users with the login as email or telephone number.
+
+        :param login: An email or telephone number.
+        :return: A sorted list of user rows.
+        """
+        return sorted(set(self.email_index.find(login))
+                      | set(self.telephone_index.find(login)))
+
+    def children(self, rows):
+        """
+        Lists the children of users in name and rowid order.
+
+        :param rows: Rows of the users.
+        :return: A list of 'name, age' strings.
+        """
+        return self.child_label.take(self.child_positions(rows))
+
+    def child_positions(self, rows):
+        """
+        Finds the children of users in name and rowid order.
+
+        :param rows: Rows of the users.
+        :return: A numpy array of positions in the children columns.
+        """
+        children = np.concatenate(
+            [np.arange(self.child_offsets[row], self.child_offsets[row + 1])
+             for row in rows] or [np.zeros(0, dtype=np.int64)])
+        if len(rows) > 1:
+            children = children[np.lexsort((
+                self.child_index[children],
+                self.label_rank[self.child_label.codes[children]]))]
+        return children
+
+    def parent_columns(self, rows):
+        """
+        Lists users with their children as find-similar-children-by-age.
+
+        :param rows: A numpy array of user rows.
+        :return: Lists of first names, telephone numbers and children of
+        the users.
+        """
+        starts = self.child_offsets[rows]
+        counts = self.child_offsets[rows + 1] - starts
+        ends = np.cumsum(counts)
+        children = (np.repeat(starts - ends + counts, counts)
+                    + np.arange(ends[-1] if len(ends) else 0))
+        labels = self.child_label.take(children)
+        return (self.firstname.take(rows), self.telephone_number.take(rows),
+                ["; ".join(labels[end - count:end]) for end, count in zip(
+                    ends.tolist(), counts.tolist())])
+
+    def render_parents(self, rows, separator):
+        """
+        Formats users with their children as find-similar-children-by-age.
+
+        :param rows: A numpy array of user rows.
+        :param separator: Separator of first name and telephone number.
+        :return: A list of strings.
+        """
+        return [f"{firstname}{separator}{telephone_number}: {children}"
+                for firstname, telephone_number, children in zip(
+                    *self.parent_columns(rows))]
+
+    def caller_children(self, rows):
+        """
+        Lists the children of users in rowid order.
+
+        :param rows: Rows of the users.
+        :return: A list of (rowid, age, user row) tuples.
+        """
+        return sorted(
+            (int(self.child_index[child]), int(self.child_age[child]), row)
+            for row in rows
+            for child in range(self.child_offsets[row],
+                               self.child_offsets[row + 1]))
+
+    def age_parents_of(self, age):
+        """
+        Returns the ranked parents of children of an age.
+
+        :param age: Age of the children.
+        :return: A numpy array of user rows.
+        """
+        position = np.searchsorted(self.age_values, age)
+        if (position == len(self.age_values)
+                or self.age_values[position] != age):
+            return self.age_parents[:0]
+        return self.age_parents[self.age_offsets[position]:
+                                self.age_offsets[position + 1]]
+
+
+class MemoryUserManager(UserManager):
+    """
+    A class validating credentials from a MemoryStore of the database.
+
+    The store is loaded on first use and loaded again when
+    create_database changed the generation of the database.
+    SQL queries are still run on the database.
+    """
+
+    def __init__(self, db_manager, verifier=None):
+        super().__init__(db_manager, verifier)
+        self.store = None
+        self.file_signature = None
+
+    def database_signature(self):
+        """
+        Identifies the current contents of the database and WAL files.
+
+        :return: Inode, size and mtime of each file, or None if the
+        database file cannot be read.
+        """
+        signature = []
+        for suffix in ("", "-wal"):
+            try:
+                stat = os.stat(self.db_manager.database_name + suffix)
+            except OSError:
+                if not suffix:
+                    return None
+                stat = None
+            signature.append(None if stat is None else
+                             (stat.st_ino, stat.st_size, stat.st_mtime_ns))
+        return tuple(signature)
+
+    def refresh(self):
+        """
+        Loads the store when it is missing or older than the database.
+        The generation is only read when the database file changed.
+
+        :return: The current MemoryStore.
+        """
+        file_signature = self.database_signature()
+        if (self.store is not None and file_signature is not None
+                and file_signature == self.file_signature):
+            return self.store
+        generation = self.execute_query(GENERATION_QUERY)[0]["generation"]
+        self.file_signature = file_signature
+        if self.store is None or self.store.generation != generation:
+            self.logger.info("Loading users into memory.")
+            self.store = MemoryStore.from_connection(
+                self.db_manager.pool.connection())
+        return self.store
+
+    def validate_credentials(self, args, admin):
+        self.refresh()
+        return self.check_credentials(args, admin)
+
+    def check_credentials(self, args, admin):
+        """
+        Validates user credentials in the loaded store.
+
+        :param args: email or telephone number user and password
+        :param admin: Boolean if account need to be admin
+        :return: Boolean if the credentials are valid.
+        """
+        store = self.store
+        return any(
+            self.verifier.verify(args["login"], args["password"],
+                                 store.password[row])
+            for row in store.find_users(args["login"])
+            if not admin or store.role[row] == "admin")
+
+
+class MemoryAccountActions(AccountActions):
+    """
+    A class answering the commands from the MemoryStore
+    of a MemoryUserManager.
+
+    Only check_summary_tables still reads the database.
+    """
+
+    def all_accounts_report(self):
+        return self.user_manager.store.user_count()
+
+    def oldest_account_report(self):
+        store = self.user_manager.store
+        if store.oldest is None:
+            self.user_manager.no_result()
+        console_output = "\n".join([
+            f"name: {store.firstname[store.oldest]}",
+            f"email_adress: {store.email[store.oldest]}",
+            f"created_at: {store.created_at[store.oldest]}"])
+        return console_output
+
+    def age_groups_rows(self):
+        store = self.user_manager.store
+        if not store.age_counts:
+            self.user_manager.no_result()
+        return ({"age": age, "count": count}
+                for age, count in store.age_counts)
+
+    def children_report(self, args):
+        store = self.user_manager.store
+        console_output = store.children(store.find_users(args["login"]))
+        if not console_output:
+            self.user_manager.no_result()
+        return "\n".join(console_output)
+
+    def children_rows(self, args):
+        store = self.user_manager.store
+        children = store.child_positions(store.find_users(args["login"]))
+        if not len(children):
+            self.user_manager.no_result()
+        # Labels are 'name, age', and ages hold no comma.
+        return ({"name": label.rsplit(", ", 1)[0], "age": age}
+                for label, age in zip(store.child_label.take(children),
+                                      store.child_age[children].tolist()))
+
+    def similar_parents(self, args):
+        """
+        Finds the parents of children of the ages of the caller's children.
+
+        :param args: Command arguments with the caller's login.
+        :return: A numpy array of the parents' rows, the separator of the
+        text format and the telephone number of the caller.
+        """
+        store = self.user_manager.store
+        caller_children = store.caller_children(
+            store.find_users(args["login"]))
+        if not caller_children:
+            self.user_manager.no_result()
+        telephone_result = store.telephone_number[caller_children[0][2]]
+        if len(caller_children) > 1:
+            separator = LEGACY_MULTI_CHILD_SEPARATOR
+        else:
+            separator = ", "
+        ages = list(dict.fromkeys(age for _, age, _ in caller_children))
+        parents = np.concatenate([store.age_parents_of(age) for age in ages])
+        _, first = np.unique(parents, return_index=True)
+        return parents[np.sort(first)], separator, telephone_result
+
+    def similar_children_report(self, args):
+        parents, separator, telephone_result = self.similar_parents(args)
+        console_output = self.user_manager.store.render_parents(parents,
+                                                                separator)
+        console_output = [value for value in console_output
+                          if telephone_result not in value]
+        return "\n".join(console_output)
+
+    def similar_children_rows(self, args):
+        parents, separator, telephone_result = self.similar_parents(args)
+        return self.similar_rows(
+            zip(*self.user_manager.store.parent_columns(parents)), separator,
+            telephone_result)
+
+
+class MemoryBatchAccountActions(BatchAccountActions):
+    """
+    A class answering batches of commands from the MemoryStore
+    of a MemoryUserManager, one caller at a time.
+    """
+
+    def valid_positions(self, requests):
+        user_manager = self.account_actions.user_manager
+        user_manager.refresh()
+        checks = [(user_manager.check_credentials, request,
+                   request["command"] in ADMIN_COMMANDS)
+                  for request in requests]
+        return {position
+                for position, valid in enumerate(self.verify_all(checks))
+                if valid}
+
+    def print_children(self, requests, positions):
+        return self.report_callers(self.account_actions.children_report,
+                                   requests, positions)
+
+    def find_similar_children_by_age(self, requests, positions):
+        return self.report_callers(
+            self.account_actions.similar_children_report, requests,
+            positions)
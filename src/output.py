@@ -0,0 +1,60 @@
+import csv
+import itertools
+import json
+import operator
+
+OUTPUT_FORMATS = ("text", "jsonl", "csv")
+# Columns of the rows of every streamed command, as written by the jsonl
+# and csv formats.
+COLUMNS = {
+    "group_by_age": ["age", "count"],
+    "print_children": ["name", "age"],
+    "find_similar_children_by_age": ["firstname", "telephone_number",
+                                     "children"],
+}
+TEXT_LINES = {
+    "group_by_age": lambda row: f"age: {row['age']}, count: {row['count']}",
+    "print_children": lambda row: f"{row['name']}, {row['age']}",
+    "find_similar_children_by_age": lambda row: (
+        f"{row['firstname']}{row['separator']}"
+        f"{row['telephone_number']}: {row['children']}"),
+}
+
+
+def text_lines(command, rows):
+    """
+    Formats rows of a command as the lines printed by script.py.
+
+    :param command: Name of the streamed AccountActions command.
+    :param rows: An iterable of rows indexed by column name.
+    :return: An iterator of strings.
+    """
+    return map(TEXT_LINES[command], rows)
+
+
+def write_rows(command, rows, output_format, stream):
+    """
+    Writes rows of a command to a stream as they are produced.
+
+    :param command: Name of the streamed AccountActions command.
+    :param rows: An iterable of rows indexed by column name.
+    :param output_format: 'text', 'jsonl' or 'csv'.
+    :param stream: A text file object, e.g. sys.stdout.
+    """
+    columns = COLUMNS[command]
+    if output_format == "jsonl":
+        stream.writelines(
+            json.dumps({column: row[column] for column in columns}) + "\n"
+            for row in rows)
+    elif output_format == "csv":
+        # The header follows the first row, so commands ending without
+        # a result write nothing.
+        rows = iter(rows)
+        first = next(rows, None)
+        if first is not None:
+            writer = csv.writer(stream, lineterminator="\n")
+            writer.writerow(columns)
+            writer.writerows(map(operator.itemgetter(*columns),
+                                 itertools.chain([first], rows)))
+    else:
+        stream.writelines(line + "\n" for line in text_lines(command, rows))
@@ -0,0 +1,190 @@
+import functools
+import itertools
+import json
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from src.account_actions import AccountActions, LEGACY_MULTI_CHILD_SEPARATOR
+from src.connection_pool import ConnectionPool
+from src.output import text_lines
+
+PARALLEL_CHUNKSIZE = 20_000
+# The ids of all parents are read as one JSON array, which is cheaper
+# than a row per id; parents of several of the caller's ages are repeated.
+SIMILAR_PARENTS_SQL = """WITH caller_children AS (
+                             SELECT CHILDREN.rowid AS position,
+                             CHILDREN.age, USERS.telephone_number
+                             FROM USERS JOIN CHILDREN ON
+                             CHILDREN.index_parent = USERS.id_user
+                             WHERE USERS.email=:login
+                             OR USERS.telephone_number=:login
+                         ),
+                         caller_ages AS (
+                             SELECT age, MIN(position) AS position
+                             FROM caller_children GROUP BY age
+                         )
+                         SELECT (SELECT COUNT(*) FROM caller_children)
+                         AS caller_children,
+                         (SELECT telephone_number FROM caller_children)
+                         AS caller_telephone,
+                         (SELECT json_group_array(index_parent) FROM (
+                             SELECT AGE_PARENTS.index_parent
+                             FROM caller_ages CROSS JOIN AGE_PARENTS ON
+                             AGE_PARENTS.age = caller_ages.age
+                             ORDER BY caller_ages.position, AGE_PARENTS.rank
+                         )) AS parents"""
+PARENT_CHILDREN_SQL = """SELECT PARENT_CHILDREN.firstname,
+                         PARENT_CHILDREN.telephone_number,
+                         PARENT_CHILDREN.children
+                         FROM json_each(:parents) JOIN PARENT_CHILDREN ON
+                         PARENT_CHILDREN.index_parent = json_each.value
+                         ORDER BY json_each.key"""
+
+# Read-only connection of a worker process, opened by open_worker.
+_worker_pool = None
+
+
+def open_worker(database_name):
+    """
+    Opens the read-only connection of a worker process.
+
+    :param database_name: The name of the SQLite database file.
+    """
+    global _worker_pool
+    _worker_pool = ConnectionPool(database_name)
+
+
+def read_parents(parents, pool=None):
+    """
+    Reads the first name, telephone number and rendered children
+    of parents.
+
+    :param parents: A list of user ids.
+    :param pool: ConnectionPool of the database (default is the pool of
+    the worker process).
+    :return: A list of firstname, telephone_number and children tuples
+    in the order of the ids.
+    """
+    return (pool or _worker_pool).connection().execute(
+        PARENT_CHILDREN_SQL, {"parents": json.dumps(parents)}).fetchall()
+
+
+def render_parents(parents, separator, telephone_result, pool=None):
+    """
+    Formats parents as the lines of find-similar-children-by-age.
+
+    :param parents: A list of user ids.
+    :param separator: Separator of first name and telephone number.
+    :param telephone_result: Telephone number of the caller, whose lines
+    are left out.
+    :param pool: ConnectionPool of the database (default is the pool of
+    the worker process).
+    :return: A string of lines in the order of the ids.
+    """
+    return "\n".join(text_lines(
+        "find_similar_children_by_age",
+        AccountActions.similar_rows(read_parents(parents, pool), separator,
+                                    telephone_result)))
+
+
+class ParallelAccountActions(AccountActions):
+    """
+    AccountActions reading the parents of find_similar_children_by_age
+    in a pool of processes.
+
+    The ids of the matching parents are read and deduplicated by the
+    calling process in the order of the report, split into chunks of
+    consecutive ids and read and formatted by worker processes, every
+    one with its own read-only connection. Chunks are merged in the order
+    of the ids, so the report is the same as the one of AccountActions.
+    Fan-outs of a single chunk are answered by the calling process.
+    """
+
+    def __init__(self, user_manager, workers, chunksize=PARALLEL_CHUNKSIZE):
+        """
+        Initializes ParallelAccountActions with a pool of workers,
+        started on the first fan-out of more than one chunk.
+
+        :param user_manager: UserManager of a single file database.
+        :param workers: Number of worker processes.
+        :param chunksize: Number of parents read by a worker at once
+        (default is PARALLEL_CHUNKSIZE).
+        """
+        super().__init__(user_manager)
+        self.workers = workers
+        self.chunksize = chunksize
+        self.executor = None
+        self._lock = threading.Lock()
+
+    def pool(self):
+        """
+        Returns the pool of worker processes, starting it on first use.
+
+        :return: A ProcessPoolExecutor.
+        """
+        with self._lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=open_worker,
+                    initargs=(self.user_manager.db_manager.database_name,))
+            return self.executor
+
+    def map_chunks(self, function, chunks, *args):
+        """
+        Calls a function on every chunk of parents, in the worker
+        processes when there is more than one chunk.
+
+        :param function: read_parents or render_parents.
+        :param chunks: A list of lists of user ids.
+        :param args: Arguments of the function after the chunk.
+        :return: An iterator of the results in the order of the chunks.
+        """
+        args = [itertools.repeat(arg, len(chunks)) for arg in args]
+        if len(chunks) > 1:
+            return self.pool().map(function, chunks, *args)
+        return map(functools.partial(
+            function, pool=self.user_manager.db_manager.pool), chunks, *args)
+
+    def parent_chunks(self, args):
+        """
+        Reads the ids of users with children of the same age as a child
+        of the login, in the order of the report.
+
+        :param args: Arguments with the login of the user.
+        :return: A list of lists of at most chunksize user ids,
+        the separator of the text format and the telephone number of the
+        caller.
+        """
+        result = self.user_manager.execute_query(
+            SIMILAR_PARENTS_SQL, {"login": args["login"]})[0]
+        if not result['caller_children']:
+            self.user_manager.no_result()
+        if result['caller_children'] > 1:
+            separator = LEGACY_MULTI_CHILD_SEPARATOR
+        else:
+            separator = ", "
+        parents = list(dict.fromkeys(json.loads(result['parents'])))
+        chunks = [parents[start:start + self.chunksize]
+                  for start in range(0, len(parents), self.chunksize)]
+        return chunks, separator, result['caller_telephone']
+
+    def similar_children_report(self, args):
+        # Chunks whose lines all name the caller's number are empty.
+        return "\n".join(filter(None, self.map_chunks(
+            render_parents, *self.parent_chunks(args))))
+
+    def similar_children_rows(self, args):
+        chunks, separator, telephone_result = self.parent_chunks(args)
+        return self.similar_rows(
+            itertools.chain.from_iterable(self.map_chunks(read_parents,
+                                                          chunks)),
+            separator, telephone_result)
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        with self._lock:
+            if self.executor is not None:
+                self.executor.shutdown(wait=True)
+                self.executor = None
@@ -0,0 +1,98 @@
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+
+from src.result_cache import ResultCache
+
+HASH_ALGORITHM = "pbkdf2_sha256"
+HASH_ITERATIONS = 100_000
+
+
+def hash_password(password, iterations=None, salt=None):
+    """
+    Hashes a password with PBKDF2-HMAC-SHA256 and a random salt.
+
+    :param password: The plaintext password.
+    :param iterations: Number of PBKDF2 iterations
+    (default is HASH_ITERATIONS).
+    :param salt: Salt bytes (default is 16 random bytes).
+    :return: A string 'pbkdf2_sha256$iterations$salt$hash'
+    with base64 encoded salt and hash.
+    """
+    iterations = iterations or HASH_ITERATIONS
+    salt = salt or os.urandom(16)
+    digest = hashlib.pbkdf2_hmac("sha256", password.encode(), salt,
+                                 iterations)
+    return "$".join([HASH_ALGORITHM, str(iterations),
+                     base64.b64encode(salt).decode(),
+                     base64.b64encode(digest).decode()])
+
+
+def verify_password(password, encoded):
+    """
+    Checks a password against a stored hash.
+
+    Stored values which are not hashes are plaintext passwords of
+    databases created before passwords were hashed and are compared
+    as they are.
+
+    :param password: The plaintext password.
+    :param encoded: The stored value of hash_password.
+    :return: Boolean if the password matches.
+    """
+    if not isinstance(password, str) or encoded is None:
+        return False
+    encoded = str(encoded)
+    if not encoded.startswith(HASH_ALGORITHM + "$"):
+        return hmac.compare_digest(password.encode(), encoded.encode())
+    _, iterations, salt, digest = encoded.split("$")
+    computed = hashlib.pbkdf2_hmac("sha256", password.encode(),
+                                   base64.b64decode(salt), int(iterations))
+    return hmac.compare_digest(computed, base64.b64decode(digest))
+
+
+class PasswordVerifier:
+    """
+    A class verifying passwords, remembering recent successes.
+
+    A verification costs a full PBKDF2 run, so verified passwords are
+    kept in a ResultCache for long-running processes: keyed by the login
+    and an HMAC of the password with a random key of the process, and
+    stored for the hash they were verified against, so a changed
+    password is verified again. Failed verifications are not cached.
+    """
+
+    def __init__(self, cache=None):
+        """
+        Initializes the PasswordVerifier.
+
+        :param cache: A ResultCache of verified credentials
+        (default keeps 1024 credentials for 300 seconds).
+        """
+        self.cache = cache if cache is not None else ResultCache()
+        self._key = secrets.token_bytes(32)
+
+    def credential_key(self, login, password):
+        digest = hmac.new(self._key, password.encode(), hashlib.sha256)
+        return f"{login}:{digest.hexdigest()}"
+
+    def verify(self, login, password, encoded):
+        """
+        Checks a password of a login against a stored hash.
+
+        :param login: The email or telephone number of the user.
+        :param password: The plaintext password.
+        :param encoded: The stored value of hash_password.
+        :return: Boolean if the password matches.
+        """
+        if not isinstance(password, str) or encoded is None:
+            return False
+        key = self.credential_key(login, password)
+        if self.cache.get(key, encoded):
+            return True
+        if not verify_password(password, encoded):
+            return False
+        self.cache.put(key, encoded, True)
+        return True
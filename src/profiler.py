@@ -0,0 +1,157 @@
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+def normalize_sql(sql_query):
+    return " ".join(sql_query.split())
+
+
+def prometheus_label(value):
+    return (value.replace("\\", "\\\\").replace("\"", "\\\"")
+            .replace("\n", "\\n"))
+
+
+class Profiler:
+    """
+    A class recording timings of script.py commands and SQL statements.
+
+    Every statement records its total time, the time spent getting
+    a connection (opening it on first use), executing it and building
+    the QueryResult, and the number of rows. Statements slower than
+    slow_query_seconds also record their EXPLAIN QUERY PLAN, and the
+    tables they scan without an index.
+    """
+
+    def __init__(self, slow_query_seconds=0.01):
+        """
+        Initializes an empty Profiler.
+
+        :param slow_query_seconds: Time after which the query plan
+        of a statement is recorded (default is 0.01).
+        """
+        self.slow_query_seconds = slow_query_seconds
+        self.commands = []
+        self.statements = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def command(self, name):
+        """
+        Records the wall time of a command run inside the with block.
+
+        :param name: Name of the command.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.commands.append({
+                    "command": name,
+                    "seconds": time.perf_counter() - start})
+
+    def statement(self, sql_query, timings, rows, plan=None, error=None):
+        """
+        Records a single SQL statement.
+
+        :param sql_query: The executed SQL query.
+        :param timings: A dictionary of connection, execute, fetch
+        and total seconds.
+        :param rows: Number of returned rows.
+        :param plan: Lines of EXPLAIN QUERY PLAN of a slow statement.
+        :param error: The message of an exception raised by the statement.
+        """
+        record = {"sql": normalize_sql(sql_query), "rows": rows, **timings}
+        if plan is not None:
+            record["plan"] = plan
+            record["full_scans"] = [match.group(1) for match in
+                                    map(FULL_SCAN.match, plan) if match]
+        if error is not None:
+            record["error"] = error
+        with self._lock:
+            self.statements.append(record)
+
+    def is_slow(self, seconds):
+        return seconds >= self.slow_query_seconds
+
+    def to_json(self):
+        """
+        Dumps all recorded commands and statements.
+
+        :return: A JSON string.
+        """
+        with self._lock:
+            return json.dumps({"commands": self.commands,
+                               "statements": self.statements}, indent=2)
+
+    def to_prometheus(self):
+        """
+        Dumps recorded commands and statements in the Prometheus
+        text format, summed per command and per SQL statement.
+
+        :return: A string of metrics.
+        """
+        with self._lock:
+            commands = {}
+            for record in self.commands:
+                total = commands.setdefault(record["command"], [0, 0.0])
+                total[0] += 1
+                total[1] += record["seconds"]
+            statements = {}
+            for record in self.statements:
+                total = statements.setdefault(record["sql"], {
+                    "count": 0, "seconds": 0.0, "connection_seconds": 0.0,
+                    "fetch_seconds": 0.0, "rows": 0, "slow": 0,
+                    "full_scans": 0, "errors": 0})
+                total["count"] += 1
+                total["seconds"] += record["seconds"]
+                total["connection_seconds"] += record["connection_seconds"]
+                total["fetch_seconds"] += record["fetch_seconds"]
+                total["rows"] += record["rows"]
+                total["slow"] += "plan" in record
+                total["full_scans"] += bool(record.get("full_scans"))
+                total["errors"] += "error" in record
+
+        lines = ["# TYPE users_command_seconds summary"]
+        for name, (count, seconds) in commands.items():
+            label = f'command="{prometheus_label(name)}"'
+            lines.append(f"users_command_seconds_count{{{label}}} {count}")
+            lines.append(f"users_command_seconds_sum{{{label}}} {seconds}")
+        metrics = [
+            ("users_sql_seconds", "summary", None),
+            ("users_sql_connection_seconds_total", "counter",
+             "connection_seconds"),
+            ("users_sql_fetch_seconds_total", "counter", "fetch_seconds"),
+            ("users_sql_rows_total", "counter", "rows"),
+            ("users_sql_slow_total", "counter", "slow"),
+            ("users_sql_full_scans_total", "counter", "full_scans"),
+            ("users_sql_errors_total", "counter", "errors"),
+        ]
+        for metric, metric_type, key in metrics:
+            lines.append(f"# TYPE {metric} {metric_type}")
+            for sql, total in statements.items():
+                label = f'statement="{prometheus_label(sql)}"'
+                if key is None:
+                    lines.append(
+                        f"{metric}_count{{{label}}} {total['count']}")
+                    lines.append(
+                        f"{metric}_sum{{{label}}} {total['seconds']}")
+                else:
+                    lines.append(f"{metric}{{{label}}} {total[key]}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, output_format):
+        """
+        Dumps the records in the given format.
+
+        :param output_format: 'json' or 'prometheus'.
+        :return: A string with the records.
+        """
+        if output_format == "prometheus":
+            return self.to_prometheus()
+        return self.to_json()
@@ -0,0 +1,51 @@
+class QueryResult:
+    """
+    A class holding the rows of a SQL query as plain sqlite3 rows.
+
+    Rows are indexed by position and their values by column name,
+    which is all the account actions need to format their output.
+    """
+
+    def __init__(self, columns, rows):
+        """
+        Initializes the QueryResult with the rows of a cursor.
+
+        :param columns: Names of the result columns.
+        :param rows: A list of sqlite3.Row objects.
+        """
+        self.columns = columns
+        self.rows = rows
+
+    @classmethod
+    def from_cursor(cls, cursor):
+        """
+        Fetches all rows of an executed cursor.
+
+        :param cursor: A sqlite3 cursor with sqlite3.Row as row factory.
+        :return: A QueryResult with the rows of the cursor.
+        """
+        rows = cursor.fetchall()
+        columns = [column[0] for column in cursor.description or []]
+        return cls(columns, rows)
+
+    @property
+    def empty(self):
+        """Boolean if the query returned no rows."""
+        return not self.rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+    def __getitem__(self, position):
+        return self.rows[position]
+
+    def to_dicts(self):
+        """
+        Returns the rows as dictionaries of column names and values.
+
+        :return: A list of dictionaries.
+        """
+        return [dict(zip(self.columns, row)) for row in self.rows]
@@ -0,0 +1,380 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from src.output import text_lines, write_rows
+
+GENERATION_QUERY = "SELECT generation FROM DATABASE_GENERATION"
+# Results of commands answering about the caller's own account are kept
+# per login; results of admin reports are the same for every admin.
+LOGIN_COMMANDS = ("print_children", "find_similar_children_by_age")
+# Version of the cache file schema. Files of version 0 keyed results by
+# a hash of the password and have their results dropped.
+DISK_CACHE_VERSION = 1
+# Seconds a command waits for the cache file locked by another process.
+DISK_CACHE_TIMEOUT = 0.1
+# Streamed text results up to this many characters are also cached.
+STREAMED_RESULT_LIMIT = 1 << 16
+
+
+class ResultCache:
+    """
+    A class for keeping results in memory for long-running processes.
+
+    Keeps at most maxsize results, evicting the least recently used one,
+    and forgets results older than ttl seconds or stored for another
+    database generation.
+    """
+
+    def __init__(self, maxsize=1024, ttl=300):
+        """
+        Initializes an empty ResultCache.
+
+        :param maxsize: Maximum number of results kept (default is 1024).
+        :param ttl: Seconds a result is kept (default is 300).
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, generation):
+        """
+        Returns the result stored for the key in the given generation.
+
+        :param key: A string identifying the result.
+        :param generation: The generation stamp of the database.
+        :return: The stored result, or None when there is none.
+        """
+        with self._lock:
+            entry = self._results.get(key)
+            if (entry is None or entry[0] != generation
+                    or entry[1] < time.monotonic()):
+                self._results.pop(key, None)
+                self.misses += 1
+                return None
+            self._results.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, generation, result):
+        """
+        Stores the result of the key in the given generation.
+
+        :param key: A string identifying the result.
+        :param generation: The generation stamp of the database.
+        :param result: The result to store.
+        """
+        with self._lock:
+            self._results[key] = (generation, time.monotonic() + self.ttl,
+                                  result)
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+    def stats(self):
+        """
+        Returns the hit and miss counters of the cache.
+
+        :return: A dictionary with hits, misses and entries.
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "entries": len(self._results)}
+
+
+def disk_cache_name(database_name):
+    """
+    Names the result cache file of a database in the directory of the
+    database, e.g. users.cache.sqlite3 for users.sqlite3.
+
+    :param database_name: The name of the SQLite database file.
+    :return: The name of the SQLite cache file.
+    """
+    root, extension = os.path.splitext(database_name)
+    return f"{root}.cache{extension}"
+
+
+class DiskCache:
+    """
+    A class for keeping results in a SQLite file between runs of script.py.
+
+    Results stored for an older database generation are removed
+    when the first result of a new generation is stored. The cache is
+    best-effort: when the file cannot be created or written, e.g. in a
+    read-only directory, or is locked by another process for longer
+    than timeout, results are neither read nor stored and commands run
+    as without a cache.
+    """
+
+    def __init__(self, cache_name, timeout=DISK_CACHE_TIMEOUT):
+        """
+        Initializes the DiskCache, which creates
+        the cache file when it is first used.
+
+        :param cache_name: The name of the SQLite cache file.
+        :param timeout: Seconds to wait for a lock held by another
+        process (default is DISK_CACHE_TIMEOUT).
+        """
+        self.cache_name = cache_name
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+        self._conn = None
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.cache_name, timeout=self.timeout,
+                                   check_same_thread=False)
+            try:
+                with conn:
+                    version = conn.execute(
+                        "PRAGMA user_version").fetchone()[0]
+                    if version < DISK_CACHE_VERSION:
+                        # Overwrites the dropped keys on disk.
+                        conn.execute("PRAGMA secure_delete = ON")
+                        conn.execute("DROP TABLE IF EXISTS Results")
+                        conn.execute(
+                            f"PRAGMA user_version = {DISK_CACHE_VERSION}")
+                    conn.execute("""CREATE TABLE IF NOT EXISTS Results (
+                                    key TEXT PRIMARY KEY,
+                                    generation INTEGER, result TEXT)""")
+                    conn.execute("""CREATE TABLE IF NOT EXISTS Counters (
+                                    name TEXT PRIMARY KEY, value INTEGER)""")
+                    conn.execute("""INSERT OR IGNORE INTO Counters
+                                    (name, value)
+                                    VALUES ('hits', 0), ('misses', 0)""")
+            except sqlite3.Error:
+                conn.close()
+                raise
+            self._conn = conn
+        return self._conn
+
+    def unavailable(self, action):
+        self.logger.debug("Result cache %s cannot be %s.", self.cache_name,
+                          action, exc_info=True)
+
+    def count(self, name):
+        """
+        Adds one to a hit or miss counter, skipped when the cache file
+        cannot be written.
+
+        :param name: 'hits' or 'misses'.
+        """
+        try:
+            with self._lock, self.conn:
+                self.conn.execute(
+                    "UPDATE Counters SET value = value + 1 WHERE name = ?",
+                    (name,))
+        except sqlite3.Error:
+            self.unavailable("counted")
+
+    def get(self, key, generation):
+        """
+        Returns the result stored for the key in the given generation.
+
+        :param key: A string identifying the result.
+        :param generation: The generation stamp of the database.
+        :return: The stored result, or None when there is none or the
+        cache file cannot be read.
+        """
+        try:
+            with self._lock:
+                row = self.conn.execute(
+                    "SELECT result FROM Results "
+                    "WHERE key = ? AND generation = ?",
+                    (key, generation)).fetchone()
+        except sqlite3.Error:
+            self.unavailable("read")
+            return None
+        self.count("misses" if row is None else "hits")
+        return None if row is None else json.loads(row[0])
+
+    def put(self, key, generation, result):
+        """
+        Stores the result of the key in the given generation,
+        skipped when the cache file cannot be written.
+
+        :param key: A string identifying the result.
+        :param generation: The generation stamp of the database.
+        :param result: A JSON serializable result to store.
+        """
+        try:
+            with self._lock, self.conn:
+                self.conn.execute("DELETE FROM Results WHERE generation != ?",
+                                  (generation,))
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO Results (key, generation, result) "
+                    "VALUES (?, ?, ?)", (key, generation, json.dumps(result)))
+        except sqlite3.Error:
+            self.unavailable("written")
+
+    def stats(self):
+        """
+        Returns the hit and miss counters of all runs using the cache file.
+
+        :return: A dictionary with hits, misses and entries, or None when
+        the cache file cannot be read.
+        """
+        try:
+            with self._lock:
+                stats = dict(self.conn.execute(
+                    "SELECT name, value FROM Counters"))
+                stats["entries"] = self.conn.execute(
+                    "SELECT COUNT(*) FROM Results").fetchone()[0]
+        except sqlite3.Error:
+            self.unavailable("read")
+            return None
+        return {name: stats[name] for name in ["hits", "misses", "entries"]}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class CachedAccountActions:
+    """
+    A class answering AccountActions commands from a result cache.
+
+    Credentials are validated before the cache is read. Results are
+    keyed by command, and by login for the commands answering about the
+    caller's own account, so no value derived from the password is
+    stored, and belong to the generation stamp written by
+    create_database. Commands ending without a result are not cached.
+    """
+
+    def __init__(self, account_actions, cache):
+        """
+        Initializes the CachedAccountActions.
+
+        :param account_actions: AccountActions computing missing results.
+        :param cache: A ResultCache or DiskCache.
+        """
+        self.account_actions = account_actions
+        self.user_manager = account_actions.user_manager
+        self.cache = cache
+
+    def generation(self):
+        """
+        Reads the generation stamp of the database.
+
+        :return: The generation written by the last create_database.
+        """
+        return self.user_manager.execute_query(
+            GENERATION_QUERY)[0]["generation"]
+
+    @staticmethod
+    def cache_key(command, args):
+        """
+        Keys the result of a command of a validated user.
+
+        :param command: Name of the AccountActions method.
+        :param args: Arguments with the login of the user.
+        :return: A string identifying the result.
+        """
+        login = args["login"] if command in LOGIN_COMMANDS else None
+        return json.dumps([command, login])
+
+    def cached(self, command, args, admin):
+        """
+        Validates the user and returns the cached result of the command,
+        running the command when it is missing.
+
+        :param command: Name of the AccountActions method.
+        :param args: Arguments for user validation.
+        :param admin: Flag to indicate if the operation requires
+        admin privileges.
+        :return: The result of the command,
+        or an error message if validation fails.
+        """
+        if not self.user_manager.validate_credentials(args, admin):
+            return "Invalid Login"
+        key = self.cache_key(command, args)
+        generation = self.generation()
+        result = self.cache.get(key, generation)
+        if result is None:
+            result = self.account_actions.command_report(command, args)
+            self.cache.put(key, generation, result)
+        return result
+
+    def stream(self, command, args, admin, output_format, stream):
+        """
+        Writes the rows of a streamed command as they are read.
+
+        Text results are answered from the cache when they are in it,
+        and stored in it when they are short.
+
+        :param command: 'group_by_age', 'print_children'
+        or 'find_similar_children_by_age'.
+        :param args: Arguments for user validation.
+        :param admin: Flag to indicate if the operation requires
+        admin privileges.
+        :param output_format: 'text', 'jsonl' or 'csv'.
+        :param stream: A text file object, e.g. sys.stdout.
+        """
+        if not self.user_manager.validate_credentials(args, admin):
+            stream.write("Invalid Login\n")
+            return
+        if output_format == "text":
+            key = self.cache_key(command, args)
+            generation = self.generation()
+            result = self.cache.get(key, generation)
+            if result is not None:
+                stream.write(f"{result}\n")
+                return
+        rows = self.account_actions.report_rows(command, args)
+        if output_format != "text":
+            write_rows(command, rows, output_format, stream)
+        else:
+            kept = []
+            size = 0
+            for line in text_lines(command, rows):
+                stream.write(line + "\n")
+                size += len(line) + 1
+                if size <= STREAMED_RESULT_LIMIT:
+                    kept.append(line)
+            if size <= STREAMED_RESULT_LIMIT:
+                self.cache.put(key, generation, "\n".join(kept))
+
+    def print_all_accounts(self, args, admin=True):
+        return self.cached("print_all_accounts", args, admin)
+
+    def print_oldest_account(self, args, admin=True):
+        return self.cached("print_oldest_account", args, admin)
+
+    def group_by_age(self, args, admin=True):
+        return self.cached("group_by_age", args, admin)
+
+    def print_children(self, args, admin=False):
+        return self.cached("print_children", args, admin)
+
+    def find_similar_children_by_age(self, args, admin=False):
+        return self.cached("find_similar_children_by_age", args, admin)
+
+    def check_summary_tables(self, args, admin=True):
+        return self.account_actions.check_summary_tables(args, admin)
+
+    def cache_stats(self, args, admin=True):
+        """
+        Prints the hit and miss counters of the result cache.
+
+        :param args: Arguments for user validation.
+        :param admin: Flag to indicate if the operation requires
+        admin privileges (default is True).
+        :return: A string with the counters,
+        or an error message if validation fails.
+        """
+        if not self.user_manager.validate_credentials(args, admin):
+            return "Invalid Login"
+        stats = self.cache.stats()
+        if stats is None:
+            return "Result cache is not available."
+        return "\n".join(f"{name}: {value}" for name, value in stats.items())
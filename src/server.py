@@ -0,0 +1,96 @@
+import json
+import logging
+import os
+import socketserver
+
+COMMANDS = {
+    "print-all-accounts": "print_all_accounts",
+    "print-oldest-account": "print_oldest_account",
+    "group-by-age": "group_by_age",
+    "print-children": "print_children",
+    "find-similar-children-by-age": "find_similar_children_by_age",
+    "check-summary-tables": "check_summary_tables",
+    "cache-stats": "cache_stats",
+}
+
+
+class QueryHandler(socketserver.StreamRequestHandler):
+    """
+    A class answering newline delimited JSON requests of one client.
+
+    Every request is an object with 'command', 'login' and 'password'
+    keys. The response holds the text script.py would print in 'output',
+    or null when the command exits without output, or an 'error' message.
+    """
+
+    def handle(self):
+        for line in self.rfile:
+            response = self.server.answer(line)
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+    def finish(self):
+        super().finish()
+        self.server.account_actions.user_manager.db_manager \
+            .release_connection()
+
+
+class QueryServer(socketserver.ThreadingUnixStreamServer):
+    """
+    A class serving AccountActions commands on a Unix socket,
+    keeping the managers and their database connections warm.
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path, account_actions):
+        """
+        Initializes the QueryServer listening on the socket path.
+
+        :param socket_path: Path of the Unix socket.
+        :param account_actions: AccountActions answering the commands.
+        """
+        self.account_actions = account_actions
+        self.logger = logging.getLogger(__name__)
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        super().__init__(socket_path, QueryHandler)
+
+    def answer(self, line):
+        """
+        Runs the command of a single request.
+
+        :param line: A JSON encoded request.
+        :return: A dictionary with the output or an error message.
+        """
+        try:
+            request = json.loads(line)
+            action = getattr(self.account_actions,
+                             COMMANDS[request["command"]])
+        except (ValueError, KeyError, TypeError, AttributeError):
+            request = line.decode(errors="replace").strip()
+            return {"error": f"Invalid request: {request}"}
+        try:
+            return {"output": str(action(request))}
+        except SystemExit:
+            return {"output": None}
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def serve(account_actions, socket_path):
+    """
+    Serves commands on the Unix socket until interrupted.
+
+    :param account_actions: AccountActions answering the commands.
+    :param socket_path: Path of the Unix socket.
+    :return: A message printed on shutdown.
+    """
+    with QueryServer(socket_path, account_actions) as server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    return "Server stopped."
@@ -0,0 +1,221 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from src.account_actions import AccountActions, LEGACY_MULTI_CHILD_SEPARATOR
+from src.database_manager import DatabaseManager
+from src.query_result import QueryResult
+
+CALLER_CHILDREN_SQL = """SELECT CHILDREN.rowid AS position, CHILDREN.age,
+                         USERS.telephone_number FROM CHILDREN
+                         JOIN USERS ON USERS.id_user = CHILDREN.index_parent
+                         WHERE USERS.email=:login
+                         OR USERS.telephone_number=:login"""
+SIMILAR_CHILDREN_SQL = """WITH caller_children AS (
+                              SELECT json_extract(value, '$[0]') AS position,
+                              json_extract(value, '$[1]') AS age
+                              FROM json_each(:children)
+                          ),
+                          matches AS (
+                              SELECT CHILDREN.index_parent,
+                              caller_children.position, CHILDREN.name,
+                              CHILDREN.rowid AS child,
+                              ROW_NUMBER() OVER (
+                                  PARTITION BY CHILDREN.index_parent
+                                  ORDER BY caller_children.position,
+                                  CHILDREN.name, CHILDREN.rowid
+                              ) AS parent_rank
+                              FROM caller_children JOIN CHILDREN ON
+                              CHILDREN.age = caller_children.age
+                          ),
+                          parents AS (
+                              SELECT * FROM matches WHERE parent_rank = 1
+                          ),
+                          rendered AS (
+                              SELECT index_parent,
+                              GROUP_CONCAT(name || ', ' || age, '; ')
+                              AS children
+                              FROM (SELECT CHILDREN.index_parent,
+                                    CHILDREN.name, CHILDREN.age
+                                    FROM CHILDREN JOIN parents ON
+                                    parents.index_parent =
+                                    CHILDREN.index_parent
+                                    ORDER BY CHILDREN.index_parent,
+                                    CHILDREN.name, CHILDREN.rowid)
+                              GROUP BY index_parent
+                          )
+                          SELECT USERS.firstname, USERS.telephone_number,
+                          rendered.children, parents.position, parents.name,
+                          parents.child
+                          FROM parents
+                          JOIN USERS ON USERS.id_user = parents.index_parent
+                          JOIN rendered ON
+                          rendered.index_parent = parents.index_parent"""
+
+
+def shard_names(database_name, shards):
+    """
+    Names the files of a sharded database,
+    e.g. users.shard0.sqlite3 for users.sqlite3.
+
+    :param database_name: The name of the single file database.
+    :param shards: Number of shards.
+    :return: A list of file names.
+    """
+    root, extension = os.path.splitext(database_name)
+    return [f"{root}.shard{shard}{extension}" for shard in range(shards)]
+
+
+def shard_of(id_user, shards):
+    """
+    Hashes user ids to shards with Knuth's multiplicative hash,
+    so consecutive ids are spread over all shards.
+
+    :param id_user: A user id or a numpy array of uint64 user ids.
+    :param shards: Number of shards.
+    :return: The shard or an array of shards.
+    """
+    return id_user * 2654435761 % 2**32 % shards
+
+
+def sort_key(value):
+    """
+    Orders values of mixed types like SQLite does:
+    NULL first, then numbers, then text.
+    """
+    if value is None:
+        return 0, 0
+    if isinstance(value, str):
+        return 2, value
+    return 1, value
+
+
+class ShardedDatabaseManager:
+    """
+    A class running SQL queries on all shards of a database in parallel.
+
+    Every shard has its own DatabaseManager, so threads of the executor
+    keep one long-lived read-only connection per shard. Results are
+    concatenated in shard order.
+    """
+
+    def __init__(self, shard_names, profiler=None):
+        """
+        Initializes the ShardedDatabaseManager with the shard files.
+
+        :param shard_names: Names of the SQLite files of the shards.
+        :param profiler: Profiler recording every query (default is None).
+        """
+        self.shards = [DatabaseManager(name, profiler)
+                       for name in shard_names]
+        self.executor = ThreadPoolExecutor(max_workers=len(self.shards))
+
+    @property
+    def profiler(self):
+        return self.shards[0].profiler
+
+    @profiler.setter
+    def profiler(self, profiler):
+        for shard in self.shards:
+            shard.profiler = profiler
+
+    def shard_queries(self, sql_query, params=None):
+        """
+        Executes a SQL query on every shard in parallel.
+
+        :param sql_query: A string containing the SQL query to be executed.
+        :param params: Values bound to the named parameters of the query.
+        :return: A list of QueryResult, one per shard.
+        """
+        futures = [self.executor.submit(shard.sql_query, sql_query, params)
+                   for shard in self.shards]
+        return [future.result() for future in futures]
+
+    def sql_query(self, sql_query, params=None):
+        """
+        Executes a SQL query on every shard in parallel.
+
+        :param sql_query: A string containing the SQL query to be executed.
+        :param params: Values bound to the named parameters of the query.
+        :return: A QueryResult with the rows of all shards.
+        """
+        results = self.shard_queries(sql_query, params)
+        return QueryResult(results[0].columns,
+                           [rows for result in results for rows in result])
+
+    def iter_query(self, sql_query, params=None):
+        """
+        Executes a SQL query on every shard in parallel. The rows of all
+        shards are merged, so they are fetched at once.
+
+        :param sql_query: A string containing the SQL query to be executed.
+        :param params: Values bound to the named parameters of the query.
+        :return: An iterator of the rows of all shards.
+        """
+        return iter(self.sql_query(sql_query, params))
+
+    def release_connection(self):
+        """Connections belong to the executor threads and stay open."""
+
+    def close_connection(self):
+        """Closes the executor and all connections of the shards."""
+        self.executor.shutdown()
+        for shard in self.shards:
+            shard.close_connection()
+
+
+class ShardedAccountActions(AccountActions):
+    """
+    A class answering the commands from a ShardedDatabaseManager.
+
+    Users are stored with their children in one shard, so credentials
+    and print_children only need the rows of all shards together.
+    Counts are summed, children per age are added up and the oldest
+    account is the oldest of the shards. Similar children are searched
+    in every shard for the ages of the caller's children and ranked as
+    in a single database.
+    """
+
+    def all_accounts_report(self):
+        result = self.user_manager.execute_query(
+            "SELECT user_count FROM USERS_SUMMARY")
+        return sum(rows['user_count'] for rows in result)
+
+    def oldest_account_report(self):
+        sql_prompt = """SELECT firstname, email, created_at, id_user
+                        FROM USERS WHERE id_user =
+                        (SELECT oldest_id_user FROM USERS_SUMMARY)"""
+        result = min(self.user_manager.execute_query(sql_prompt),
+                     key=lambda rows: (rows['created_at'], rows['id_user']))
+        console_output = "\n".join([f"name: {result['firstname']}",
+                                    f"email_adress: {result['email']}",
+                                    f"created_at: {result['created_at']}"])
+        return console_output
+
+    def age_groups_rows(self):
+        counts = {}
+        for rows in self.user_manager.execute_query(
+                "SELECT age, count FROM CHILDREN_AGES"):
+            counts[rows['age']] = counts.get(rows['age'], 0) + rows['count']
+        return ({"age": age, "count": count}
+                for age, count in sorted(
+                    counts.items(),
+                    key=lambda pair: (pair[1], sort_key(pair[0]))))
+
+    def similar_children_rows(self, args):
+        caller_children = self.user_manager.execute_query(
+            CALLER_CHILDREN_SQL, {"login": args["login"]})
+        children = json.dumps([[rows['position'], rows['age']]
+                               for rows in caller_children])
+        result = self.user_manager.execute_query(
+            SIMILAR_CHILDREN_SQL, {"children": children})
+        telephone_result = caller_children[0]['telephone_number']
+        if len(caller_children) > 1:
+            separator = LEGACY_MULTI_CHILD_SEPARATOR
+        else:
+            separator = ", "
+        return self.similar_rows(
+            ((rows['firstname'], rows['telephone_number'], rows['children'])
+             for rows in sorted(result, key=lambda rows: (
+                 rows['position'], sort_key(rows['name']), rows['child']))),
+            separator, telephone_result)
@@ -0,0 +1,194 @@
+import logging
+import os
+
+from src.account_actions import AccountActions
+from src.result_cache import GENERATION_QUERY
+
+SNAPSHOT_TABLES = {
+    "users": ("Users", ["id_user", "firstname", "telephone_number",
+                        "email", "role", "created_at"]),
+    "children": ("Children", ["index", "name", "age", "index_parent"]),
+}
+
+
+def snapshot_schema(conn, table, columns, metadata):
+    """
+    Builds the Arrow schema of a table from its declared SQLite types.
+
+    :param conn: A sqlite3 connection of the created database.
+    :param table: Name of the table.
+    :param columns: Names of the written columns.
+    :param metadata: Schema metadata.
+    :return: A pyarrow schema with int64 for INTEGER columns
+    and string for the others.
+    """
+    import pyarrow as pa
+
+    declared = {row[1]: row[2].upper()
+                for row in conn.execute(f'PRAGMA table_info("{table}")')}
+    return pa.schema(
+        [(column, pa.int64() if "INT" in declared[column] else pa.string())
+         for column in columns],
+        metadata=metadata)
+
+
+def write_snapshots(conn, directory, chunksize=1_000_000):
+    """
+    Writes Users and Children as columnar snapshots: zstd compressed
+    Parquet files for export and uncompressed Arrow IPC files, which
+    ArrowSnapshot memory maps. Passwords are not written.
+
+    :param conn: A sqlite3 connection of the created database.
+    :param directory: Directory of the snapshot files.
+    :param chunksize: Number of rows converted at once.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    generation = conn.execute(GENERATION_QUERY).fetchone()[0]
+    metadata = {b"generation": str(generation).encode()}
+    os.makedirs(directory, exist_ok=True)
+    for name, (table, columns) in SNAPSHOT_TABLES.items():
+        schema = snapshot_schema(conn, table, columns, metadata)
+        parquet_writer = pq.ParquetWriter(
+            os.path.join(directory, f"{name}.parquet"), schema,
+            compression="zstd")
+        ipc_writer = pa.ipc.new_file(
+            os.path.join(directory, f"{name}.arrow"), schema)
+        selected = ", ".join(f'"{column}"' for column in columns)
+        cursor = conn.execute(
+            f'SELECT {selected} FROM "{table}" ORDER BY rowid')
+        for rows in iter(lambda: cursor.fetchmany(chunksize), []):
+            batch = pa.RecordBatch.from_arrays(
+                [pa.array(values, type=field.type)
+                 for values, field in zip(zip(*rows), schema)],
+                schema=schema)
+            parquet_writer.write_batch(batch)
+            ipc_writer.write_batch(batch)
+        parquet_writer.close()
+        ipc_writer.close()
+
+
+class ArrowSnapshot:
+    """
+    A class reading Users and Children snapshots
+    from memory mapped Arrow IPC files.
+
+    Columns are read without copying them into memory; only the
+    columns an aggregation needs are paged in by the operating system.
+    """
+
+    def __init__(self, directory):
+        """
+        Initializes the ArrowSnapshot of the snapshot directory.
+
+        :param directory: Directory written by write_snapshots.
+        """
+        import pyarrow as pa
+
+        self.tables = {}
+        for name in SNAPSHOT_TABLES:
+            source = pa.memory_map(os.path.join(directory, f"{name}.arrow"))
+            self.tables[name] = pa.ipc.open_file(source).read_all()
+        self.generation = int(
+            self.tables["users"].schema.metadata[b"generation"])
+
+    def user_count(self):
+        return self.tables["users"].num_rows
+
+    def oldest_user(self):
+        """
+        Finds the first user with the earliest creation date.
+
+        :return: A dictionary with firstname, email and created_at.
+        """
+        import pyarrow.compute as pc
+
+        users = self.tables["users"]
+        created_at = users.column("created_at")
+        position = pc.index(created_at, pc.min(created_at)).as_py()
+        return {column: users.column(column)[position].as_py()
+                for column in ["firstname", "email", "created_at"]}
+
+    def children_ages(self):
+        """
+        Counts children per age.
+
+        :return: A list of (age, count) pairs ordered by count and age.
+        """
+        import pyarrow.compute as pc
+
+        counts = pc.value_counts(self.tables["children"].column("age"))
+        return sorted(zip(counts.field("values").to_pylist(),
+                          counts.field("counts").to_pylist()),
+                      key=lambda pair: (pair[1], pair[0]))
+
+
+def open_snapshot(directory):
+    """
+    Opens the Arrow snapshots of a directory, logging why they cannot
+    be read instead of failing.
+
+    :param directory: Directory written by write_snapshots.
+    :return: An ArrowSnapshot, or None when pyarrow is not installed or
+    the snapshots are missing or unreadable.
+    """
+    try:
+        return ArrowSnapshot(directory)
+    except (ImportError, OSError, ValueError, KeyError, TypeError) as error:
+        logging.getLogger(__name__).warning(
+            "Cannot read Arrow snapshots in %s (%s), answering from SQLite.\n"
+            "Run python script.py create_database --snapshot first.",
+            directory, error)
+        return None
+
+
+class SnapshotAccountActions(AccountActions):
+    """
+    A class answering the aggregation commands from an ArrowSnapshot.
+
+    Credentials and the other commands are still answered by SQLite.
+    When the snapshot was written for another database generation
+    the aggregations fall back to SQLite as well.
+    """
+
+    def __init__(self, user_manager, snapshot):
+        """
+        Initializes the SnapshotAccountActions.
+
+        :param user_manager: UserManager class for handling user
+        authentication and queries.
+        :param snapshot: ArrowSnapshot of the database.
+        """
+        super().__init__(user_manager)
+        self.snapshot = snapshot
+        self.logger = logging.getLogger(__name__)
+
+    def snapshot_is_current(self):
+        generation = self.user_manager.execute_query(
+            GENERATION_QUERY)[0]["generation"]
+        if generation != self.snapshot.generation:
+            self.logger.warning("Snapshot is older than the database, "
+                                "run create_database --snapshot again.")
+            return False
+        return True
+
+    def all_accounts_report(self):
+        if not self.snapshot_is_current():
+            return super().all_accounts_report()
+        return self.snapshot.user_count()
+
+    def oldest_account_report(self):
+        if not self.snapshot_is_current():
+            return super().oldest_account_report()
+        result = self.snapshot.oldest_user()
+        console_output = "\n".join([f"name: {result['firstname']}",
+                                    f"email_adress: {result['email']}",
+                                    f"created_at: {result['created_at']}"])
+        return console_output
+
+    def age_groups_rows(self):
+        if not self.snapshot_is_current():
+            return super().age_groups_rows()
+        return ({"age": age, "count": count}
+                for age, count in self.snapshot.children_ages())
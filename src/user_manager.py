@@ -1,6 +1,9 @@
+import itertools
 import logging
 import sys
 
+from src.passwords import PasswordVerifier
+
 
 class UserManager:
     """
@@ -8,42 +11,72 @@ class UserManager:
     SQL queries on a database.
     """
 
-    def __init__(self, db_manager):
+    def __init__(self, db_manager, verifier=None):
         """Initializes the UserManager with a database manager
-        instance and a logger."""
+        instance, a password verifier and a logger.
+
+        :param db_manager: DatabaseManager running the queries.
+        :param verifier: PasswordVerifier checking password hashes
+        (default is a new PasswordVerifier).
+        """
+        if verifier is None:
+            verifier = PasswordVerifier()
         self.db_manager = db_manager
+        self.verifier = verifier
         self.logger = logging.getLogger(__name__)
 
     def validate_credentials(self, args, admin):
         """Validates user credentials in database.
 
+        The password hashes of the login are read from the database and
+        checked by the verifier, which skips hashing for credentials it
+        verified recently.
+
         :param args: email or telephone number user and password
         :param admin: Boolean if account need to be admin
         :return: Boolean if the credentials are valid.
         """
         if admin:
-            sql = f"""SELECT email, telephone_number, password, role FROM USERS
-                      WHERE role='admin'
-                      AND (email='{args['login']}'
-                      OR telephone_number='{args['login']}')
-                      AND password='{args['password']}'"""
+            sql = """SELECT password FROM USERS
+                     WHERE role='admin'
+                     AND (email=:login OR telephone_number=:login)"""
         else:
-            sql = f"""SELECT email, telephone_number, password FROM USERS
-                      WHERE (email='{args['login']}'
-                      OR telephone_number='{args['login']}')
-                      AND password='{args['password']}'"""
-        credentials = self.db_manager.sql_query(sql)
-        return not credentials.empty
-
-    def execute_query(self, sql_prompt):
+            sql = """SELECT password FROM USERS
+                     WHERE (email=:login OR telephone_number=:login)"""
+        credentials = self.db_manager.sql_query(sql, {"login": args["login"]})
+        return any(self.verifier.verify(args["login"], args["password"],
+                                        rows["password"])
+                   for rows in credentials)
+
+    def execute_query(self, sql_prompt, params=None):
         """
         Executes a given SQL query and returns the result.
 
         :param sql_prompt: A SQL query string
+        :param params: Values bound to the named parameters of the query.
         :return: The result of the SQL query.
         """
-        query_output = self.db_manager.sql_query(sql_prompt)
+        query_output = self.db_manager.sql_query(sql_prompt, params)
         if query_output.empty:
-            self.logger.error("No result from database.")
-            sys.exit(0)
-        return self.db_manager.sql_query(sql_prompt)
+            self.no_result()
+        return query_output
+
+    def iter_query(self, sql_prompt, params=None):
+        """
+        Executes a given SQL query and yields its rows as they are read.
+
+        :param sql_prompt: A SQL query string
+        :param params: Values bound to the named parameters of the query.
+        :return: An iterator of the rows of the SQL query.
+        """
+        rows = self.db_manager.iter_query(sql_prompt, params)
+        first = next(rows, None)
+        if first is None:
+            self.no_result()
+            return iter(())
+        return itertools.chain([first], rows)
+
+    def no_result(self):
+        """Ends a command which found nothing to answer."""
+        self.logger.error("No result from database.")
+        sys.exit(0)
@@ -0,0 +1,46 @@
+import atexit
+import functools
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from src.create_database import create_database
+
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIRECTORY = os.path.join(ROOT_DIRECTORY, "data")
+
+
+@functools.cache
+def shared_database():
+    """
+    Creates the database of the data folder once per test run,
+    in a temporary directory removed when the run ends. Passwords
+    are hashed with few iterations to keep the tests fast.
+
+    :return: The name of the SQLite database file.
+    """
+    directory = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    database_name = os.path.join(directory, "users.sqlite3")
+    create_database({"database": database_name,
+                     "directory": DATA_DIRECTORY, "hash_iterations": 1000})
+    return database_name
+
+
+def run_script(args, python_options=(), **kwargs):
+    """
+    Runs script.py in the directory of the shared database, where it
+    finds users.sqlite3, unless another cwd is given.
+
+    :param args: Command line arguments of script.py.
+    :param python_options: Options of the Python interpreter.
+    :param kwargs: Keyword arguments of subprocess.run.
+    :return: The CompletedProcess of the finished script.
+    """
+    kwargs.setdefault("cwd", os.path.dirname(shared_database()))
+    return subprocess.run(
+        [sys.executable, *python_options,
+         os.path.join(ROOT_DIRECTORY, "script.py"), *args],
+        check=True, capture_output=True, text=True, **kwargs)
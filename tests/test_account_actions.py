@@ -4,13 +4,14 @@ import re
 from src.database_manager import DatabaseManager
 from src.user_manager import UserManager
 from src.account_actions import AccountActions
+from tests.helpers import shared_database
 
 
 class TestUserManager(unittest.TestCase):
 
     @classmethod
     def setUp(self):
-        self.db_manager = DatabaseManager('users.sqlite3')
+        self.db_manager = DatabaseManager(shared_database())
         self.user_manager = UserManager(self.db_manager)
         self.account_actions = AccountActions(self.user_manager)
 
@@ -42,6 +43,12 @@ class TestUserManager(unittest.TestCase):
         check_result = re.search("(?<=age: 9, count: )(.*)(?=\n)", result)
         self.assertEqual(check_result.group(), '5')
 
+    def test_check_summary_tables(self):
+        result = self.account_actions.check_summary_tables(
+            {"login": "brenda74@example.org",
+             "password": "+vJCXfFLe0"}, admin=True)
+        self.assertEqual(result, "Summary tables are consistent.")
+
     def test_print_children(self):
         result = self.account_actions.print_children(
             {"login": "504140673",
@@ -54,3 +61,24 @@ class TestUserManager(unittest.TestCase):
              "password": "gk2VM$qk@S"}, admin=False)
         self.assertIn('Patricia, 636162531: Andrew, 4; James, 13', result)
         self.assertIn('Brandy, 686983157: Teresa, 4', result)
+
+    def test_find_similar_children_by_age_query_count(self):
+        query_counts = []
+        for args in ({"login": "kcabrera@example.net",
+                      "password": "gk2VM$qk@S"},
+                     {"login": "justin81@example.org",
+                      "password": "*0pED9u@8b"}):
+            # Counts statements of every query path, sql_query and
+            # iter_query alike.
+            statements = []
+            conn = self.db_manager.pool.connection()
+            conn.set_trace_callback(statements.append)
+            try:
+                self.account_actions.find_similar_children_by_age(
+                    args, admin=False)
+            finally:
+                conn.set_trace_callback(None)
+            query_counts.append(len(statements))
+        self.assertEqual(query_counts[0], query_counts[1])
+        # Credentials and the report.
+        self.assertEqual(query_counts[0], 2)
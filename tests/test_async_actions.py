@@ -0,0 +1,82 @@
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+from src.account_actions import AccountActions
+from src.async_actions import AsyncAccountActions, AsyncDatabaseManager
+from src.database_manager import DatabaseManager
+from src.user_manager import UserManager
+from tests.helpers import shared_database
+
+ADMIN = {"login": "brenda74@example.org", "password": "+vJCXfFLe0"}
+USER = {"login": "kcabrera@example.net", "password": "gk2VM$qk@S"}
+
+
+class TestAsyncAccountActions(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.async_db_manager = AsyncDatabaseManager(shared_database(),
+                                                     max_workers=2)
+        self.async_actions = AsyncAccountActions(self.async_db_manager)
+        self.db_manager = DatabaseManager(shared_database())
+        self.account_actions = AccountActions(UserManager(self.db_manager))
+
+    def tearDown(self):
+        self.async_db_manager.close_connection()
+        self.db_manager.close_connection()
+
+    async def test_same_output_as_account_actions(self):
+        for method, args in [("print_all_accounts", ADMIN),
+                             ("print_oldest_account", ADMIN),
+                             ("group_by_age", ADMIN),
+                             ("check_summary_tables", ADMIN),
+                             ("print_children", USER),
+                             ("find_similar_children_by_age", USER)]:
+            self.assertEqual(
+                await getattr(self.async_actions, method)(args),
+                getattr(self.account_actions, method)(args))
+
+    async def test_invalid_login(self):
+        result = await self.async_actions.print_all_accounts(USER)
+        self.assertEqual(result, "Invalid Login")
+        result = await self.async_actions.print_children(
+            {"login": "nobody@example.org", "password": "xyz"})
+        self.assertEqual(result, "Invalid Login")
+
+    async def test_invalid_login_skips_report(self):
+        with mock.patch.object(self.async_actions.account_actions,
+                               "similar_children_report") as report:
+            result = await self.async_actions.find_similar_children_by_age(
+                dict(USER, password="xyz"))
+        self.assertEqual(result, "Invalid Login")
+        report.assert_not_called()
+
+    async def test_no_result(self):
+        with self.assertRaises(SystemExit):
+            await self.async_actions.print_children(
+                {"login": "carterlindsey@example.org",
+                 "password": "+sUVpIkkY6"})
+
+    async def test_queries_run_on_pool_threads(self):
+        threads = set()
+        sql_query = self.async_db_manager.db_manager.sql_query
+
+        def record_thread(*args):
+            threads.add(threading.current_thread())
+            return sql_query(*args)
+
+        with mock.patch.object(self.async_db_manager.db_manager,
+                               "sql_query", side_effect=record_thread):
+            results = await asyncio.gather(*[
+                self.async_actions.find_similar_children_by_age(USER)
+                for _ in range(10)])
+        self.assertEqual(len(set(results)), 1)
+        self.assertNotIn(threading.main_thread(), threads)
+        self.assertLessEqual(
+            self.async_db_manager.db_manager.pool.connections_opened, 2)
+
+    async def test_sql_query(self):
+        result = await self.async_db_manager.sql_query(
+            "SELECT user_count FROM USERS_SUMMARY")
+        self.assertEqual(result[0]["user_count"], 84)
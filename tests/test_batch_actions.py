@@ -0,0 +1,110 @@
+import json
+import threading
+import unittest
+from unittest import mock
+
+from src.account_actions import AccountActions
+from src.batch_actions import BatchAccountActions
+from src.database_manager import DatabaseManager
+from src.user_manager import UserManager
+from tests.helpers import run_script, shared_database
+
+ADMIN = {"login": "brenda74@example.org", "password": "+vJCXfFLe0"}
+USERS = [{"login": "kcabrera@example.net", "password": "gk2VM$qk@S"},
+         {"login": "504140673", "password": "@9TcRo15As"},
+         {"login": "justin81@example.org", "password": "*0pED9u@8b"}]
+
+
+class TestBatchAccountActions(unittest.TestCase):
+
+    def setUp(self):
+        self.db_manager = DatabaseManager(shared_database())
+        self.account_actions = AccountActions(UserManager(self.db_manager))
+        self.batch_actions = BatchAccountActions(self.account_actions,
+                                                 chunksize=2)
+
+    def tearDown(self):
+        self.db_manager.close_connection()
+
+    def run_batch(self, requests):
+        return list(self.batch_actions.run(
+            [json.dumps(request) for request in requests]))
+
+    def test_same_output_as_account_actions(self):
+        requests = [dict(args, command=command) for args in USERS
+                    for command in ("print-children",
+                                    "find-similar-children-by-age")]
+        requests.append(dict(ADMIN, command="group-by-age"))
+        responses = self.run_batch(requests)
+        for request, response in zip(requests, responses):
+            method = request["command"].replace("-", "_")
+            expected = getattr(self.account_actions, method)(request)
+            self.assertEqual(response, {"command": request["command"],
+                                        "login": request["login"],
+                                        "output": expected})
+
+    def test_invalid_login(self):
+        responses = self.run_batch([
+            dict(USERS[0], command="print-all-accounts"),
+            dict(USERS[0], command="print-children", password="xyz"),
+        ])
+        self.assertEqual([response["output"] for response in responses],
+                         ["Invalid Login", "Invalid Login"])
+
+    def test_invalid_request(self):
+        responses = list(self.batch_actions.run(
+            ['{"command": "print-children"}', "", "not json"]))
+        self.assertEqual(responses, [
+            {"error": 'Invalid request: {"command": "print-children"}'},
+            {"error": "Invalid request: not json"}])
+
+    def test_no_result(self):
+        responses = self.run_batch([{"command": "print-children",
+                                     "login": "carterlindsey@example.org",
+                                     "password": "+sUVpIkkY6"}])
+        self.assertIsNone(responses[0]["output"])
+
+    def test_queries_per_chunk(self):
+        requests = [dict(args, command="print-children") for args in USERS]
+        requests += [dict(ADMIN, command="print-all-accounts")] * 3
+        self.batch_actions.chunksize = len(requests)
+        with mock.patch.object(self.db_manager, "sql_query",
+                               wraps=self.db_manager.sql_query) as query:
+            responses = self.run_batch(requests)
+        self.assertEqual([response["output"] for response in responses[3:]],
+                         ["84"] * 3)
+        # Credentials, children of all callers and the admin report
+        # with its own login.
+        self.assertEqual(query.call_count, 4)
+
+    def test_passwords_verified_by_threads(self):
+        requests = [dict(args, command="print-children")
+                    for args in USERS * 2]
+        requests.append(dict(USERS[0], command="print-children",
+                             password="xyz"))
+        self.batch_actions.chunksize = len(requests)
+        self.batch_actions.workers = 2
+        threads = []
+        verify = self.batch_actions.verifier.verify
+
+        def record_thread(*args):
+            threads.append(threading.current_thread())
+            return verify(*args)
+
+        with mock.patch.object(self.batch_actions.verifier, "verify",
+                               side_effect=record_thread):
+            responses = self.run_batch(requests)
+        # Repeated credentials are verified once.
+        self.assertEqual(len(threads), 4)
+        self.assertNotIn(threading.main_thread(), threads)
+        self.assertEqual([response["output"] for response in responses],
+                         [self.account_actions.print_children(request)
+                          for request in requests])
+
+    def test_script_batch(self):
+        lines = "".join(json.dumps(dict(args, command="print-children"))
+                        + "\n" for args in USERS[1:2])
+        result = run_script(["batch"], input=lines)
+        self.assertEqual(json.loads(result.stdout),
+                         {"command": "print-children", "login": "504140673",
+                          "output": "Jackie, 9\nMitchell, 6"})
@@ -0,0 +1,73 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from src.account_actions import AccountActions
+from src.connection_pool import ConnectionPool
+from src.database_manager import DatabaseManager
+from src.user_manager import UserManager
+from tests.helpers import shared_database
+
+
+class TestConnectionPool(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.test_db = os.path.join(cls.directory.name,
+                                   'test_connection_pool.db')
+        with sqlite3.connect(cls.test_db) as conn:
+            conn.execute("CREATE TABLE test_table (id INTEGER)")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def setUp(self):
+        self.pool = ConnectionPool(self.test_db)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_connection_reused(self):
+        self.assertIs(self.pool.connection(), self.pool.connection())
+        self.assertEqual(self.pool.connections_opened, 1)
+
+    def test_connection_per_thread(self):
+        connections = []
+        thread = threading.Thread(
+            target=lambda: connections.append(self.pool.connection()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(connections[0], self.pool.connection())
+        self.assertEqual(self.pool.connections_opened, 2)
+
+    def test_released_connection_reused_by_other_thread(self):
+        connections = []
+
+        def query():
+            connections.append(self.pool.connection())
+            self.pool.release()
+
+        for _ in range(2):
+            thread = threading.Thread(target=query)
+            thread.start()
+            thread.join()
+        self.assertIs(connections[0], connections[1])
+        self.assertEqual(self.pool.connections_opened, 1)
+
+    def test_connection_read_only(self):
+        with self.assertRaises(sqlite3.OperationalError):
+            self.pool.connection().execute(
+                "INSERT INTO test_table (id) VALUES (1)")
+
+    def test_one_connection_per_action(self):
+        db_manager = DatabaseManager(shared_database())
+        account_actions = AccountActions(UserManager(db_manager))
+        account_actions.print_children(
+            {"login": "504140673",
+             "password": "@9TcRo15As"}, admin=False)
+        self.assertEqual(db_manager.pool.connections_opened, 1)
+        db_manager.close_connection()
@@ -0,0 +1,283 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from src.create_database import (Children, DatabaseManager, LoadData, Users,
+                                 create_database, load_database,
+                                 stream_database, update_database)
+from src.passwords import verify_password
+
+
+class TestCreateDatabase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        # A fixed salt makes hashes of the same password equal,
+        # so databases of different load paths can be compared.
+        patchers = [mock.patch("src.passwords.HASH_ITERATIONS", 1000),
+                    mock.patch("src.passwords.os.urandom",
+                               return_value=b"0" * 16)]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def build(self, name, load):
+        database_name = os.path.join(self.directory.name, name)
+        db_manager = DatabaseManager(database_name)
+        load(db_manager)
+        db_manager.close_connection()
+        conn = sqlite3.connect(database_name)
+        tables = {
+            table: conn.execute(
+                f"SELECT * FROM {table} ORDER BY rowid").fetchall()
+            for table in ("Users", "Children")
+        }
+        conn.close()
+        return tables
+
+    def test_stream_database_same_as_load_database(self):
+        expected = self.build(
+            "memory.sqlite3", lambda db: load_database(db, "data"))
+        result = self.build(
+            "stream.sqlite3", lambda db: stream_database(db, "data", 7))
+        self.assertEqual(len(result["Users"]), 84)
+        self.assertEqual(result, expected)
+
+    def test_load_database_workers(self):
+        expected = self.build(
+            "serial.sqlite3", lambda db: load_database(db, "data"))
+        result = self.build(
+            "parallel.sqlite3", lambda db: load_database(db, "data", 2))
+        self.assertEqual(result, expected)
+
+    def contents(self, database_name):
+        conn = sqlite3.connect(database_name)
+        users = set(conn.execute(
+            """SELECT firstname, telephone_number, email, password, role,
+               created_at FROM Users"""))
+        children = conn.execute(
+            """SELECT Users.email, Children.name, Children.age
+               FROM Children JOIN Users ON
+               Users.id_user = Children.index_parent
+               ORDER BY Users.email, Children.rowid""").fetchall()
+        conn.close()
+        return users, children
+
+    def assert_same_as_rebuild(self, database_name, directory):
+        expected_name = os.path.join(self.directory.name, "rebuild.sqlite3")
+        if os.path.exists(expected_name):
+            os.remove(expected_name)
+        db_manager = DatabaseManager(expected_name)
+        load_database(db_manager, directory)
+        db_manager.close_connection()
+        self.assertEqual(self.contents(database_name),
+                         self.contents(expected_name))
+
+    def test_update_database(self):
+        directory = os.path.join(self.directory.name, "data")
+        shutil.copytree("data", directory)
+        moved = os.path.join(self.directory.name, "users.json")
+        shutil.move(os.path.join(directory, "a", "users.json"), moved)
+        database_name = os.path.join(self.directory.name, "users.sqlite3")
+        db_manager = DatabaseManager(database_name)
+
+        self.assertEqual(update_database(db_manager, directory, 10),
+                         "Database updated: 4 files loaded, "
+                         "0 files replaced or removed.")
+        self.assert_same_as_rebuild(database_name, directory)
+
+        shutil.move(moved, os.path.join(directory, "users.json"))
+        os.remove(os.path.join(directory, "a", "b", "users_1.csv"))
+        with open(os.path.join(directory, "users_2.xml")) as handle:
+            xml = handle.read()
+        with open(os.path.join(directory, "users_2.xml"), "w") as handle:
+            handle.write(xml.replace("2023-03-02 16:37:42",
+                                     "2021-03-02 16:37:42"))
+        self.assertEqual(update_database(db_manager, directory, 10),
+                         "Database updated: 2 files loaded, "
+                         "2 files replaced or removed.")
+        self.assert_same_as_rebuild(database_name, directory)
+
+        self.assertEqual(update_database(db_manager, directory, 10),
+                         "Database is up to date.")
+        db_manager.close_connection()
+
+    def test_update_database_ties_as_rebuild(self):
+        directory = os.path.join(self.directory.name, "data")
+        os.mkdir(directory)
+        header = "firstname;telephone_number;email;password;role;" \
+                 "created_at;children\n"
+        files = {
+            "a.csv": "Anna;500000001;tie@example.com;pw;user;"
+                     "2023-01-01 00:00:00;Ada (3)\n"
+                     "Adam;500000002;other@example.com;pw;user;"
+                     "2023-01-01 00:00:00;\n",
+            "b.csv": "Beth;500000002;tie@example.com;pw;user;"
+                     "2023-01-01 00:00:00;Bob (4)\n",
+        }
+        database_name = os.path.join(self.directory.name, "users.sqlite3")
+        db_manager = DatabaseManager(database_name)
+        # b.csv is loaded before a.csv, which a full build reads first.
+        for name in ("b.csv", "a.csv"):
+            with open(os.path.join(directory, name), "w") as handle:
+                handle.write(header + files[name])
+            update_database(db_manager, directory, 10)
+            self.assert_same_as_rebuild(database_name, directory)
+        db_manager.close_connection()
+        users, children = self.contents(database_name)
+        self.assertEqual({user[0] for user in users}, {"Beth"})
+        self.assertEqual(children, [("tie@example.com", "Bob", 4)])
+
+    def test_update_database_bumps_generation(self):
+        directory = os.path.join(self.directory.name, "data")
+        shutil.copytree("data", directory)
+        database_name = os.path.join(self.directory.name, "users.sqlite3")
+        db_manager = DatabaseManager(database_name)
+        generation_query = "SELECT generation FROM Database_generation"
+
+        update_database(db_manager, directory, 10)
+        first = db_manager.conn.execute(generation_query).fetchone()
+        update_database(db_manager, directory, 10)
+        self.assertEqual(
+            db_manager.conn.execute(generation_query).fetchone(), first)
+
+        os.remove(os.path.join(directory, "a", "b", "users_1.csv"))
+        update_database(db_manager, directory, 10)
+        self.assertNotEqual(
+            db_manager.conn.execute(generation_query).fetchone(), first)
+        db_manager.close_connection()
+
+    def test_bulk_load(self):
+        database_name = os.path.join(self.directory.name, "users.sqlite3")
+        db_manager = DatabaseManager(database_name)
+        with db_manager.bulk_load():
+            self.assertEqual(db_manager.conn.execute(
+                "PRAGMA journal_mode").fetchone(), ("wal",))
+            load_database(db_manager, "data")
+            db_manager.create_indexes()
+        conn = db_manager.conn
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone(),
+                         ("delete",))
+        self.assertEqual(conn.execute("PRAGMA synchronous").fetchone(),
+                         (2,))
+        self.assertIn(("Children", "ix_Children_age"), conn.execute(
+            "SELECT tbl, idx FROM sqlite_stat1").fetchall())
+        declared = {(row[1], row[2], row[5]) for row in conn.execute(
+            'PRAGMA table_info("Children")')}
+        self.assertIn(("index", "INTEGER", 1), declared)
+        self.assertIn(("age", "INTEGER", 0), declared)
+        self.assertEqual(conn.execute(
+            "SELECT DISTINCT typeof(age) FROM Children").fetchall(),
+            [("integer",)])
+        self.assertEqual(conn.execute(
+            "SELECT COUNT(*), MIN(id_user) FROM Users").fetchone(), (84, 0))
+        db_manager.close_connection()
+
+    def test_similar_children_index(self):
+        database_name = os.path.join(self.directory.name, "users.sqlite3")
+        db_manager = DatabaseManager(database_name)
+        load_database(db_manager, "data")
+        db_manager.create_summary_tables()
+        conn = db_manager.conn
+        self.assertEqual(conn.execute(
+            """SELECT children FROM Parent_children
+               WHERE telephone_number = '636162531'""").fetchone(),
+            ("Andrew, 4; James, 13",))
+        ranked = conn.execute(
+            """SELECT Age_parents.index_parent FROM Age_parents
+               WHERE age = 4 ORDER BY rank""").fetchall()
+        expected = conn.execute(
+            """SELECT index_parent FROM Children WHERE age = 4
+               GROUP BY index_parent
+               ORDER BY MIN(name), MIN(rowid)""").fetchall()
+        self.assertEqual(ranked, expected)
+        db_manager.close_connection()
+
+    def test_passwords_hashed(self):
+        database_name = os.path.join(self.directory.name, "users.sqlite3")
+        db_manager = DatabaseManager(database_name)
+        load_database(db_manager, "data", 2)
+        password = db_manager.conn.execute(
+            """SELECT password FROM Users
+               WHERE email = 'kcabrera@example.net'""").fetchone()[0]
+        db_manager.close_connection()
+        self.assertTrue(password.startswith("pbkdf2_sha256$1000$"))
+        self.assertTrue(verify_password("gk2VM$qk@S", password))
+
+    def test_conflict_report(self):
+        database_name = os.path.join(self.directory.name, "users.sqlite3")
+        report_name = os.path.join(self.directory.name, "conflicts.csv")
+        self.assertEqual(
+            create_database({"database": database_name,
+                             "streaming": True, "chunksize": 7,
+                             "conflict_report": report_name}),
+            "Conflict reports cannot be written with "
+            "--incremental or --streaming.")
+        self.assertEqual(
+            create_database({"database": database_name,
+                             "conflict_report": report_name}),
+            "Database created.")
+        conflicts = pd.read_csv(report_name)
+        self.assertEqual(len(conflicts), 7)
+        conn = sqlite3.connect(database_name)
+        kept = {row[0] for row in conn.execute("SELECT id_user FROM Users")}
+        conn.close()
+        self.assertTrue(set(conflicts["kept_id_user"]) <= kept | set(
+            conflicts["id_user"]))
+        self.assertFalse(kept & set(conflicts["id_user"]))
+
+    def test_iter_json(self):
+        records = list(LoadData.iter_json("data/a/users.json", block_size=16))
+        self.assertEqual(len(records), 31)
+        self.assertEqual(records[0]["email"], "opoole@example.org")
+        self.assertEqual(records[2]["children"], [{"name": "Anna", "age": 18}])
+
+    def test_read_xml(self):
+        records = list(LoadData.read_xml("data/users_2.xml"))
+        self.assertEqual(len(records), 15)
+        self.assertEqual(records[0]["email"], "jwilliams@example.com")
+        self.assertEqual(records[0]["children"],
+                         [{"name": "Rebecca", "age": "11"},
+                          {"name": "Christie", "age": "17"}])
+        self.assertEqual(records[5]["children"], [])
+
+    def test_format_telephone(self):
+        user_processor = Users(pd.DataFrame({"telephone_number": [
+            "+48817730653", "(48)242024650", "00522263177",
+            "48 123 456 789", "018820162"]}))
+        user_processor.format_telephone()
+        self.assertEqual(user_processor.data["telephone_number"].tolist(),
+                         ["817730653", "242024650", "522263177",
+                          "123456789", "018820162"])
+
+    def test_format_creation_date(self):
+        user_processor = Users(pd.DataFrame({"created_at": pd.Series([
+            pd.Timestamp("2022-11-25 02:19:37"), "2023-05-15 21:57:02",
+            pd.Timestamp("2023-01-01 00:00:00.5"), np.nan, pd.NaT],
+            dtype=object)}))
+        user_processor.format_creation_date()
+        self.assertEqual(user_processor.data["created_at"].tolist(),
+                         ["2022-11-25 02:19:37", "2023-05-15 21:57:02",
+                          "2023-01-01 00:00:00.500000", "nan", "NaT"])
+
+    def test_process_children_data(self):
+        user_data = pd.DataFrame({"children": pd.Series([
+            "Anna (18),Mindy (11)", [{"name": "Rebecca", "age": "11"}],
+            np.nan, [], "", "Phillip (16)"], index=[7, 3, 5, 0, 2, 9],
+            dtype=object)})
+        children_df = Children(user_data).process_children_data()
+        self.assertEqual(
+            children_df.to_dict("records"),
+            [{"name": "Anna", "age": "18", "index_parent": 7},
+             {"name": "Mindy", "age": "11", "index_parent": 7},
+             {"name": "Rebecca", "age": "11", "index_parent": 3},
+             {"name": "Phillip", "age": "16", "index_parent": 9}])
@@ -1,17 +1,18 @@
 import os
+import tempfile
 import unittest
 import sqlite3
 
-import pandas as pd
-
 from src.database_manager import DatabaseManager
+from tests.helpers import run_script
 
 
 class TestDatabaseManager(unittest.TestCase):
 
     @classmethod
     def setUpClass(cls):
-        cls.test_db = 'test_database.db'
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.test_db = os.path.join(cls.directory.name, 'test_database.db')
         with sqlite3.connect(cls.test_db) as conn:
             cursor = conn.cursor()
             cursor.execute("CREATE TABLE test_table (id INTEGER, name TEXT)")
@@ -22,10 +23,41 @@ class TestDatabaseManager(unittest.TestCase):
 
     @classmethod
     def tearDownClass(cls):
-        os.remove(cls.test_db)
+        cls.directory.cleanup()
 
     def test_sql_query(self):
         db_manager = DatabaseManager(self.test_db)
         result = db_manager.sql_query('SELECT * FROM test_table')
-        expected = pd.DataFrame({'id': [1, 2], 'name': ['Alicja', 'Patryk']})
-        pd.testing.assert_frame_equal(result, expected)
+        self.assertEqual(result.columns, ['id', 'name'])
+        self.assertEqual(result.to_dicts(), [{'id': 1, 'name': 'Alicja'},
+                                             {'id': 2, 'name': 'Patryk'}])
+        self.assertEqual(result[1]['name'], 'Patryk')
+        db_manager.close_connection()
+
+    def test_sql_query_empty(self):
+        db_manager = DatabaseManager(self.test_db)
+        result = db_manager.sql_query(
+            'SELECT * FROM test_table WHERE id = :id', {'id': 3})
+        self.assertTrue(result.empty)
+        self.assertEqual(result.columns, ['id', 'name'])
+        db_manager.close_connection()
+
+    def test_iter_query(self):
+        db_manager = DatabaseManager(self.test_db)
+        rows = db_manager.iter_query(
+            'SELECT * FROM test_table ORDER BY id', chunksize=1)
+        self.assertEqual(dict(next(rows)), {'id': 1, 'name': 'Alicja'})
+        self.assertEqual([row['name'] for row in rows], ['Patryk'])
+        self.assertEqual(list(db_manager.iter_query(
+            'SELECT * FROM test_table WHERE id = 3')), [])
+        db_manager.close_connection()
+
+    def test_query_command_does_not_import_pandas(self):
+        result = run_script(
+            ['print-all-accounts', '--login', 'brenda74@example.org',
+             '--password', '+vJCXfFLe0'],
+            python_options=['-X', 'importtime'])
+        self.assertEqual(result.stdout, '84\n')
+        imported = [line.split('|')[-1].strip()
+                    for line in result.stderr.splitlines()]
+        self.assertNotIn('pandas', imported)
@@ -0,0 +1,81 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.dedupe import created_at_keys, dedupe_users
+
+
+def legacy_dedupe(data):
+    """
+    The sort and drop_duplicates passes used before dedupe_users.
+    """
+    data = data.sort_values(
+        by=["created_at"], ascending=False, kind="stable"
+    ).drop_duplicates(subset=["email"], keep="last")
+    return data.drop_duplicates(subset=["telephone_number"], keep="last")
+
+
+def random_users(rng, rows):
+    """
+    Builds users with many shared emails, telephone numbers and dates,
+    sometimes with dates in other formats than format_creation_date's.
+    """
+    dates = [f"2023-0{rng.integers(1, 4)}-1{rng.integers(0, 3)} "
+             f"0{rng.integers(0, 2)}:00:0{rng.integers(0, 3)}"
+             for _ in range(rows)]
+    if rows and rng.random() < 0.3:
+        others = ["2023-1-5 1:00:00", "2023-01-10 00:00:00.500000",
+                  "2023-01-10 00:00:61", "yesterday", "2022-12-31"]
+        for row in rng.choice(rows, size=rows // 4 + 1):
+            dates[row] = others[rng.integers(len(others))]
+    return pd.DataFrame({
+        "email": [f"user{value}@example.com"
+                  for value in rng.integers(rows // 2 + 1, size=rows)],
+        "telephone_number": [f"{value:09d}"
+                             for value in rng.integers(rows // 2 + 1,
+                                                       size=rows)],
+        "created_at": pd.Series(dates, dtype=str),
+    }, index=rng.permutation(rows * 2)[:rows])
+
+
+class TestDedupe(unittest.TestCase):
+
+    def test_same_as_sort_and_drop_duplicates(self):
+        rng = np.random.default_rng(0)
+        for trial in range(100):
+            data = random_users(rng, int(rng.integers(0, 40)))
+            users, conflicts = dedupe_users(data)
+            pd.testing.assert_frame_equal(users, legacy_dedupe(data))
+            self.assertEqual(sorted(conflicts["id_user"].tolist()
+                                    + users.index.tolist()),
+                             sorted(data.index.tolist()))
+
+    def test_conflict_report(self):
+        data = pd.DataFrame({
+            "email": ["a@x.pl", "a@x.pl", "b@x.pl", "c@x.pl"],
+            "telephone_number": ["1", "2", "2", "3"],
+            "created_at": ["2023-01-02 00:00:00", "2023-01-01 00:00:00",
+                           "2023-01-01 00:00:00", "2023-01-01 00:00:00"],
+        }, index=[10, 11, 12, 13])
+        users, conflicts = dedupe_users(data)
+        self.assertEqual(users.index.tolist(), [12, 13])
+        self.assertEqual(conflicts.to_dict("records"), [
+            {"id_user": 10, "kept_id_user": 11, "conflict": "email",
+             "reason": "created earlier"},
+            {"id_user": 11, "kept_id_user": 12,
+             "conflict": "telephone_number",
+             "reason": "same created_at, read later"}])
+
+    def test_created_at_keys(self):
+        dates = pd.Series(["2023-05-15 21:57:02", "2021-11-13 01:28:53",
+                           "2023-05-15 21:57:02"], dtype=str)
+        self.assertEqual(created_at_keys(dates).dtype, np.int64)
+        self.assertEqual(np.argsort(created_at_keys(dates),
+                                    kind="stable").tolist(), [1, 0, 2])
+        # Compared as strings, not as dates or rolled over seconds.
+        for date, order in (("2023-5-15 1:00:00", [0, 2, 1]),
+                            ("2023-05-15 21:56:62", [1, 0, 2])):
+            dates[1] = date
+            self.assertEqual(np.argsort(created_at_keys(dates),
+                                        kind="stable").tolist(), order)
@@ -0,0 +1,123 @@
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from src.account_actions import AccountActions
+from src.database_manager import DatabaseManager
+from src.output import write_rows
+from src.memory_store import (MemoryAccountActions, MemoryBatchAccountActions,
+                              MemoryUserManager)
+from src.user_manager import UserManager
+from tests.helpers import shared_database
+
+ADMIN = {"login": "brenda74@example.org", "password": "+vJCXfFLe0"}
+USERS = [{"login": "kcabrera@example.net", "password": "gk2VM$qk@S"},
+         {"login": "504140673", "password": "@9TcRo15As"},
+         {"login": "justin81@example.org", "password": "*0pED9u@8b"}]
+
+
+class TestMemoryStore(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.database_name = os.path.join(self.directory.name,
+                                          "users.sqlite3")
+        shutil.copy(shared_database(), self.database_name)
+        self.db_manager = DatabaseManager(self.database_name)
+        self.account_actions = AccountActions(UserManager(self.db_manager))
+        self.memory_actions = MemoryAccountActions(
+            MemoryUserManager(self.db_manager))
+
+    def tearDown(self):
+        self.db_manager.close_connection()
+        self.directory.cleanup()
+
+    def test_same_output_as_sqlite(self):
+        for method in ("print_all_accounts", "print_oldest_account",
+                       "group_by_age", "check_summary_tables"):
+            self.assertEqual(getattr(self.memory_actions, method)(ADMIN),
+                             getattr(self.account_actions, method)(ADMIN))
+        for args in USERS:
+            for method in ("print_children",
+                           "find_similar_children_by_age"):
+                self.assertEqual(
+                    getattr(self.memory_actions, method)(args),
+                    getattr(self.account_actions, method)(args))
+
+    def test_same_rows_as_sqlite(self):
+        for command, args, admin in (
+                [("group_by_age", ADMIN, True)]
+                + [(command, args, False) for args in USERS
+                   for command in ("print_children",
+                                   "find_similar_children_by_age")]):
+            for output_format in ("jsonl", "csv"):
+                outputs = []
+                for actions in (self.account_actions, self.memory_actions):
+                    stream = io.StringIO()
+                    write_rows(command,
+                               actions.command_rows(command, args, admin),
+                               output_format, stream)
+                    outputs.append(stream.getvalue())
+                self.assertEqual(outputs[1], outputs[0])
+
+    def test_invalid_login(self):
+        self.assertEqual(self.memory_actions.print_all_accounts(USERS[0]),
+                         "Invalid Login")
+        self.assertEqual(self.memory_actions.print_children(
+            dict(USERS[0], password="xyz")), "Invalid Login")
+        self.assertEqual(self.memory_actions.print_children(
+            {"login": "nobody@example.com", "password": "xyz"}),
+            "Invalid Login")
+
+    def test_no_result(self):
+        with self.assertRaises(SystemExit):
+            self.memory_actions.print_children(
+                {"login": "carterlindsey@example.org",
+                 "password": "+sUVpIkkY6"})
+
+    def test_compact_columns(self):
+        self.memory_actions.print_all_accounts(ADMIN)
+        store = self.memory_actions.user_manager.store
+        self.assertEqual(store.email_index.find("esexton@example.net"),
+                         store.telephone_index.find("636162531"))
+        self.assertEqual(len(store.firstname.values),
+                         len(set(store.firstname.values)))
+        self.assertEqual(store.child_offsets[-1], len(store.child_index))
+        self.assertEqual(store.children(store.find_users("636162531")),
+                         ["Andrew, 4", "James, 13"])
+        self.assertLess(store.nbytes / store.user_count(), 512)
+
+    def test_reloaded_for_new_generation(self):
+        self.memory_actions.print_all_accounts(ADMIN)
+        store = self.memory_actions.user_manager.store
+        self.memory_actions.print_all_accounts(ADMIN)
+        self.assertIs(self.memory_actions.user_manager.store, store)
+        with sqlite3.connect(self.database_name) as conn:
+            conn.execute("DELETE FROM Users WHERE email = ?",
+                         (USERS[0]["login"],))
+            conn.execute("UPDATE Users_summary SET user_count = 83")
+            conn.execute("UPDATE Database_generation SET generation = 1")
+        conn.close()
+        self.assertEqual(self.memory_actions.print_all_accounts(ADMIN), 83)
+        self.assertEqual(self.memory_actions.print_children(USERS[0]),
+                         "Invalid Login")
+
+    def test_batch(self):
+        batch_actions = MemoryBatchAccountActions(self.memory_actions,
+                                                  chunksize=2)
+        requests = [dict(args, command=command) for args in USERS
+                    for command in ("print-children",
+                                    "find-similar-children-by-age")]
+        requests += [dict(ADMIN, command="group-by-age"),
+                     dict(USERS[0], command="print-all-accounts")]
+        responses = list(batch_actions.run(
+            [json.dumps(request) for request in requests]))
+        for request, response in zip(requests, responses):
+            method = request["command"].replace("-", "_")
+            self.assertEqual(
+                response["output"],
+                getattr(self.account_actions, method)(request))
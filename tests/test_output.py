@@ -0,0 +1,29 @@
+import io
+import unittest
+
+from src.output import write_rows
+
+ROWS = [{"name": "Andrew", "age": 4}, {"name": "James", "age": 13}]
+
+
+class TestWriteRows(unittest.TestCase):
+
+    def write(self, rows, output_format):
+        stream = io.StringIO()
+        write_rows("print_children", rows, output_format, stream)
+        return stream.getvalue()
+
+    def test_csv(self):
+        self.assertEqual(self.write(ROWS, "csv"),
+                         "name,age\nAndrew,4\nJames,13\n")
+
+    def test_empty_csv_without_header(self):
+        self.assertEqual(self.write([], "csv"), "")
+
+    def test_jsonl(self):
+        self.assertEqual(self.write(ROWS, "jsonl"),
+                         '{"name": "Andrew", "age": 4}\n'
+                         '{"name": "James", "age": 13}\n')
+
+    def test_text(self):
+        self.assertEqual(self.write(ROWS, "text"), "Andrew, 4\nJames, 13\n")
@@ -0,0 +1,100 @@
+import io
+import sqlite3
+import unittest
+
+from src.account_actions import AccountActions
+from src.database_manager import DatabaseManager
+from src.output import write_rows
+from src.parallel_actions import ParallelAccountActions
+from src.user_manager import UserManager
+from tests.helpers import shared_database
+
+USERS = [{"login": "kcabrera@example.net", "password": "gk2VM$qk@S"},
+         {"login": "504140673", "password": "@9TcRo15As"},
+         {"login": "636162531", "password": "eFaU94Jc#&"}]
+
+
+class TestParallelAccountActions(unittest.TestCase):
+
+    def setUp(self):
+        self.db_manager = DatabaseManager(shared_database())
+        self.account_actions = AccountActions(UserManager(self.db_manager))
+        # Chunks of two parents, so every report is read by the workers.
+        self.parallel_actions = ParallelAccountActions(
+            UserManager(DatabaseManager(shared_database())), workers=2,
+            chunksize=2)
+
+    def tearDown(self):
+        self.parallel_actions.close()
+        self.parallel_actions.user_manager.db_manager.close_connection()
+        self.db_manager.close_connection()
+
+    def test_same_report_as_account_actions(self):
+        for args in USERS:
+            self.assertEqual(
+                self.parallel_actions.find_similar_children_by_age(args),
+                self.account_actions.find_similar_children_by_age(args))
+        self.assertIsNotNone(self.parallel_actions.executor)
+
+    def test_same_report_for_every_user(self):
+        conn = sqlite3.connect(shared_database())
+        logins = [row[0] for row in conn.execute(
+            """SELECT telephone_number FROM USERS WHERE id_user IN
+               (SELECT index_parent FROM CHILDREN)""")]
+        conn.close()
+        for login in logins:
+            self.assertEqual(
+                self.parallel_actions.similar_children_report(
+                    {"login": login}),
+                self.account_actions.similar_children_report(
+                    {"login": login}))
+
+    def test_same_rows_as_account_actions(self):
+        for args in USERS:
+            self.assertEqual(
+                list(self.parallel_actions.similar_children_rows(args)),
+                list(self.account_actions.similar_children_rows(args)))
+
+    def test_single_chunk_read_in_process(self):
+        self.parallel_actions.chunksize = 10_000
+        self.assertEqual(
+            self.parallel_actions.similar_children_report(USERS[2]),
+            self.account_actions.similar_children_report(USERS[2]))
+        self.assertIsNone(self.parallel_actions.executor)
+
+    def test_chunks_keep_report_order(self):
+        chunks, separator, telephone_result = (
+            self.parallel_actions.parent_chunks(USERS[2]))
+        self.assertTrue(all(len(chunk) <= 2 for chunk in chunks))
+        self.assertEqual(separator.strip(), ",")
+        self.assertEqual(telephone_result, "636162531")
+        parents = [parent for chunk in chunks for parent in chunk]
+        self.assertEqual(len(parents), len(set(parents)))
+
+    def test_streamed_formats(self):
+        for output_format in ("jsonl", "csv"):
+            outputs = []
+            for actions in (self.parallel_actions, self.account_actions):
+                output = io.StringIO()
+                write_rows("find_similar_children_by_age",
+                           actions.command_rows(
+                               "find_similar_children_by_age", USERS[0],
+                               False),
+                           output_format, output)
+                outputs.append(output.getvalue())
+            self.assertEqual(outputs[0], outputs[1])
+
+    def test_no_children(self):
+        with self.assertRaises(SystemExit):
+            self.parallel_actions.similar_children_report(
+                {"login": "nobody@example.com"})
+
+    def test_invalid_login(self):
+        self.assertEqual(
+            self.parallel_actions.find_similar_children_by_age(
+                {"login": USERS[0]["login"], "password": "xyz"}),
+            "Invalid Login")
+
+
+if __name__ == "__main__":
+    unittest.main()
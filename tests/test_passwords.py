@@ -0,0 +1,68 @@
+import unittest
+from unittest import mock
+
+from src.passwords import PasswordVerifier, hash_password, verify_password
+from src.result_cache import ResultCache
+
+
+class TestPasswords(unittest.TestCase):
+
+    def test_hash_and_verify(self):
+        encoded = hash_password("gk2VM$qk@S", iterations=1000)
+        self.assertTrue(encoded.startswith("pbkdf2_sha256$1000$"))
+        self.assertNotIn("gk2VM$qk@S", encoded)
+        self.assertTrue(verify_password("gk2VM$qk@S", encoded))
+        self.assertFalse(verify_password("gk2VM$qk@s", encoded))
+        self.assertNotEqual(hash_password("gk2VM$qk@S", iterations=1000),
+                            encoded)
+
+    def test_legacy_plaintext(self):
+        self.assertTrue(verify_password("+vJCXfFLe0", "+vJCXfFLe0"))
+        self.assertFalse(verify_password("+vJCXfFLe", "+vJCXfFLe0"))
+        self.assertFalse(verify_password("+vJCXfFLe0", None))
+
+
+class TestPasswordVerifier(unittest.TestCase):
+
+    def setUp(self):
+        self.encoded = hash_password("gk2VM$qk@S", iterations=1000)
+        self.verifier = PasswordVerifier()
+
+    def test_success_cached(self):
+        self.assertTrue(self.verifier.verify("kcabrera@example.net",
+                                             "gk2VM$qk@S", self.encoded))
+        with mock.patch("src.passwords.verify_password") as verify:
+            self.assertTrue(self.verifier.verify("kcabrera@example.net",
+                                                 "gk2VM$qk@S", self.encoded))
+            verify.assert_not_called()
+        self.assertEqual(self.verifier.cache.stats()["hits"], 1)
+
+    def test_password_not_in_cache_key(self):
+        key = self.verifier.credential_key("kcabrera@example.net",
+                                           "gk2VM$qk@S")
+        self.assertNotIn("gk2VM$qk@S", key)
+        self.assertNotEqual(
+            key, PasswordVerifier().credential_key("kcabrera@example.net",
+                                                   "gk2VM$qk@S"))
+
+    def test_failure_not_cached(self):
+        for _ in range(2):
+            self.assertFalse(self.verifier.verify(
+                "kcabrera@example.net", "wrong", self.encoded))
+        self.assertEqual(self.verifier.cache.stats()["entries"], 0)
+
+    def test_changed_hash_verified_again(self):
+        self.verifier.verify("kcabrera@example.net", "gk2VM$qk@S",
+                             self.encoded)
+        changed = hash_password("new password", iterations=1000)
+        self.assertFalse(self.verifier.verify(
+            "kcabrera@example.net", "gk2VM$qk@S", changed))
+
+    def test_expired_verified_again(self):
+        verifier = PasswordVerifier(ResultCache(ttl=-1))
+        verifier.verify("kcabrera@example.net", "gk2VM$qk@S", self.encoded)
+        with mock.patch("src.passwords.verify_password",
+                        return_value=True) as verify:
+            verifier.verify("kcabrera@example.net", "gk2VM$qk@S",
+                            self.encoded)
+            verify.assert_called_once()
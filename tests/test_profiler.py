@@ -0,0 +1,112 @@
+import json
+import os
+import tempfile
+import unittest
+
+from src.account_actions import AccountActions
+from src.database_manager import DatabaseManager
+from src.profiler import Profiler
+from src.user_manager import UserManager
+from tests.helpers import run_script, shared_database
+
+USER = {"login": "504140673", "password": "@9TcRo15As"}
+
+
+class TestProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = Profiler(slow_query_seconds=0)
+        self.db_manager = DatabaseManager(shared_database(), self.profiler)
+        self.account_actions = AccountActions(UserManager(self.db_manager))
+
+    def tearDown(self):
+        self.db_manager.close_connection()
+
+    def test_statements_recorded(self):
+        with self.profiler.command("print-children"):
+            result = self.account_actions.print_children(USER)
+        self.assertEqual(result, 'Jackie, 9\nMitchell, 6')
+        self.assertEqual([command["command"]
+                          for command in self.profiler.commands],
+                         ["print-children"])
+        credentials, children = self.profiler.statements
+        self.assertEqual(credentials["rows"], 1)
+        self.assertEqual(children["rows"], 2)
+        self.assertGreater(credentials["connection_seconds"],
+                           children["connection_seconds"])
+        for key in ("seconds", "execute_seconds", "fetch_seconds"):
+            self.assertGreaterEqual(children[key], 0)
+
+    def test_full_scan_of_slow_query(self):
+        self.db_manager.sql_query(
+            "SELECT COUNT(*) FROM CHILDREN WHERE name LIKE '%a%'")
+        children = self.profiler.statements[-1]
+        self.assertIn("SCAN CHILDREN", children["plan"])
+        self.assertEqual(children["full_scans"], ["CHILDREN"])
+
+    def test_children_read_by_index(self):
+        self.account_actions.print_children(USER)
+        credentials, children = self.profiler.statements
+        self.assertEqual(credentials["full_scans"], [])
+        self.assertIn("SEARCH CHILDREN USING INDEX ix_Children_index_parent"
+                      " (index_parent=?)", children["plan"])
+        self.assertEqual(children["full_scans"], [])
+
+    def test_fast_query_has_no_plan(self):
+        self.profiler.slow_query_seconds = 60
+        self.account_actions.print_children(USER)
+        self.assertNotIn("plan", self.profiler.statements[-1])
+
+    def test_failed_query_recorded(self):
+        with self.assertRaises(SystemExit):
+            self.db_manager.sql_query("SELECT * FROM missing_table")
+        self.assertIn("no such table", self.profiler.statements[0]["error"])
+
+    def test_prometheus_dump(self):
+        self.account_actions.print_children(USER)
+        lines = self.profiler.to_prometheus().splitlines()
+        self.assertIn("# TYPE users_sql_full_scans_total counter", lines)
+        self.assertIn('users_sql_rows_total{statement="SELECT CHILDREN.name,'
+                      ' CHILDREN.age FROM USERS JOIN CHILDREN ON'
+                      ' CHILDREN.index_parent = USERS.id_user WHERE'
+                      ' USERS.email=:login OR USERS.telephone_number=:login'
+                      ' ORDER BY CHILDREN.name"} 2', lines)
+
+    def test_script_profile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output_name = os.path.join(directory, "profile.json")
+            result = run_script(
+                ["--profile", "json", "--profile-output", output_name,
+                 "print-all-accounts", "--login", "brenda74@example.org",
+                 "--password", "+vJCXfFLe0"])
+            with open(output_name) as handle:
+                profile = json.load(handle)
+        self.assertEqual(result.stdout, "84\n")
+        self.assertEqual(profile["commands"][0]["command"],
+                         "print-all-accounts")
+        self.assertTrue(profile["statements"])
+
+    def test_script_profile_without_result(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output_name = os.path.join(directory, "profile.json")
+            run_script(
+                ["--profile", "json", "--profile-output", output_name,
+                 "print-children", "--login", "carterlindsey@example.org",
+                 "--password", "+sUVpIkkY6"])
+            with open(output_name) as handle:
+                profile = json.load(handle)
+        self.assertEqual(profile["commands"][0]["command"], "print-children")
+        self.assertEqual(profile["statements"][-1]["rows"], 0)
+
+    def test_script_profile_of_missing_database(self):
+        with tempfile.TemporaryDirectory() as directory:
+            output_name = os.path.join(directory, "profile.json")
+            result = run_script(
+                ["--profile", "json", "--profile-output", output_name,
+                 "print-children", "--login", "504140673",
+                 "--password", "@9TcRo15As"], cwd=directory)
+            with open(output_name) as handle:
+                profile = json.load(handle)
+        self.assertIn("Fail load database", result.stderr)
+        self.assertIn("unable to open database",
+                      profile["statements"][0]["error"])
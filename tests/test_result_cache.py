@@ -0,0 +1,256 @@
+import io
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from src.account_actions import AccountActions
+from src.database_manager import DatabaseManager
+from src.result_cache import (CachedAccountActions, DiskCache, ResultCache,
+                              disk_cache_name)
+from src.user_manager import UserManager
+from tests.helpers import run_script, shared_database
+
+ADMIN = {"login": "brenda74@example.org", "password": "+vJCXfFLe0"}
+USER = {"login": "636162531", "password": "eFaU94Jc#&"}
+
+
+class TestResultCache(unittest.TestCase):
+
+    def test_get_and_put(self):
+        cache = ResultCache()
+        self.assertIsNone(cache.get("key", 1))
+        cache.put("key", 1, "result")
+        self.assertEqual(cache.get("key", 1), "result")
+        self.assertEqual(cache.stats(),
+                         {"hits": 1, "misses": 1, "entries": 1})
+
+    def test_other_generation_misses(self):
+        cache = ResultCache()
+        cache.put("key", 1, "result")
+        self.assertIsNone(cache.get("key", 2))
+        self.assertEqual(cache.stats()["entries"], 0)
+
+    def test_least_recently_used_evicted(self):
+        cache = ResultCache(maxsize=2)
+        cache.put("a", 1, "a")
+        cache.put("b", 1, "b")
+        cache.get("a", 1)
+        cache.put("c", 1, "c")
+        self.assertEqual(cache.get("a", 1), "a")
+        self.assertIsNone(cache.get("b", 1))
+
+    def test_expired_result_misses(self):
+        cache = ResultCache(ttl=10)
+        with mock.patch("src.result_cache.time.monotonic", return_value=0):
+            cache.put("key", 1, "result")
+        with mock.patch("src.result_cache.time.monotonic", return_value=11):
+            self.assertIsNone(cache.get("key", 1))
+
+
+class TestDiskCache(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_name = os.path.join(self.directory.name, "cache.sqlite3")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_result_kept_between_runs(self):
+        cache = DiskCache(self.cache_name)
+        cache.put("key", 1, 84)
+        cache.close()
+        cache = DiskCache(self.cache_name)
+        self.assertEqual(cache.get("key", 1), 84)
+        self.assertIsNone(cache.get("key", 2))
+        self.assertEqual(cache.stats(),
+                         {"hits": 1, "misses": 1, "entries": 1})
+        cache.close()
+
+    def test_new_generation_removes_old_results(self):
+        cache = DiskCache(self.cache_name)
+        cache.put("a", 1, "a")
+        cache.put("b", 2, "b")
+        self.assertIsNone(cache.get("a", 1))
+        self.assertEqual(cache.stats()["entries"], 1)
+        cache.close()
+
+    def test_cache_name_next_to_database(self):
+        self.assertEqual(disk_cache_name("/data/users.sqlite3"),
+                         "/data/users.cache.sqlite3")
+
+    def test_unwritable_cache_ignored(self):
+        cache = DiskCache(os.path.join(self.directory.name, "missing",
+                                       "cache.sqlite3"))
+        cache.put("key", 1, 84)
+        self.assertIsNone(cache.get("key", 1))
+        self.assertIsNone(cache.stats())
+        cache.close()
+
+    def test_locked_cache_ignored(self):
+        cache = DiskCache(self.cache_name)
+        cache.put("key", 1, 84)
+        conn = sqlite3.connect(self.cache_name)
+        conn.execute("BEGIN EXCLUSIVE")
+        cache.put("key", 1, 42)
+        self.assertIsNone(cache.get("key", 1))
+        conn.rollback()
+        conn.close()
+        self.assertEqual(cache.get("key", 1), 84)
+        self.assertEqual(cache.stats(),
+                         {"hits": 1, "misses": 0, "entries": 1})
+        cache.close()
+
+
+class TestDiskCacheKeys(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_name = os.path.join(self.directory.name, "cache.sqlite3")
+        self.db_manager = DatabaseManager(shared_database())
+        self.cache = DiskCache(self.cache_name)
+        self.cached_actions = CachedAccountActions(
+            AccountActions(UserManager(self.db_manager)), self.cache)
+
+    def tearDown(self):
+        self.cache.close()
+        self.db_manager.close_connection()
+        self.directory.cleanup()
+
+    def test_keys_without_password(self):
+        self.cached_actions.print_children(USER)
+        self.cached_actions.print_all_accounts(ADMIN)
+        self.cache.close()
+        with sqlite3.connect(self.cache_name) as conn:
+            keys = [row[0] for row in conn.execute(
+                "SELECT key FROM Results ORDER BY key")]
+        self.assertEqual(keys, ['["print_all_accounts", null]',
+                                '["print_children", "636162531"]'])
+
+    def test_results_keyed_by_password_dropped(self):
+        with sqlite3.connect(self.cache_name) as conn:
+            conn.execute("""CREATE TABLE Results (key TEXT PRIMARY KEY,
+                            generation INTEGER, result TEXT)""")
+            conn.execute("INSERT INTO Results VALUES ('0123abcd', 1, '84')")
+        conn.close()
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+
+class TestCachedAccountActions(unittest.TestCase):
+
+    def setUp(self):
+        self.db_manager = DatabaseManager(shared_database())
+        self.account_actions = AccountActions(UserManager(self.db_manager))
+        self.cached_actions = CachedAccountActions(self.account_actions,
+                                                   ResultCache())
+
+    def tearDown(self):
+        self.db_manager.close_connection()
+
+    def test_same_result_from_cache(self):
+        expected = self.account_actions.group_by_age(ADMIN)
+        self.assertEqual(self.cached_actions.group_by_age(ADMIN), expected)
+        with mock.patch.object(self.account_actions,
+                               "command_report") as run:
+            self.assertEqual(self.cached_actions.group_by_age(ADMIN),
+                             expected)
+        run.assert_not_called()
+        self.assertEqual(self.cached_actions.cache.stats()["hits"], 1)
+
+    def test_cached_result_needs_same_password(self):
+        self.cached_actions.print_all_accounts(ADMIN)
+        result = self.cached_actions.print_all_accounts(
+            {"login": ADMIN["login"], "password": "xyz"})
+        self.assertEqual(result, "Invalid Login")
+
+    def test_invalid_login_not_cached(self):
+        result = self.cached_actions.print_all_accounts(
+            {"login": ADMIN["login"], "password": "xyz"})
+        self.assertEqual(result, "Invalid Login")
+        self.assertEqual(self.cached_actions.cache.stats()["entries"], 0)
+
+    def test_admin_reports_shared_by_admins(self):
+        expected = self.cached_actions.group_by_age(ADMIN)
+        with mock.patch.object(self.account_actions,
+                               "command_report") as run:
+            self.assertEqual(self.cached_actions.group_by_age(USER),
+                             expected)
+        run.assert_not_called()
+
+    def test_new_generation_runs_command(self):
+        self.cached_actions.print_all_accounts(ADMIN)
+        with mock.patch.object(self.cached_actions, "generation",
+                               return_value=0):
+            self.cached_actions.print_all_accounts(ADMIN)
+        self.assertEqual(self.cached_actions.cache.stats(),
+                         {"hits": 0, "misses": 2, "entries": 1})
+
+    def test_stream(self):
+        for output_format, expected in (
+                ("text", "Andrew, 4\nJames, 13\n"),
+                ("jsonl", '{"name": "Andrew", "age": 4}\n'
+                          '{"name": "James", "age": 13}\n'),
+                ("csv", "name,age\nAndrew,4\nJames,13\n")):
+            stream = io.StringIO()
+            self.cached_actions.stream("print_children", USER, False,
+                                       output_format, stream)
+            self.assertEqual(stream.getvalue(), expected)
+        stream = io.StringIO()
+        with mock.patch.object(self.account_actions,
+                               "report_rows") as report_rows:
+            self.cached_actions.stream("print_children", USER, False,
+                                       "text", stream)
+        report_rows.assert_not_called()
+        self.assertEqual(stream.getvalue(), "Andrew, 4\nJames, 13\n")
+
+    def test_stream_long_result_not_cached(self):
+        with mock.patch("src.result_cache.STREAMED_RESULT_LIMIT", 10):
+            self.cached_actions.stream("print_children", USER, False,
+                                       "text", io.StringIO())
+        self.assertEqual(self.cached_actions.cache.stats()["entries"], 0)
+
+    def test_stream_invalid_login(self):
+        stream = io.StringIO()
+        self.cached_actions.stream("group_by_age",
+                                   dict(USER, password="xyz"), True,
+                                   "jsonl", stream)
+        self.assertEqual(stream.getvalue(), "Invalid Login\n")
+
+    def test_cache_stats(self):
+        self.cached_actions.print_children(
+            {"login": "504140673", "password": "@9TcRo15As"})
+        self.assertEqual(self.cached_actions.cache_stats(ADMIN),
+                         "hits: 0\nmisses: 1\nentries: 1")
+
+    def test_cache_stats_unavailable(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.cached_actions.cache = DiskCache(
+                os.path.join(directory, "missing", "cache.sqlite3"))
+            self.assertEqual(self.cached_actions.cache_stats(ADMIN),
+                             "Result cache is not available.")
+
+
+class TestCacheOptions(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache_name = os.path.join(self.directory.name, "cache.sqlite3")
+        self.login = ["--login", ADMIN["login"],
+                      "--password", ADMIN["password"]]
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_cache_file(self):
+        result = run_script(["--cache-file", self.cache_name,
+                             "print-all-accounts", *self.login])
+        self.assertEqual(result.stdout, "84\n")
+        self.assertTrue(os.path.exists(self.cache_name))
+
+    def test_no_cache(self):
+        result = run_script(["--cache-file", self.cache_name, "--no-cache",
+                             "print-all-accounts", *self.login])
+        self.assertEqual(result.stdout, "84\n")
+        self.assertFalse(os.path.exists(self.cache_name))
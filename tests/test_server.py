@@ -0,0 +1,61 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from src.account_actions import AccountActions
+from src.client import QueryClient
+from src.database_manager import DatabaseManager
+from src.server import QueryServer
+from src.user_manager import UserManager
+from tests.helpers import shared_database
+
+
+class TestServer(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.socket_path = os.path.join(cls.directory.name, "users.sock")
+        cls.db_manager = DatabaseManager(shared_database())
+        cls.account_actions = AccountActions(UserManager(cls.db_manager))
+        cls.server = QueryServer(cls.socket_path, cls.account_actions)
+        cls.thread = threading.Thread(target=cls.server.serve_forever)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.thread.join()
+        cls.db_manager.close_connection()
+        cls.directory.cleanup()
+
+    def setUp(self):
+        self.client = QueryClient(self.socket_path)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_same_output_as_account_actions(self):
+        args = {"login": "kcabrera@example.net", "password": "gk2VM$qk@S"}
+        self.assertEqual(
+            self.client.run("find-similar-children-by-age", **args),
+            self.account_actions.find_similar_children_by_age(args))
+        self.assertEqual(
+            self.client.run("print-all-accounts", "brenda74@example.org",
+                            "+vJCXfFLe0"), "84")
+
+    def test_invalid_login(self):
+        self.assertEqual(
+            self.client.run("print-all-accounts", "736121560",
+                            "n(9vNQ$jqO"), "Invalid Login")
+
+    def test_no_result(self):
+        self.assertIsNone(
+            self.client.run("print-children", "carterlindsey@example.org",
+                            "+sUVpIkkY6"))
+
+    def test_unknown_command(self):
+        with self.assertRaises(ValueError):
+            self.client.run("drop-database", "736121560", "n(9vNQ$jqO")
@@ -0,0 +1,99 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from src.account_actions import AccountActions
+from src.create_database import create_database
+from src.database_manager import DatabaseManager
+from src.profiler import Profiler
+from src.sharding import (ShardedAccountActions, ShardedDatabaseManager,
+                          shard_names, shard_of)
+from src.user_manager import UserManager
+from tests.helpers import shared_database
+
+ADMIN = {"login": "brenda74@example.org", "password": "+vJCXfFLe0"}
+USERS = [{"login": "kcabrera@example.net", "password": "gk2VM$qk@S"},
+         {"login": "504140673", "password": "@9TcRo15As"}]
+
+
+class TestSharding(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.database_name = os.path.join(cls.directory.name, "users.sqlite3")
+        cls.message = create_database({"database": cls.database_name,
+                                       "shards": 3, "hash_iterations": 1000})
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def setUp(self):
+        self.sharded_db_manager = ShardedDatabaseManager(
+            shard_names(self.database_name, 3))
+        self.sharded_actions = ShardedAccountActions(
+            UserManager(self.sharded_db_manager))
+        self.db_manager = DatabaseManager(shared_database())
+        self.account_actions = AccountActions(UserManager(self.db_manager))
+
+    def tearDown(self):
+        self.sharded_db_manager.close_connection()
+        self.db_manager.close_connection()
+
+    def test_shard_names(self):
+        self.assertEqual(shard_names("users.sqlite3", 2),
+                         ["users.shard0.sqlite3", "users.shard1.sqlite3"])
+
+    def test_users_partitioned_with_children(self):
+        self.assertEqual(self.message, "Database created in 3 shards.")
+        self.assertFalse(os.path.exists(self.database_name))
+        user_count = 0
+        for shard, name in enumerate(shard_names(self.database_name, 3)):
+            conn = sqlite3.connect(name)
+            ids = [row[0] for row in conn.execute(
+                "SELECT id_user FROM Users")]
+            orphans = conn.execute(
+                """SELECT COUNT(*) FROM Children WHERE index_parent NOT IN
+                   (SELECT id_user FROM Users)""").fetchone()[0]
+            conn.close()
+            self.assertTrue(ids)
+            self.assertEqual({shard_of(id_user, 3) for id_user in ids},
+                             {shard})
+            self.assertEqual(orphans, 0)
+            user_count += len(ids)
+        self.assertEqual(user_count, 84)
+
+    def test_same_output_as_single_database(self):
+        for method in ("print_all_accounts", "print_oldest_account",
+                       "group_by_age", "check_summary_tables"):
+            self.assertEqual(getattr(self.sharded_actions, method)(ADMIN),
+                             getattr(self.account_actions, method)(ADMIN))
+        for args in USERS:
+            for method in ("print_children",
+                           "find_similar_children_by_age"):
+                self.assertEqual(
+                    getattr(self.sharded_actions, method)(args),
+                    getattr(self.account_actions, method)(args))
+
+    def test_invalid_login(self):
+        self.assertEqual(self.sharded_actions.print_all_accounts(USERS[0]),
+                         "Invalid Login")
+
+    def test_no_result(self):
+        with self.assertRaises(SystemExit):
+            self.sharded_actions.print_children(
+                {"login": "carterlindsey@example.org",
+                 "password": "+sUVpIkkY6"})
+
+    def test_profiler_records_every_shard(self):
+        self.sharded_db_manager.profiler = Profiler()
+        self.sharded_actions.all_accounts_report()
+        self.assertEqual(len(self.sharded_db_manager.profiler.statements), 3)
+
+    def test_streaming_not_sharded(self):
+        message = create_database({
+            "database": os.path.join(self.directory.name, "other.sqlite3"),
+            "shards": 2, "streaming": True, "chunksize": 10})
+        self.assertIn("cannot be created", message)
@@ -0,0 +1,85 @@
+import importlib.util
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from src.account_actions import AccountActions
+from src.database_manager import DatabaseManager
+from src.snapshot import open_snapshot
+from src.user_manager import UserManager
+from tests.helpers import shared_database
+
+ADMIN = {"login": "brenda74@example.org", "password": "+vJCXfFLe0"}
+
+
+@unittest.skipUnless(importlib.util.find_spec("pyarrow"),
+                     "pyarrow is not installed")
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        from src.snapshot import (ArrowSnapshot, SnapshotAccountActions,
+                                  write_snapshots)
+
+        self.directory = tempfile.TemporaryDirectory()
+        self.database_name = os.path.join(self.directory.name,
+                                          "users.sqlite3")
+        shutil.copy(shared_database(), self.database_name)
+        snapshot_directory = os.path.join(self.directory.name, "snapshots")
+        with sqlite3.connect(self.database_name) as conn:
+            write_snapshots(conn, snapshot_directory, chunksize=10)
+        self.snapshot = ArrowSnapshot(snapshot_directory)
+        self.db_manager = DatabaseManager(self.database_name)
+        user_manager = UserManager(self.db_manager)
+        self.account_actions = AccountActions(user_manager)
+        self.snapshot_actions = SnapshotAccountActions(user_manager,
+                                                       self.snapshot)
+
+    def tearDown(self):
+        self.db_manager.close_connection()
+        self.directory.cleanup()
+
+    def test_same_output_as_sqlite(self):
+        for method in ("print_all_accounts", "print_oldest_account",
+                       "group_by_age", "check_summary_tables"):
+            self.assertEqual(
+                getattr(self.snapshot_actions, method)(ADMIN),
+                getattr(self.account_actions, method)(ADMIN))
+
+    def test_snapshot_columns(self):
+        users = self.snapshot.tables["users"]
+        self.assertEqual(users.num_rows, 84)
+        self.assertNotIn("password", users.column_names)
+        self.assertEqual(str(users.schema.field("id_user").type), "int64")
+
+    def test_parquet_snapshot(self):
+        import pyarrow.parquet as pq
+
+        children = pq.read_table(os.path.join(
+            self.directory.name, "snapshots", "children.parquet"))
+        self.assertTrue(children.equals(
+            self.snapshot.tables["children"].replace_schema_metadata(
+                children.schema.metadata)))
+
+    def test_old_snapshot_not_used(self):
+        self.snapshot.generation -= 1
+        with self.assertLogs("src.snapshot", "WARNING"):
+            result = self.snapshot_actions.print_all_accounts(ADMIN)
+        self.assertEqual(result, 84)
+
+
+class TestOpenSnapshot(unittest.TestCase):
+
+    def test_missing_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertLogs("src.snapshot", "WARNING") as logs:
+                self.assertIsNone(open_snapshot(directory))
+        self.assertIn("create_database --snapshot", logs.output[0])
+
+    def test_pyarrow_not_installed(self):
+        with mock.patch.dict(sys.modules, {"pyarrow": None}):
+            with self.assertLogs("src.snapshot", "WARNING"):
+                self.assertIsNone(open_snapshot("snapshots"))
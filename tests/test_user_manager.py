@@ -2,13 +2,14 @@ import unittest
 
 from src.database_manager import DatabaseManager
 from src.user_manager import UserManager
+from tests.helpers import shared_database
 
 
 class TestUserManager(unittest.TestCase):
 
     @classmethod
     def setUp(self):
-        self.db_manager = DatabaseManager('users.sqlite3')
+        self.db_manager = DatabaseManager(shared_database())
         self.user_manager = UserManager(self.db_manager)
 
     def test_validate_credentials_success(self):